@@ -1,12 +1,16 @@
+import sys
+import json
 import matplotlib.pyplot as plt
 
+# benchmark.py sonuçlarını oku (FraudControlAPI/Services/Scoring/benchmark.py)
+results_file = sys.argv[1] if len(sys.argv) > 1 else 'benchmark.json'
+with open(results_file, 'r', encoding='utf-8') as file:
+    results = json.load(file)
+
 # Verileri tanımla
-data = {
-    'Gemini': {'Doğru': 19, 'Yanlış': 11},
-    'Tensorflow': {'Doğru': 22, 'Yanlış': 8},
-    'IPQS': {'Doğru': 24, 'Yanlış': 6},
-    'OpenAI': {'Doğru': 27, 'Yanlış': 3}
-}
+names = {'gemini': 'Gemini', 'tensorflow': 'Tensorflow', 'ipqs': 'IPQS', 'openai': 'OpenAI'}
+data = {names.get(scorer, scorer): {'Doğru': result['correct'], 'Yanlış': result['incorrect']}
+        for scorer, result in results['scorers'].items() if 'correct' in result}
 
 # Çubuk grafik verilerini ayır
 categories = list(data.keys())
@@ -26,7 +30,6 @@ plt.xlabel('Kategoriler')
 plt.ylabel('Sayılar')
 plt.title('Kategorilere Göre Doğru ve Yanlış Sayıları')
 plt.xticks([i + bar_width / 2 for i in index], categories)
-plt.yticks(range(1, 31))
 plt.legend()
 
 plt.show()
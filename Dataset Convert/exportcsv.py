@@ -1,28 +1,48 @@
+import argparse
+import itertools
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 
-# Define the file path for the input text file and the output CSV file
-input_file = 'sms.txt'  # Replace with your actual file path
-output_file = 'sms.csv'  # Desired output CSV file
+# Define the file path for the input text file and the output file; .parquet or .csv picks the format
+parser = argparse.ArgumentParser(description="Convert the label<TAB>message corpus to Parquet or CSV.")
+parser.add_argument("input_file", nargs="?", default='sms.txt', help="Tab-separated corpus")
+parser.add_argument("output_file", nargs="?", default='sms.parquet', help="Output file, sms.parquet or sms.csv")
+parser.add_argument("--chunk-size", type=int, default=100000, help="Lines converted at a time")
+args = parser.parse_args()
 
-# Initialize lists to hold the labels and messages
-labels = []
-messages = []
+# Encode labels: 1 for spam, 0 for ham
+label_codes = {'spam': 1, 'ham': 0}
+schema = pa.schema([('label', pa.int8()), ('message', pa.string())])
+write_csv = args.output_file.endswith('.csv')
+if write_csv:
+    pd.DataFrame(columns=['label', 'message']).to_csv(args.output_file, index=False, encoding='utf-8')
+else:
+    writer = pq.ParquetWriter(args.output_file, schema)
+rows = 0
+skipped = 0
 
-# Read the input text file and process each line
-with open(input_file, 'r', encoding='utf-8') as file:
-    for line in file:
-        # Split the line into label and message
-        label, message = line.split('\t', 1)
-        labels.append(label)
-        messages.append(message.strip())  # Remove any leading/trailing whitespace
+# Convert the input text file a chunk of lines at a time
+with open(args.input_file, 'r', encoding='utf-8') as file:
+    while True:
+        lines = list(itertools.islice(file, args.chunk_size))
+        if not lines:
+            break
 
-# Create a DataFrame from the collected data
-data = pd.DataFrame({'label': labels, 'message': messages})
+        # Split every line at its first tab; lines without a tab or with an unknown label are skipped
+        parts = pd.Series(lines, dtype=object).str.rstrip('\r\n').str.partition('\t')
+        labels = parts[0].str.strip().str.lower().map(label_codes)
+        valid = (parts[1] == '\t') & labels.notna()
+        skipped += int((~valid & (parts[0].str.strip() != '')).sum())
+        data = pd.DataFrame({'label': labels[valid].astype('int8'), 'message': parts[2][valid].str.strip()})
+        rows += len(data)
 
-# Encode labels: 1 for spam, 0 for ham
-data['label'] = data['label'].map({'spam': 1, 'ham': 0})
+        if write_csv:
+            data.to_csv(args.output_file, mode='a', header=False, index=False, encoding='utf-8')
+        else:
+            writer.write_table(pa.Table.from_pandas(data, schema=schema, preserve_index=False))
 
-# Save the DataFrame to a CSV file
-data.to_csv(output_file, index=False, encoding='utf-8')
+if not write_csv:
+    writer.close()
 
-print(f"Data has been successfully saved to {output_file}")
+print(f"Data has been successfully saved to {args.output_file} ({rows} messages, {skipped} malformed lines skipped)")
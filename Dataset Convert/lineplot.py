@@ -1,24 +1,16 @@
+import sys
+import json
 import matplotlib.pyplot as plt
 
-# Data
-data = {
-    "IPQS API": [
-        16174, 16203, 16040, 15934, 15433, 15772, 15896, 16071, 14964, 15498, 14893, 15648, 16165, 14523, 16011, 14648,
-        15684, 14414, 14447, 15188, 14378, 16111, 14932, 21156, 26083
-    ],
-    "OpenAI API": [
-        16195, 16219, 16175, 15914, 16146, 16090, 16057, 15875, 16026, 15993, 15628, 15374, 15667, 15160, 14948, 14914,
-        15120, 15455, 15417, 14877, 14431, 15758, 14396, 14465, 14629
-    ],
-    "Gemini API": [
-        16237, 16199, 16001, 16157, 16181, 16098, 16035, 16132, 15385, 15489, 15169, 15766, 15427, 15928, 14637, 14406,
-        14440, 14958, 14475, 14923, 14887, 15639, 15886, 15677, 15489
-    ],
-    "TensorFlow API": [
-        32806, 33777, 34052, 34107, 34432, 34515, 34538, 34448, 34459, 34092, 34243, 34166, 33916, 33999, 34338, 33721,
-        33996, 33549, 33638, 33722, 33396, 33699, 33183, 33252, 33301
-    ]
-}
+# Benchmark results written by FraudControlAPI/Services/Scoring/benchmark.py
+results_file = sys.argv[1] if len(sys.argv) > 1 else 'benchmark.json'
+with open(results_file, 'r', encoding='utf-8') as file:
+    results = json.load(file)
+
+# Data: execution time of every call at the first concurrency level
+names = {'ipqs': 'IPQS API', 'openai': 'OpenAI API', 'gemini': 'Gemini API', 'tensorflow': 'TensorFlow API'}
+data = {names.get(scorer, scorer): result['latencies_ms']
+        for scorer, result in results['scorers'].items() if 'latencies_ms' in result}
 
 # Plotting
 plt.figure(figsize=(14, 10))
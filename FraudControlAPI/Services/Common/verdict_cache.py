@@ -0,0 +1,75 @@
+"""
+Description: This script caches the verdicts of the Gemini and OpenAI scorers by normalized message.
+Author: Sarper Arda BAKIR
+Date: 18-10-2026
+Version: 1.0
+"""
+
+import os
+import re
+import hashlib
+import threading
+import unicodedata
+from dotenv import load_dotenv
+from cache import TTLCache
+
+load_dotenv()
+
+# Default SQLite file of the persistent tier, next to the project; set LLM_CACHE_PATH= to keep verdicts in memory only
+DEFAULT_CACHE_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../llm_verdict_cache.db'))
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+def normalize_message(message):
+    """
+    Normalizes an SMS so that copies differing only in Unicode form or whitespace share one verdict.
+    """
+    return re.sub(r'\s+', ' ', unicodedata.normalize('NFKC', message)).strip()
+
+def verdict_key(message, model, prompt_version):
+    """
+    Builds the cache key of a verdict from the normalized message, the model name and the prompt version.
+
+    Changing the prompt or the model therefore never returns verdicts given to another prompt or model.
+    """
+    payload = '\x00'.join([model, str(prompt_version), normalize_message(message)])
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def get_verdict_cache():
+    """
+    Returns the process-wide verdict cache.
+
+    LLM_CACHE_SIZE entries are kept in memory and LLM_CACHE_TTL seconds (default one day) is
+    the lifetime of a verdict. Failed calls are never cached.
+    """
+    global _shared_cache
+    if _shared_cache is None:
+        with _shared_cache_lock:
+            if _shared_cache is None:
+                _shared_cache = TTLCache(
+                    maxsize=int(os.getenv("LLM_CACHE_SIZE", "10000")),
+                    ttl=float(os.getenv("LLM_CACHE_TTL", "86400")),
+                    negative_ttl=0,
+                    path=os.getenv("LLM_CACHE_PATH", DEFAULT_CACHE_PATH) or None,
+                    namespace="llm",
+                )
+    return _shared_cache
+
+def cached_verdict(message, model, prompt_version, compute, is_failure=None, cache=None):
+    """
+    Returns the cached verdict of a message, asking the model through compute() on a miss.
+
+    Args:
+        message: SMS text.
+        model: Model name.
+        prompt_version: Version of the prompt the verdict was produced with.
+        compute: Function without arguments returning the verdict text.
+        is_failure: Optional function telling whether a verdict is an error that must not be cached.
+        cache: Cache to use instead of the shared one.
+
+    Returns:
+        str: The verdict text.
+    """
+    cache = cache or get_verdict_cache()
+    return cache.get_or_compute(verdict_key(message, model, prompt_version), compute, is_failure)
@@ -8,10 +8,19 @@
 # Import the required libraries
 import os
 import sys
+import json
+import asyncio
+import weakref
+import argparse
 from dotenv import load_dotenv
 import google.generativeai as genai
 from google.generativeai.types.generation_types import StopCandidateException
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Common'))
+from verdict_cache import get_verdict_cache, verdict_key
+from batch_prompt import score_batch
+from instrumentation import increment, span
+
 # Load the environment variables from the .env file
 load_dotenv()
 
@@ -20,6 +29,119 @@ API_KEY = os.getenv("GEMINI_API_KEY")
 
 genai.configure(api_key=API_KEY)
 
+# Model and prompt the cached verdicts belong to; bump PROMPT_VERSION whenever the prompt changes
+MODEL_NAME = "gemini-1.5-flash"
+PROMPT_VERSION = 1
+PROMPT_SUFFIX = " Is this message fraud? Write only percentage of fraud."
+
+# Sampling settings of the single-message prompt; the answer is only a percentage, so a few tokens are enough
+GENERATION_CONFIG = {
+    "temperature": 1,
+    "top_p": 0.95,
+    "top_k": 64,
+    "max_output_tokens": 20,
+    "response_mime_type": "text/plain",
+}
+BATCH_GENERATION_CONFIG = {"temperature": 0, "response_mime_type": "application/json"}
+TIMEOUT = 20.0
+ERROR_PREFIX = "An unexpected error occurred"
+
+def is_error_response(verdict):
+    return not verdict or verdict.startswith(ERROR_PREFIX)
+
+class GeminiScorer:
+    """
+    Long-lived Gemini scorer that builds the model once and scores many messages concurrently.
+
+    Each prompt is a single generate_content_async() call without a chat session. At most
+    `concurrency` calls are in flight, each bounded by `timeout` seconds. The transport, an
+    async function from prompt to answer text, can be replaced by a fake to run offline.
+
+    The SDK's async client is bound to the event loop of its first call, so a scorer should
+    live inside one long-running loop, as in the scoring daemon. One-off synchronous calls go
+    through generate_gemini_response() and score_message(), which use the sync client.
+    """
+
+    def __init__(self, model_name=MODEL_NAME, max_output_tokens=20, concurrency=8, timeout=TIMEOUT,
+                 transport=None, cache=None):
+        """
+        Args:
+            model_name: Gemini model name.
+            max_output_tokens: Cap on the answer length.
+            concurrency: Number of requests in flight.
+            timeout: Seconds before a request is given up.
+            transport: Async function sending a prompt and returning the answer text.
+            cache: Verdict cache to use instead of the shared one.
+        """
+        if transport is None:
+            model = genai.GenerativeModel(
+                model_name=model_name,
+                generation_config=dict(GENERATION_CONFIG, max_output_tokens=max_output_tokens),
+            )
+            transport = self._model_transport(model)
+        self.model_name = model_name
+        self.transport = transport
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.cache = cache or get_verdict_cache()
+        self._semaphores = weakref.WeakKeyDictionary()
+
+    @staticmethod
+    def _model_transport(model):
+        async def transport(prompt):
+            response = await model.generate_content_async(prompt)
+            return response.text
+        return transport
+
+    def _semaphore(self):
+        # A semaphore belongs to one event loop, so every loop that uses the scorer gets its own
+        loop = asyncio.get_running_loop()
+        if loop not in self._semaphores:
+            self._semaphores[loop] = asyncio.Semaphore(self.concurrency)
+        return self._semaphores[loop]
+
+    async def generate(self, prompt):
+        """
+        Sends one prompt and returns the answer text, or an error text if it failed or timed out.
+        """
+        async with self._semaphore():
+            try:
+                with span("gemini.request"):
+                    return (await asyncio.wait_for(self.transport(prompt), self.timeout)).strip()
+            except asyncio.TimeoutError:
+                increment("gemini.timeout")
+                return f"{ERROR_PREFIX}: no answer within {self.timeout} seconds"
+            except Exception as e:
+                increment("gemini.error")
+                return f"{ERROR_PREFIX}: {str(e)}"
+
+    async def score(self, message):
+        """
+        Returns the verdict for an SMS message, reusing the cached verdict of an identical message.
+        """
+        key = verdict_key(message, self.model_name, PROMPT_VERSION)
+        verdict = self.cache.get(key)
+        if verdict is None:
+            verdict = await self.generate(message + PROMPT_SUFFIX)
+            if not is_error_response(verdict):
+                self.cache.set(key, verdict)
+        return verdict
+
+    async def score_many(self, messages):
+        """
+        Scores messages concurrently and returns their verdicts in input order.
+        """
+        return await asyncio.gather(*(self.score(message) for message in messages))
+
+_model = None
+_batch_model = None
+
+def get_model():
+    global _model
+    if _model is None:
+        _model = genai.GenerativeModel(model_name=MODEL_NAME, generation_config=GENERATION_CONFIG)
+    return _model
+
 """
   This function sends a prompt to the Gemini AI API and returns the generated text response.
 
@@ -30,35 +152,84 @@ genai.configure(api_key=API_KEY)
       The generated text response from Gemini AI.
 """
 def generate_gemini_response(prompt):
+    # Synchronous on purpose: an async client would stay bound to the loop asyncio.run() closes after the first call
     try:
-        # Create the model and chat session
-        generation_config = {
-            "temperature": 1,
-            "top_p": 0.95,
-            "top_k": 64,
-            "max_output_tokens": 8192,
-            "response_mime_type": "text/plain",
-        }
-
-        model = genai.GenerativeModel(
-            model_name="gemini-1.5-flash",
-            generation_config=generation_config,
-        )
-
-        chat_session = model.start_chat(
-            history=[]
-        )
-
-        response = chat_session.send_message(prompt)
-        return response
-
+        with span("gemini.request"):
+            return get_model().generate_content(prompt, request_options={"timeout": TIMEOUT}).text.strip()
     except Exception as e:
-        return f"An unexpected error occurred: {str(e)}"
+        increment("gemini.error")
+        return f"{ERROR_PREFIX}: {str(e)}"
+
+"""
+  This function returns the Gemini verdict for an SMS message, reusing the cached verdict of an identical message.
+
+  Args:
+      message: The SMS message to be scored.
+
+  Returns:
+      The generated text response from Gemini AI.
+"""
+def score_message(message):
+    cache = get_verdict_cache()
+    key = verdict_key(message, MODEL_NAME, PROMPT_VERSION)
+    verdict = cache.get(key)
+    if verdict is None:
+        verdict = generate_gemini_response(message + PROMPT_SUFFIX)
+        if not is_error_response(verdict):
+            cache.set(key, verdict)
+    return verdict
+
+"""
+  This function sends a batch prompt to the Gemini AI API and asks for a JSON answer.
+
+  Args:
+      prompt: The batch prompt built by batch_prompt.build_batch_prompt().
+
+  Returns:
+      The generated text response from Gemini AI.
+"""
+def ask_gemini(prompt):
+    global _batch_model
+    if _batch_model is None:
+        _batch_model = genai.GenerativeModel(model_name=MODEL_NAME, generation_config=BATCH_GENERATION_CONFIG)
+    return _batch_model.generate_content(prompt).text
+
+"""
+  This function scores many SMS messages with one Gemini request per batch.
+
+  Args:
+      messages: The SMS messages to be scored.
+      batch_size: Number of messages packed into one request.
+
+  Returns:
+      A {"percentage", "category"} dict per message, or None where no valid answer came back.
+"""
+def score_messages_batch(messages, batch_size=20):
+    return score_batch(messages, ask_gemini, batch_size, model=MODEL_NAME)
 
 if __name__ == "__main__":
-    if len(sys.argv) > 1:
-        prompt = sys.argv[1] + " Is this message fraud? Write only percentage of fraud."
-        response = generate_gemini_response(prompt)
-        print(response if isinstance(response, str) else response.text)
+    if len(sys.argv) > 1 and sys.argv[1] == "--batch":
+        # Only parse options in batch mode, so a single message starting with "-" is still scored
+        parser = argparse.ArgumentParser(description="Score SMS messages with Gemini in batches.")
+        parser.add_argument("--batch", metavar="FILE", required=True,
+                            help="Score one message per line from FILE ('-' for stdin) and print one JSON line per message")
+        parser.add_argument("--batch-size", type=int, default=20, help="Messages per request")
+        args = parser.parse_args()
+        with (sys.stdin if args.batch == '-' else open(args.batch, 'r', encoding='utf-8')) as handle:
+            messages = [line.rstrip('\n') for line in handle]
+        for verdict in score_messages_batch(messages, args.batch_size):
+            print(json.dumps(verdict, ensure_ascii=False))
+    elif len(sys.argv) > 1 and sys.argv[1] == "--messages":
+        parser = argparse.ArgumentParser(description="Score SMS messages with Gemini concurrently.")
+        parser.add_argument("--messages", metavar="FILE", required=True,
+                            help="Score one message per line from FILE ('-' for stdin) and print one verdict per line")
+        parser.add_argument("--concurrency", type=int, default=8, help="Requests in flight")
+        args = parser.parse_args()
+        with (sys.stdin if args.messages == '-' else open(args.messages, 'r', encoding='utf-8')) as handle:
+            messages = [line.rstrip('\n') for line in handle]
+        for verdict in asyncio.run(GeminiScorer(concurrency=args.concurrency).score_many(messages)):
+            print(verdict.replace('\n', ' '))
+    elif len(sys.argv) > 1:
+        print(score_message(sys.argv[1]))
     else:
         print("Prompt is not provided. Please provide a prompt as an argument.")
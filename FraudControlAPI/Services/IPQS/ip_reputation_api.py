@@ -1,12 +1,17 @@
-import json
-import requests
 import os
 from dotenv import load_dotenv
+from ipqs_client import IPQSClient, get_client
+from reputation_cache import get_reputation_cache, cache_key, is_failed_lookup
 
 class IPQS:
     load_dotenv()
     key = os.getenv("IP_QUALITY_SCORE_API_KEY")
 
+    def __init__(self, client: IPQSClient = None, cache=None):
+        # All lookups share one pooled, retrying client and one reputation cache unless they are passed in
+        self.client = client or get_client()
+        self.cache = cache or get_reputation_cache()
+
     def payment_transaction_fraud_prev(self, ip: str, params: dict = {}) -> dict:
         """Method used to lookup Payment & Transaction Fraud Prevention API
 
@@ -20,23 +25,12 @@ class IPQS:
         if not params:
             return {}
 
-        url = "https://www.ipqualityscore.com/api/json/ip/%s/%s" % (self.key, ip)
-        response = requests.get(url, params=params)
-
-        # Print the response text for debugging
-        print("Response text:", response.text)
-        
-        # Print status code
-        print("Status code:", response.status_code)
-
-        try:
-            return json.loads(response.text)
-        except json.JSONDecodeError:
-            print("Failed to decode JSON")
-            return {}
+        ip = ip.strip()
+        return self.cache.get_or_compute(cache_key("ip", ip, params),
+                                         lambda: self.client.ip_reputation(ip, params), is_failed_lookup)
 
-def check_ip_fraud(ip_address: str):
-    ipqs = IPQS()
+def check_ip_fraud(ip_address: str, ipqs: IPQS = None):
+    ipqs = ipqs or IPQS()
     parameters = {
         'user_agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3',
         'user_language': 'en-US',
@@ -0,0 +1,195 @@
+import os
+import sys
+import time
+import random
+import socket
+import threading
+import urllib.parse
+import requests
+import urllib3
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from requests.adapters import HTTPAdapter
+from dotenv import load_dotenv
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Common'))
+from instrumentation import increment, is_enabled, record, span
+
+load_dotenv()
+
+DEFAULT_BASE_URL = "https://www.ipqualityscore.com/api/json"
+
+# Status codes worth retrying: rate limiting and transient server errors
+RETRY_STATUS_CODES = frozenset([429, 500, 502, 503, 504])
+
+class RateLimiter:
+    """Token bucket that limits the request rate per host.
+
+    Each host gets its own bucket holding up to burst tokens, refilled at requests_per_second.
+    """
+
+    def __init__(self, requests_per_second: float, burst: int = 1):
+        self.rate = float(requests_per_second)
+        self.burst = max(1, burst)
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, host: str = ""):
+        """Blocks until a request to host may be sent."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                tokens, updated = self._buckets.get(host, (self.burst, now))
+                tokens = min(self.burst, tokens + (now - updated) * self.rate)
+                if tokens >= 1:
+                    self._buckets[host] = (tokens - 1, now)
+                    return
+                self._buckets[host] = (tokens, now)
+                wait = (1 - tokens) / self.rate
+            time.sleep(wait)
+
+class TimedConnectionMixin:
+    """Splits the setup of a new connection into DNS lookup, TCP connect and the whole connect (TLS included)."""
+
+    def _new_conn(self):
+        host = self._dns_host
+        try:
+            with span("ipqs.dns"):
+                address = socket.getaddrinfo(host, self.port, 0, socket.SOCK_STREAM)[0][4][0]
+        except socket.gaierror:
+            # Let urllib3 resolve again and raise its own error
+            return super()._new_conn()
+        increment("ipqs.new_connection")
+        self._dns_host = address
+        try:
+            with span("ipqs.tcp_connect"):
+                return super()._new_conn()
+        finally:
+            self._dns_host = host
+
+    def connect(self):
+        with span("ipqs.connect"):
+            super().connect()
+
+class TimedHTTPConnection(TimedConnectionMixin, HTTPConnection):
+    pass
+
+class TimedHTTPSConnection(TimedConnectionMixin, HTTPSConnection):
+    pass
+
+class TimedHTTPConnectionPool(urllib3.HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+class TimedHTTPSConnectionPool(urllib3.HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+class IPQSClient:
+    """Shared HTTP client for the IPQS JSON APIs.
+
+    Keeps connections alive in a pooled session, applies connect/read timeouts and retries
+    rate-limited or failed requests with jittered exponential backoff.
+    """
+
+    def __init__(self, key: str = None, base_url: str = None, connect_timeout: float = 3.05,
+                 read_timeout: float = 10.0, max_retries: int = 3, backoff_factor: float = 0.5,
+                 max_backoff: float = 8.0, pool_size: int = 20, session: requests.Session = None,
+                 requests_per_second: float = None):
+        """
+        Args:
+            key (str, optional): IPQS API key. Defaults to IP_QUALITY_SCORE_API_KEY.
+            base_url (str, optional): API base URL. Defaults to IPQS_BASE_URL or the public IPQS endpoint,
+                so tests can point the client at a local stand-in server.
+            connect_timeout (float, optional): Seconds to wait for a connection.
+            read_timeout (float, optional): Seconds to wait for the response.
+            max_retries (int, optional): Retries after the first attempt on 429/5xx and connection errors.
+            backoff_factor (float, optional): Base of the exponential backoff in seconds.
+            max_backoff (float, optional): Upper bound of a single backoff sleep in seconds.
+            pool_size (int, optional): Number of keep-alive connections kept per host.
+            session (requests.Session, optional): Session to use instead of a new pooled one.
+            requests_per_second (float, optional): Request rate limit per host, retries included.
+                Defaults to IPQS_REQUESTS_PER_SECOND, or no limit.
+        """
+        self.key = key if key is not None else os.getenv("IP_QUALITY_SCORE_API_KEY")
+        self.base_url = (base_url or os.getenv("IPQS_BASE_URL") or DEFAULT_BASE_URL).rstrip('/')
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        requests_per_second = requests_per_second or float(os.getenv("IPQS_REQUESTS_PER_SECOND", "0"))
+        self.rate_limiter = RateLimiter(requests_per_second) if requests_per_second > 0 else None
+
+        if session is None:
+            session = requests.Session()
+            # Retries are handled below so that every attempt gets the jittered backoff
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+            if is_enabled():
+                adapter.poolmanager.pool_classes_by_scheme = {"http": TimedHTTPConnectionPool,
+                                                              "https": TimedHTTPSConnectionPool}
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+        self.session = session
+
+    def _backoff(self, attempt: int, response: requests.Response = None) -> float:
+        # Honour Retry-After when the server sends one, otherwise use full jitter
+        if response is not None and response.headers.get("Retry-After", "").isdigit():
+            return min(float(response.headers["Retry-After"]), self.max_backoff)
+        return random.uniform(0, min(self.max_backoff, self.backoff_factor * (2 ** attempt)))
+
+    def get_json(self, path: str, params: dict = None) -> dict:
+        """Sends a GET request to an IPQS endpoint and returns the decoded JSON.
+
+        Args:
+            path (str): Endpoint path below the base URL, e.g. "ip/<key>/<ip>".
+            params (dict, optional): Query parameters.
+
+        Returns:
+            dict: API response, or {"success": False, "message": ...} if the request failed
+                after all retries or the body is not JSON.
+        """
+        url = "%s/%s" % (self.base_url, path)
+        host = urllib.parse.urlsplit(url).netloc
+        for attempt in range(self.max_retries + 1):
+            if self.rate_limiter is not None:
+                with span("ipqs.rate_limit_wait"):
+                    self.rate_limiter.acquire(host)
+            try:
+                with span("ipqs.request"):
+                    response = self.session.get(url, params=params, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                increment("ipqs.connection_error")
+                if attempt == self.max_retries:
+                    return {"success": False, "message": "Request failed: %s" % e}
+                increment("ipqs.retry")
+                time.sleep(self._backoff(attempt))
+                continue
+
+            # Time from sending the request to the response headers, new connection setup included
+            record("ipqs.time_to_headers", response.elapsed.total_seconds())
+            if response.status_code in RETRY_STATUS_CODES and attempt < self.max_retries:
+                increment("ipqs.retry")
+                time.sleep(self._backoff(attempt, response))
+                continue
+
+            try:
+                return response.json()
+            except ValueError:
+                return {"success": False, "message": "Invalid JSON response (status %d)" % response.status_code}
+
+    def ip_reputation(self, ip: str, params: dict = None) -> dict:
+        """Looks up the Proxy & VPN Detection / Transaction Scoring API for an IP address."""
+        return self.get_json("ip/%s/%s" % (self.key, ip), params)
+
+    def url_scan(self, url: str, params: dict = None) -> dict:
+        """Looks up the Malicious URL Scanner API for a URL."""
+        return self.get_json("url/%s/%s" % (self.key, urllib.parse.quote_plus(url)), params)
+
+_shared_client = None
+_shared_client_lock = threading.Lock()
+
+def get_client() -> IPQSClient:
+    """Returns the process-wide client, so every lookup reuses the same connection pool."""
+    global _shared_client
+    if _shared_client is None:
+        with _shared_client_lock:
+            if _shared_client is None:
+                _shared_client = IPQSClient()
+    return _shared_client
@@ -0,0 +1,40 @@
+import os
+import sys
+import json
+import threading
+from dotenv import load_dotenv
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Common'))
+from cache import TTLCache
+
+load_dotenv()
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+def get_reputation_cache() -> TTLCache:
+    """Returns the process-wide cache of IPQS lookups.
+
+    The cache is configured from the environment: IPQS_CACHE_SIZE entries in memory, IPQS_CACHE_TTL
+    seconds for successful lookups, IPQS_CACHE_NEGATIVE_TTL seconds for failed ones and, if
+    IPQS_CACHE_PATH is set, a SQLite file that keeps the results across runs of the scripts.
+    """
+    global _shared_cache
+    if _shared_cache is None:
+        with _shared_cache_lock:
+            if _shared_cache is None:
+                _shared_cache = TTLCache(
+                    maxsize=int(os.getenv("IPQS_CACHE_SIZE", "10000")),
+                    ttl=float(os.getenv("IPQS_CACHE_TTL", "3600")),
+                    negative_ttl=float(os.getenv("IPQS_CACHE_NEGATIVE_TTL", "60")),
+                    path=os.getenv("IPQS_CACHE_PATH") or None,
+                    namespace="ipqs",
+                )
+    return _shared_cache
+
+def cache_key(kind: str, value: str, params: dict = None) -> str:
+    """Builds the cache key of a lookup; the parameters are part of it since they change the score."""
+    return "%s:%s:%s" % (kind, value, json.dumps(params or {}, sort_keys=True))
+
+def is_failed_lookup(result: dict) -> bool:
+    return not result.get('success')
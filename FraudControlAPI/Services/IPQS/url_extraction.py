@@ -0,0 +1,211 @@
+import re
+import ipaddress
+import urllib.parse
+
+# Generic top-level domains accepted for links without a scheme
+GENERIC_TLDS = frozenset([
+    'com', 'net', 'org', 'info', 'biz', 'edu', 'gov', 'mil', 'int', 'app', 'dev', 'xyz', 'top', 'site',
+    'online', 'club', 'shop', 'store', 'link', 'live', 'click', 'icu', 'vip', 'win', 'bid', 'loan', 'work',
+    'fun', 'space', 'website', 'tech', 'pro', 'mobi', 'name', 'page', 'cloud', 'digital', 'today', 'life',
+    'world', 'email', 'support', 'help', 'services', 'bank', 'money', 'cash', 'finance', 'rest', 'buzz',
+    'asia', 'aero', 'coop', 'jobs', 'museum', 'travel', 'tel', 'cat', 'network', 'news', 'media', 'agency',
+    'team', 'center', 'company', 'group', 'global', 'solutions', 'systems', 'zone', 'one', 'plus', 'games',
+    'bet', 'casino', 'poker', 'lol', 'sbs', 'cfd', 'cyou', 'monster', 'quest', 'bond', 'best', 'art', 'blog',
+    'sale', 'deals', 'gift', 'love', 'market', 'download', 'host', 'party', 'review', 'trade', 'date',
+    'racing', 'stream', 'science', 'faith', 'men', 'ltd', 'inc', 'llc', 'istanbul', 'ist',
+])
+
+# Delegated two-letter country-code top-level domains
+COUNTRY_TLDS = frozenset("""
+    ac ad ae af ag ai al am ao aq ar as at au aw ax az ba bb bd be bf bg bh bi bj bm bn bo bq br bs bt bw by
+    bz ca cc cd cf cg ch ci ck cl cm cn co cr cu cv cw cx cy cz de dj dk dm do dz ec ee eg er es et eu fi fj
+    fk fm fo fr ga gd ge gf gg gh gi gl gm gn gp gq gr gs gt gu gw gy hk hm hn hr ht hu id ie il im in io iq
+    ir is it je jm jo jp ke kg kh ki km kn kp kr kw ky kz la lb lc li lk lr ls lt lu lv ly ma mc md me mg mh
+    mk ml mm mn mo mp mq mr ms mt mu mv mw mx my mz na nc ne nf ng ni nl no np nr nu nz om pa pe pf pg ph pk
+    pl pm pn pr ps pt pw py qa re ro rs ru rw sa sb sc sd se sg sh si sk sl sm sn so sr ss st su sv sx sy sz
+    tc td tf tg th tj tk tl tm tn to tr tt tv tw tz ua ug uk us uy uz va vc ve vg vi vn vu wf ws ye yt za zm
+    zw
+""".split())
+
+# Internationalized top-level domains in punycode, e.g. xn--p1ai for .рф
+IDN_TLDS = frozenset([
+    'xn--p1ai', 'xn--p1acf', 'xn--90ais', 'xn--j1amh', 'xn--80asehdb', 'xn--80aswg', 'xn--c1avg',
+    'xn--80adxhks', 'xn--d1acj3b', 'xn--90a3ac', 'xn--d1alf', 'xn--l1acc', 'xn--80ao21a', 'xn--e1a4c',
+    'xn--node', 'xn--qxam', 'xn--y9a3aq', 'xn--fiqs8s', 'xn--fiqz9s', 'xn--55qx5d', 'xn--io0a7i',
+    'xn--ses554g', 'xn--czru2d', 'xn--vhquv', 'xn--6frz82g', 'xn--kprw13d', 'xn--kpry57d', 'xn--j6w193g',
+    'xn--3e0b707e', 'xn--tckwe', 'xn--q9jyb4c', 'xn--h2brj9c', 'xn--45brj9c', 'xn--o3cw4h',
+    'xn--mgbaam7a8h', 'xn--mgberp4a5d4ar', 'xn--wgbh1c', 'xn--wgbl6a', 'xn--mgbtx2b', 'xn--ygbi2ammx',
+    'xn--lgbbat1ad8j', 'xn--mgbc0a9azcg', 'xn--pgbs0dh', 'xn--ogbpf8fl', 'xn--mgba3a4f16a',
+    'xn--mgbbh1a71e', 'xn--mgbai9azgqp6j', 'xn--4dbrk0ce',
+])
+
+# Query parameters that only track the click and never change the target page
+TRACKING_PARAMS = frozenset([
+    'fbclid', 'gclid', 'dclid', 'gbraid', 'wbraid', 'msclkid', 'yclid', 'igshid', 'mc_cid', 'mc_eid',
+    '_ga', '_gl', 'ref_src', 'spm', 'si',
+])
+TRACKING_PREFIXES = ('utm_', 'pk_', 'mtm_')
+
+_LABEL = r'[^\W_](?:[\w-]{0,61}[^\W_])?'
+URL_PATTERN = re.compile(
+    r'(?<![\w@.-])'
+    r'(?:(?P<scheme>https?)://)?'
+    r'(?P<host>(?:' + _LABEL + r'\.)+(?P<tld>[^\W\d_]{2,63})'
+    r'|(?P<ip>(?:\d{1,3}\.){3}\d{1,3}|\[[0-9a-f:.]+\]))'
+    r'(?P<port>:\d{1,5})?'
+    r'(?P<rest>[/?#][^\s<>"]*)?',
+    re.IGNORECASE,
+)
+
+# Punctuation that ends a sentence rather than the link
+TRAILING_PUNCTUATION = '.,;:!?\'")]}>'
+
+def is_ip_host(host: str) -> bool:
+    """Tells whether a host is an IPv4 address or an IPv6 address, with or without brackets."""
+    try:
+        ipaddress.ip_address(host.strip('[]'))
+        return True
+    except ValueError:
+        return False
+
+def _is_link(match) -> bool:
+    if match.group('ip'):
+        # Raw IP links are only taken with a scheme, so amounts like "1.250.000.00" are not links
+        return bool(match.group('scheme')) and is_ip_host(match.group('ip'))
+    if match.group('scheme') or match.group('host').lower().startswith('www.'):
+        return True
+    tld = match.group('tld')
+    # "Tebrikler.Kazandınız" or "Hello.My": a capitalized word after a dot starts a sentence, not a link
+    if tld[0].isupper() and not tld.isupper() and not match.group('rest'):
+        return False
+    # Without a scheme a real TLD is required, so "3.50", "file.txt" or joined Turkish words are not taken for links
+    tld = tld.lower()
+    if tld.isascii():
+        return tld in GENERIC_TLDS or tld in COUNTRY_TLDS
+    try:
+        return tld.encode('idna').decode('ascii') in IDN_TLDS
+    except UnicodeError:
+        return False
+
+def extract_urls(message: str) -> list:
+    """Finds every link-like token in a message, with or without a scheme.
+
+    Args:
+        message (str): SMS text.
+
+    Returns:
+        list: Links in order of appearance, as written in the message.
+    """
+    urls = []
+    for match in URL_PATTERN.finditer(message):
+        if not _is_link(match):
+            continue
+        url = match.group(0).rstrip(TRAILING_PUNCTUATION)
+        # Keep a closing bracket that belongs to the link, as in ".../wiki/Foo_(bar)"
+        while url.count('(') > url.count(')') and match.group(0)[len(url):].startswith(')'):
+            url += ')'
+        urls.append(url)
+    return urls
+
+def replace_urls(message: str, replacement: str = " <URL> ") -> str:
+    """Replaces every link-like token in a message, e.g. to compare messages regardless of their links."""
+    return URL_PATTERN.sub(lambda match: replacement if _is_link(match) else match.group(0), message)
+
+def normalize_host(host: str) -> str:
+    """Lowercases a host, drops the trailing dot and converts internationalized names to punycode.
+
+    IP addresses are written in their canonical form, IPv6 ones in brackets.
+    """
+    host = host.strip().rstrip('.').lower()
+    try:
+        address = ipaddress.ip_address(host.strip('[]'))
+        return "[%s]" % address.compressed if address.version == 6 else address.compressed
+    except ValueError:
+        pass
+    try:
+        return host.encode('idna').decode('ascii')
+    except UnicodeError:
+        return host
+
+def normalize_url(url: str) -> str:
+    """Canonicalizes a URL so that spelling and tracking variants of the same address compare equal.
+
+    Args:
+        url (str): URL as found in the message.
+
+    Returns:
+        str: URL with a lowercase scheme (http if missing), punycode host, no default port,
+            no fragment, no tracking parameters and no trailing slash.
+    """
+    url = url.strip()
+    if not re.match(r'^[a-z][a-z0-9+.-]*://', url, re.IGNORECASE):
+        url = "http://" + url
+    parts = urllib.parse.urlsplit(url)
+    scheme = parts.scheme.lower()
+    host = normalize_host(parts.hostname or "")
+    try:
+        port = parts.port
+    except ValueError:
+        # An out-of-range port is kept as written instead of silently pointing at another address
+        port = parts.netloc.rpartition(':')[2]
+    if port and port != {"http": 80, "https": 443}.get(scheme):
+        host = "%s:%s" % (host, port)
+
+    query = [(name, value) for name, value in urllib.parse.parse_qsl(parts.query, keep_blank_values=True)
+             if name.lower() not in TRACKING_PARAMS and not name.lower().startswith(TRACKING_PREFIXES)]
+    return urllib.parse.urlunsplit((scheme, host, parts.path.rstrip('/'), urllib.parse.urlencode(query), ""))
+
+def url_domain(url: str) -> str:
+    """Returns the normalized host of a URL without a leading "www."."""
+    host = urllib.parse.urlsplit(normalize_url(url)).hostname or ""
+    return host[4:] if host.startswith('www.') else host
+
+def extract_domains(message: str) -> list:
+    """Returns the distinct domains linked from a message, in order of appearance."""
+    return list(dict.fromkeys(url_domain(url) for url in extract_urls(message)))
+
+def group_by_domain(messages) -> dict:
+    """Collapses the links of many messages to their distinct domains.
+
+    Args:
+        messages: Iterable of SMS texts.
+
+    Returns:
+        dict: Maps every domain to the indices of the messages that link to it.
+    """
+    domains = {}
+    for index, message in enumerate(messages):
+        for domain in extract_domains(message):
+            domains.setdefault(domain, []).append(index)
+    return domains
+
+# Messages with the links extract_urls() must find, and sentence joins it must not take for links
+EXAMPLES = [
+    ("Kazandiniz! http://bit.ly/abc123 adresine tiklayin.", ["http://bit.ly/abc123"]),
+    ("Hediyeniz icin www.kampanya-firsat.com.tr/odul ziyaret edin", ["www.kampanya-firsat.com.tr/odul"]),
+    ("Odemeniz icin odeme-bankasi.xyz adresine girin.", ["odeme-bankasi.xyz"]),
+    ("Kodu girin: guvenli.co/x?utm_source=sms", ["guvenli.co/x?utm_source=sms"]),
+    ("Fatura icin TURKCELL.COM.TR ziyaret edin", ["TURKCELL.COM.TR"]),
+    ("Yeni site: alışveriş.рф", ["alışveriş.рф"]),
+    ("Detaylar (bkz. https://tr.wikipedia.org/wiki/Foo_(bar)).", ["https://tr.wikipedia.org/wiki/Foo_(bar)"]),
+    ("Tebrikler.Kazandınız 1000 TL hediye!", []),
+    ("Sayın müşterimiz.Hesabınız güncellendi", []),
+    ("Görüşürüz.Teşekkürler", []),
+    ("Hello.My name is Ali", []),
+    ("Toplam 3.50 TL, dosya rapor.txt ekte", []),
+    ("Giris: http://192.168.10.5/login", ["http://192.168.10.5/login"]),
+    ("Hemen girin https://185.12.3.4:8080/x.", ["https://185.12.3.4:8080/x"]),
+    ("Yeni adres: http://[2001:db8::1]/odeme", ["http://[2001:db8::1]/odeme"]),
+    ("Bakiye 1.250.000.00 TL, surum 10.0.0.1", []),
+]
+
+if __name__ == "__main__":
+    import sys
+    if sys.argv[1:] == ['--check']:
+        for message, expected in EXAMPLES:
+            if extract_urls(message) != expected:
+                raise AssertionError(f"extract_urls({message!r}) returned {extract_urls(message)}, expected {expected}")
+        print(f"All {len(EXAMPLES)} examples passed")
+        sys.exit(0)
+    for url in extract_urls(sys.argv[1]):
+        print(normalize_url(url))
@@ -1,38 +1,164 @@
-import json
-import requests
-import urllib
 import os
+import sys
+import json
+import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv
+from ipqs_client import IPQSClient, get_client
+from reputation_cache import get_reputation_cache, cache_key, is_failed_lookup
+from url_extraction import normalize_url, group_by_domain, is_ip_host
+import ip_reputation_api
 from ip_reputation_api import check_ip_fraud
 
 
+# Parameters the API scans URLs with
+URL_SCAN_PARAMS = {
+    'strictness': 0,
+    'timeout': 5
+}
+
 class IPQS:
     load_dotenv()
     key = os.getenv("IP_QUALITY_SCORE_API_KEY")
-    
+
+    def __init__(self, client: IPQSClient = None, cache=None):
+        # All lookups share one pooled, retrying client and one reputation cache unless they are passed in
+        self.client = client or get_client()
+        self.cache = cache or get_reputation_cache()
+
     def malicious_url_scanner_api(self, url: str, vars: dict = {}) -> dict:
-        url = 'https://www.ipqualityscore.com/api/json/url/%s/%s' % (self.key, urllib.parse.quote_plus(url))
-        x = requests.get(url, params=vars)
-        return json.loads(x.text)
+        url = normalize_url(url)
+        return self.cache.get_or_compute(cache_key("url", url, vars),
+                                         lambda: self.client.url_scan(url, vars), is_failed_lookup)
 
-if __name__ == "__main__":
-    import sys
-    URL = sys.argv[1] 
+def is_malicious(result: dict) -> bool:
+    return (result.get('suspicious') == True or result.get('phishing') == True or result.get('malware') == True
+            or result.get('risk_score', 0) > 75 or result.get('parking') == True)
+
+def url_fraud_score(result: dict, ip_fraud_score: int = None):
+    """Turns a URL scan and its IP follow-up into the score the single-URL mode prints.
+
+    Returns:
+        The risk score (or 60) for malicious URLs, the IP fraud score otherwise, or None if the scan failed.
+    """
+    if not result.get('success'):
+        return None
+    if is_malicious(result):
+        return result['risk_score'] if result.get('risk_score', 0) > 0 else 60
+    return ip_fraud_score
+
+def bulk_scan_urls(urls, params: dict = None, max_workers: int = 16, requests_per_second: float = None,
+                   client: IPQSClient = None, cache=None) -> dict:
+    """Scans many URLs concurrently.
+
+    Duplicate URLs (after normalization) are scanned once. The IP-reputation follow-up of a
+    benign URL is submitted as soon as its scan finishes, so it overlaps the remaining scans.
+
+    Args:
+        urls: URLs to scan.
+        params (dict, optional): URL scanner parameters.
+        max_workers (int, optional): Number of concurrent requests.
+        requests_per_second (float, optional): Request rate limit towards the IPQS host.
+        client (IPQSClient, optional): Client to use, e.g. one pointed at a local stand-in server.
+        cache (optional): Reputation cache to use.
 
-    strictness = 0
-    timeout = 5
+    Returns:
+        dict: Maps every input URL to {"score", "result", "ip_fraud_score"}.
+    """
+    if client is None:
+        client = IPQSClient(requests_per_second=requests_per_second) if requests_per_second else get_client()
+    url_api = IPQS(client, cache)
+    ip_api = ip_reputation_api.IPQS(client, cache)
+
+    normalized = {url: normalize_url(url) for url in urls}
+    scans = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        url_futures = {pool.submit(url_api.malicious_url_scanner_api, url, params or {}): url
+                       for url in dict.fromkeys(normalized.values())}
+        # URLs hosted on the same IP share one follow-up lookup
+        ip_futures = {}
+        for future in as_completed(url_futures):
+            url = url_futures[future]
+            result = future.result()
+            scans[url] = {"result": result, "ip_fraud_score": None}
+            if result.get('success') and not is_malicious(result) and result.get('ip_address'):
+                ip_address = result['ip_address']
+                if ip_address not in ip_futures:
+                    ip_futures[ip_address] = pool.submit(check_ip_fraud, ip_address, ip_api)
+        for scan in scans.values():
+            result = scan["result"]
+            if result.get('success') and not is_malicious(result) and result.get('ip_address') in ip_futures:
+                scan["ip_fraud_score"] = ip_futures[result['ip_address']].result()
+
+    for scan in scans.values():
+        scan["score"] = url_fraud_score(scan["result"], scan["ip_fraud_score"])
+    return {url: scans[normalized[url]] for url in urls}
+
+def scan_message_domains(messages, params: dict = None, max_workers: int = 16, requests_per_second: float = None,
+                         client: IPQSClient = None, cache=None) -> list:
+    """Scans the links of many messages with one reputation check per distinct domain.
+
+    Links to a raw IP address get an IP reputation lookup instead of a URL scan.
+
+    Args:
+        messages: SMS texts.
+        Other arguments are passed to bulk_scan_urls().
+
+    Returns:
+        list: Per message, a dict mapping each linked domain or IP to its score (None if its scan failed).
+    """
+    messages = list(messages)
+    domains = group_by_domain(messages)
+    hosts = [domain for domain in domains if not is_ip_host(domain)]
+    scans = bulk_scan_urls(["http://%s" % domain for domain in hosts], params, max_workers,
+                           requests_per_second, client, cache)
+    scores = {domain: scans["http://%s" % domain]["score"] for domain in hosts}
+    ip_addresses = [domain for domain in domains if is_ip_host(domain)]
+    if ip_addresses:
+        if client is None:
+            client = IPQSClient(requests_per_second=requests_per_second) if requests_per_second else get_client()
+        ip_api = ip_reputation_api.IPQS(client, cache)
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            scores.update(zip(ip_addresses, pool.map(lambda ip_address: check_ip_fraud(ip_address, ip_api),
+                                                     ip_addresses)))
+
+    results = [{} for _ in messages]
+    for domain, indices in domains.items():
+        for index in indices:
+            results[index][domain] = scores[domain]
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scan URLs with the IPQS Malicious URL Scanner API.")
+    parser.add_argument("url", nargs="?", help="URL to scan")
+    parser.add_argument("--bulk", metavar="FILE", help="Scan the URLs in FILE (one per line, - for stdin) and print a JSON mapping")
+    parser.add_argument("--messages", metavar="FILE", help="Scan the domains linked from the messages in FILE (one per line, - for stdin)")
+    parser.add_argument("--workers", type=int, default=16, help="Concurrent requests in bulk mode")
+    parser.add_argument("--rps", type=float, default=None, help="Request rate limit in bulk mode")
+    args = parser.parse_args()
 
     # Custom fields
-    additional_params = {
-        'strictness': strictness,
-        'timeout': timeout
-    }
+    additional_params = URL_SCAN_PARAMS
+
+    if args.bulk:
+        with (sys.stdin if args.bulk == '-' else open(args.bulk, 'r', encoding='utf-8')) as handle:
+            urls = [line.strip() for line in handle if line.strip()]
+        print(json.dumps(bulk_scan_urls(urls, additional_params, args.workers, args.rps), indent=2))
+        sys.exit(0)
+    if args.messages:
+        with (sys.stdin if args.messages == '-' else open(args.messages, 'r', encoding='utf-8')) as handle:
+            messages = [line.rstrip('\n') for line in handle]
+        for message, scores in zip(messages, scan_message_domains(messages, additional_params, args.workers, args.rps)):
+            print(json.dumps({"message": message, "domains": scores}, ensure_ascii=False))
+        sys.exit(0)
+    if not args.url:
+        parser.error("a URL, --bulk or --messages is required")
 
     ipqs = IPQS()
-    result = ipqs.malicious_url_scanner_api(URL, additional_params)
+    result = ipqs.malicious_url_scanner_api(args.url, additional_params)
 
     if 'success' in result and result['success'] == True:
-        if result['suspicious'] == True or result['phishing'] == True or result['malware'] == True or result['risk_score'] > 75 or result['parking'] == True:
+        if is_malicious(result):
             if result['risk_score'] > 0:
                 print("risk score: ", result['risk_score'])
             print("fraud website by 60")
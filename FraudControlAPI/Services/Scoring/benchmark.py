@@ -0,0 +1,290 @@
+"""
+Description: This script benchmarks the latency and throughput of every scorer against local fake services and writes the results as JSON.
+Author: Sarper Arda BAKIR
+Date: 18-10-2026
+Version: 1.1
+"""
+
+import time
+
+# Cold start is measured from here, before any scorer module is imported
+STARTED = time.perf_counter()
+
+import os
+import csv
+import sys
+import json
+import math
+import asyncio
+import argparse
+import datetime
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows; peak RSS is then left out
+    resource = None
+
+from ensemble import first_url, parse_gemini_score, parse_openai_verdict, tensorflow_score
+from fake_services import FakeServiceConfig, parse_latency, start_fake_services
+
+SERVICES_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+CORPUS_PATH = os.path.abspath(os.path.join(SERVICES_DIR, '..', '..', 'Dataset Convert', 'sms.txt'))
+SCORERS = ('tensorflow', 'ipqs', 'gemini', 'openai')
+
+def load_corpus(path):
+    """
+    Reads labeled messages from sms.txt ("label<TAB>message" lines) or a CSV file with label and message columns.
+
+    Returns:
+        list: (message, is_spam) pairs; lines without a tab are skipped.
+    """
+    corpus = []
+    with open(path, 'r', encoding='utf-8') as handle:
+        if path.endswith('.csv'):
+            for row in csv.DictReader(handle):
+                corpus.append((row['message'], row['label'] in ('spam', '1')))
+        else:
+            for line in handle:
+                label, tab, message = line.rstrip('\n').partition('\t')
+                if tab:
+                    corpus.append((message.strip(), label == 'spam'))
+    return corpus
+
+def percentile(sorted_values, fraction):
+    """
+    Nearest-rank percentile of an ascending list.
+    """
+    return sorted_values[min(len(sorted_values) - 1, max(0, math.ceil(fraction * len(sorted_values)) - 1))]
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    scale = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale, 1)
+
+def tensorflow_driver(args):
+    sys.path.append(os.path.join(SERVICES_DIR, 'Tensorflow'))
+    if args.backend == 'hashing':
+        # Imported on its own so its cold start does not include TensorFlow
+        from hashing_model import predict_sms_spam
+    else:
+        import fraud_detection_by_ml as ml
+
+        def predict_sms_spam(message):
+            return ml.predict_sms_spam(message, args.backend)
+
+    async def call(message, url):
+        probability = await asyncio.to_thread(predict_sms_spam, message)
+        return tensorflow_score(probability), False
+    return call
+
+def ipqs_driver(args):
+    for service in ('Common', 'IPQS'):
+        sys.path.append(os.path.join(SERVICES_DIR, service))
+    from cache import TTLCache
+    from ipqs_client import IPQSClient
+    from url_scanner_api import URL_SCAN_PARAMS, bulk_scan_urls
+    client = IPQSClient(pool_size=max(args.concurrency))
+    # A cache that never stores anything, so every call reaches the service
+    no_cache = TTLCache(ttl=0, negative_ttl=0)
+
+    def scan(url):
+        return bulk_scan_urls([url], URL_SCAN_PARAMS, 1, client=client, cache=no_cache)[url]["score"]
+
+    async def call(message, url):
+        score = await asyncio.to_thread(scan, url)
+        return score, score is None
+    return call
+
+def gemini_driver(args):
+    for service in ('Common', 'Gemini'):
+        sys.path.append(os.path.join(SERVICES_DIR, service))
+    from cache import TTLCache
+    from gemini_api import MODEL_NAME, GeminiScorer, is_error_response
+
+    transport = None
+    if args.base_url:
+        import requests
+        session = requests.Session()
+        endpoint = f"{args.base_url}/v1beta/models/{MODEL_NAME}:generateContent"
+
+        # The fake service speaks the Gemini REST API; the SDK is kept out so only its transport changes
+        def post(prompt):
+            response = session.post(endpoint, json={"contents": [{"role": "user", "parts": [{"text": prompt}]}]},
+                                    timeout=20)
+            response.raise_for_status()
+            return response.json()["candidates"][0]["content"]["parts"][0]["text"]
+
+        async def transport(prompt):
+            return await asyncio.to_thread(post, prompt)
+
+    scorer = GeminiScorer(concurrency=max(args.concurrency), transport=transport,
+                          cache=TTLCache(ttl=0, negative_ttl=0))
+
+    async def call(message, url):
+        verdict = await scorer.score(message)
+        return parse_gemini_score(verdict), is_error_response(verdict)
+    return call
+
+def openai_driver(args):
+    for service in ('Common', 'OpenAI'):
+        sys.path.append(os.path.join(SERVICES_DIR, service))
+    from cache import TTLCache
+    from openai_script import OpenAIScorer, is_error_response
+    scorer = OpenAIScorer(concurrency=max(args.concurrency), cache=TTLCache(ttl=0, negative_ttl=0))
+
+    async def call(message, url):
+        verdict = await scorer.score(message)
+        return parse_openai_verdict(verdict)[0], is_error_response(verdict)
+    return call
+
+DRIVERS = {'tensorflow': tensorflow_driver, 'ipqs': ipqs_driver, 'gemini': gemini_driver, 'openai': openai_driver}
+
+async def run_level(call, items, concurrency):
+    """
+    Sends every item through a scorer with at most `concurrency` calls in flight.
+
+    Returns:
+        tuple: (latency/throughput summary, per-call latencies in ms, scores)
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = [0.0] * len(items)
+    scores = [None] * len(items)
+    errors = 0
+
+    async def one(index):
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            scores[index], failed = await call(*items[index][:2])
+            latencies[index] = (time.perf_counter() - start) * 1000
+            errors += failed
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(index) for index in range(len(items))))
+    elapsed = time.perf_counter() - start
+    ordered = sorted(latencies)
+    return {
+        "concurrency": concurrency,
+        "requests": len(items),
+        "errors": errors,
+        "throughput_rps": round(len(items) / elapsed, 2),
+        "mean_ms": round(sum(latencies) / len(latencies), 2),
+        "p50_ms": round(percentile(ordered, 0.50), 2),
+        "p95_ms": round(percentile(ordered, 0.95), 2),
+        "p99_ms": round(percentile(ordered, 0.99), 2),
+    }, [round(latency, 2) for latency in latencies], scores
+
+async def run_scorer(args):
+    """
+    Benchmarks one scorer in this process and returns its results.
+    """
+    corpus = load_corpus(args.corpus)
+    # Messages without a link get a made-up one, so every IPQS call reaches the service
+    items = [(message, first_url(message) or f"http://bench-{index}.example.com/", label)
+             for index, (message, label) in enumerate(corpus[:args.requests])]
+
+    # Blocking scorers run in threads; the default pool would cap concurrency at a few threads per core
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max(args.concurrency)))
+
+    # Step 1: Cold start is the import, the setup and the first call
+    call = DRIVERS[args.child](args)
+    await call(*items[0][:2])
+    cold_start_ms = (time.perf_counter() - STARTED) * 1000
+
+    # Step 2: One pass per concurrency level
+    levels = []
+    latencies_ms = scores = None
+    for concurrency in args.concurrency:
+        summary, latencies, level_scores = await run_level(call, items, concurrency)
+        levels.append(summary)
+        if latencies_ms is None:
+            latencies_ms, scores = latencies, level_scores
+
+    # Step 3: Agreement of the first pass with the labels, as spam at a score of 50 or more
+    judged = [(score >= 50, label) for score, (message, url, label) in zip(scores, items)
+              if score is not None and (args.child != 'ipqs' or first_url(message))]
+    correct = sum(spam == label for spam, label in judged)
+    return {
+        "cold_start_ms": round(cold_start_ms, 2),
+        "peak_rss_mb": peak_rss_mb(),
+        "levels": levels,
+        "latencies_ms": latencies_ms,
+        "correct": correct,
+        "incorrect": len(judged) - correct,
+    }
+
+def run_child(scorer, args, base_url):
+    """
+    Benchmarks a scorer in a fresh process, so cold start and peak RSS belong to that scorer alone.
+    """
+    env = dict(os.environ)
+    command = [sys.executable, os.path.abspath(__file__), "--child", scorer, "--corpus", args.corpus,
+               "--requests", str(args.requests), "--backend", args.backend,
+               "--concurrency", *[str(concurrency) for concurrency in args.concurrency]]
+    if base_url:
+        command += ["--base-url", base_url]
+        env.update({"IPQS_BASE_URL": f"{base_url}/api/json", "IP_QUALITY_SCORE_API_KEY": "fake",
+                    "OPENAI_BASE_URL": f"{base_url}/v1", "OPENAI_API_KEY": "fake", "GEMINI_API_KEY": "fake"})
+    completed = subprocess.run(command, capture_output=True, text=True, env=env)
+    if completed.returncode != 0:
+        lines = completed.stderr.strip().splitlines()
+        return {"error": lines[-1] if lines else f"exit code {completed.returncode}"}
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark every scorer against local fake services.")
+    parser.add_argument("--scorers", nargs="+", choices=SCORERS, default=list(SCORERS), help="Scorers to benchmark")
+    parser.add_argument("--corpus", default=CORPUS_PATH, help="sms.txt or a CSV file with label and message columns")
+    parser.add_argument("--requests", type=int, default=200, help="Messages sent per concurrency level")
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 4, 16, 64], help="Concurrency levels")
+    parser.add_argument("--backend", default='keras', help="TensorFlow inference backend, or 'hashing' for the n-gram model")
+    parser.add_argument("--latency", nargs="*", type=parse_latency, default=[], metavar="SERVICE=MS",
+                        help="Mean latency of the fake services, e.g. ipqs=50 openai=400 (default 100 ms)")
+    parser.add_argument("--jitter-ms", type=float, default=20.0, help="Standard deviation of the fake latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of fake requests answered with 500/429")
+    parser.add_argument("--live", action="store_true", help="Use the real services configured in .env instead of fakes")
+    parser.add_argument("--output", default="benchmark.json", help="JSON file read by lineplot.py and columnplot.py")
+    parser.add_argument("--child", choices=SCORERS, help=argparse.SUPPRESS)
+    parser.add_argument("--base-url", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(asyncio.run(run_scorer(args))))
+        sys.exit(0)
+
+    fake_server = base_url = None
+    config = FakeServiceConfig(dict(args.latency), args.jitter_ms, args.error_rate)
+    if not args.live:
+        fake_server, base_url = start_fake_services(config)
+
+    results = {}
+    for name in args.scorers:
+        print(f"Benchmarking {name}...", flush=True)
+        results[name] = run_child(name, args, base_url)
+    if fake_server is not None:
+        fake_server.shutdown()
+
+    report = {
+        "created": datetime.datetime.now().isoformat(timespec='seconds'),
+        "corpus": os.path.basename(args.corpus),
+        "services": "live" if args.live else config.as_dict(),
+        "scorers": results,
+    }
+    with open(args.output, 'w', encoding='utf-8') as handle:
+        json.dump(report, handle, indent=2)
+
+    print(f"{'scorer':<12}{'cold start':>12}{'peak RSS':>10}{'conc.':>7}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'errors':>8}")
+    for name, result in results.items():
+        if "error" in result:
+            print(f"{name:<12}failed: {result['error']}")
+            continue
+        for level in result["levels"]:
+            print(f"{name:<12}{result['cold_start_ms']:>10.0f}ms{result['peak_rss_mb'] or 0:>8.0f}MB"
+                  f"{level['concurrency']:>7}{level['throughput_rps']:>9.1f}{level['p50_ms']:>9.1f}"
+                  f"{level['p95_ms']:>9.1f}{level['p99_ms']:>9.1f}{level['errors']:>8}")
+    print(f"Results written to {args.output}")
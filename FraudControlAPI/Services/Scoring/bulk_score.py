@@ -0,0 +1,233 @@
+"""
+Description: This script scores a large CSV file of messages chunk by chunk, appending results and resuming from a checkpoint after a crash.
+Author: Sarper Arda BAKIR
+Date: 18-10-2026
+Version: 1.0
+"""
+
+import os
+import csv
+import sys
+import glob
+import json
+import time
+import asyncio
+import argparse
+
+from scoring_daemon import add_service_arguments, build_service
+
+# Columns of OutputRecord in FraudControlForSMS
+OUTPUT_COLUMNS = ['Message', 'GeminiScore', 'TensorFlowScore', 'IPQSScore', 'OpenAIScore', 'FinalScore',
+                  'Category', 'Explanation']
+SCORE_COLUMNS = ['GeminiScore', 'TensorFlowScore', 'IPQSScore', 'OpenAIScore']
+
+# Messages of the input CSV can be longer than the csv module's default field limit
+csv.field_size_limit(16 * 1024 * 1024)
+
+def find_column(header, name):
+    """
+    Returns the index of a column, compared without case so "Message" and "message" both work.
+    """
+    for index, column in enumerate(header):
+        if column.strip().lower() == name.lower():
+            return index
+    raise ValueError(f"Column {name} not found in the input header: {header}")
+
+def read_chunks(handle, chunk_size, message_index, sender_index=None):
+    """
+    Yields the input in chunks of (messages, senders, offset after the chunk).
+
+    Records are read one line at a time so the file position after every chunk is exact,
+    even for quoted messages spanning several lines; a resumed run seeks straight to it.
+    """
+    reader = csv.reader(iter(handle.readline, ''))
+    messages, senders = [], []
+    for row in reader:
+        if not row:
+            continue
+        messages.append(row[message_index] if message_index < len(row) else "")
+        senders.append(row[sender_index] or None if sender_index is not None and sender_index < len(row) else None)
+        if len(messages) == chunk_size:
+            yield messages, senders, handle.tell()
+            messages, senders = [], []
+    if messages:
+        yield messages, senders, handle.tell()
+
+def output_row(result, with_rule=False):
+    row = [result["message"], result["gemini_score"], result["tensorflow_score"], result["ipqs_score"],
+           result["openai_score"], result["final_score"], result["category"], result["explanation"]]
+    if with_rule:
+        row.append(result.get("rule") or "")
+    return row
+
+class CsvOutput:
+    """
+    Appends results to one CSV file. The position is the file size, and resuming cuts off
+    rows written after the last checkpoint.
+    """
+
+    def __init__(self, path, columns, position=None):
+        if position is None:
+            with open(path, 'w', newline='', encoding='utf-8') as handle:
+                csv.writer(handle).writerow(columns)
+        else:
+            with open(path, 'r+b') as handle:
+                handle.truncate(position)
+        self.path = path
+        self.handle = open(path, 'a', newline='', encoding='utf-8')
+        self.writer = csv.writer(self.handle)
+
+    def append(self, rows):
+        self.writer.writerows(rows)
+        self.handle.flush()
+        os.fsync(self.handle.fileno())
+
+    def position(self):
+        return os.path.getsize(self.path)
+
+    def close(self):
+        self.handle.close()
+
+class ParquetOutput:
+    """
+    Writes every chunk as one part file of a Parquet dataset directory, which pandas reads with
+    pd.read_parquet(path). Parts are renamed into place once complete, so a crash never leaves a
+    broken file; the position is the number of parts.
+    """
+
+    def __init__(self, path, columns, position=None):
+        import pandas as pd
+        self.pd = pd
+        self.path = path
+        self.columns = columns
+        self.parts = position or 0
+        os.makedirs(path, exist_ok=True)
+        # Drop parts of an earlier run that the checkpoint does not cover
+        for part in glob.glob(os.path.join(path, 'part-*.parquet')):
+            if int(os.path.basename(part)[5:-8]) >= self.parts:
+                os.remove(part)
+
+    def append(self, rows):
+        frame = self.pd.DataFrame(rows, columns=self.columns)
+        # Fixed column types keep the schema of every part the same, even for chunks without any LLM score
+        frame[SCORE_COLUMNS] = frame[SCORE_COLUMNS].astype('float64')
+        frame['FinalScore'] = frame['FinalScore'].astype('int64')
+        part = os.path.join(self.path, f"part-{self.parts:06d}.parquet")
+        frame.to_parquet(part + '.tmp', index=False)
+        os.replace(part + '.tmp', part)
+        self.parts += 1
+
+    def position(self):
+        return self.parts
+
+    def close(self):
+        pass
+
+def load_checkpoint(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as handle:
+        return json.load(handle)
+
+def save_checkpoint(path, state):
+    # Write a new file and rename it, so a crash leaves either the old or the new checkpoint
+    with open(path + '.tmp', 'w', encoding='utf-8') as handle:
+        json.dump(state, handle)
+        handle.flush()
+        os.fsync(handle.fileno())
+    os.replace(path + '.tmp', path)
+
+async def score_file(service, input_path, output_path, checkpoint_path, chunk_size=1000, output_format='csv',
+                     message_column='Message', sender_column=None, with_rule=False):
+    """
+    Scores every message of a CSV file and appends the results to the output chunk by chunk.
+
+    After every chunk the output is flushed and a checkpoint records the input offset and
+    output position, so rerunning the same command after a crash continues with the first
+    unscored chunk. Only one chunk is held in memory at a time.
+
+    Args:
+        service: ScoringService used to score every chunk.
+        input_path: CSV file with a header row.
+        output_path: Output CSV file, or Parquet dataset directory.
+        checkpoint_path: JSON file holding the progress of the job.
+        chunk_size: Number of messages scored together.
+        output_format: 'csv' or 'parquet'.
+        message_column: Name of the message column.
+        sender_column: Name of an optional sender column, used by the prefilter's sender rules.
+        with_rule: Adds a Rule column with the prefilter rule that decided the message.
+
+    Returns:
+        int: Number of rows scored by this run.
+    """
+    columns = OUTPUT_COLUMNS + (['Rule'] if with_rule else [])
+    input_size = os.path.getsize(input_path)
+    checkpoint = load_checkpoint(checkpoint_path)
+    if checkpoint is not None and (checkpoint["input"] != os.path.abspath(input_path) or
+                                   checkpoint["input_size"] != input_size or checkpoint["columns"] != columns):
+        raise ValueError(f"Checkpoint {checkpoint_path} belongs to another job; remove it or pass --restart")
+
+    with open(input_path, 'r', newline='', encoding='utf-8-sig') as handle:
+        # Step 1: Read the header and, when resuming, seek to the first unscored record
+        header = next(csv.reader(iter(handle.readline, '')))
+        message_index = find_column(header, message_column)
+        sender_index = find_column(header, sender_column) if sender_column else None
+        rows = 0
+        if checkpoint is not None:
+            handle.seek(checkpoint["offset"])
+            rows = checkpoint["rows"]
+            print(f"Resuming after {rows} rows", flush=True)
+
+        output_class = ParquetOutput if output_format == 'parquet' else CsvOutput
+        output = output_class(output_path, columns, checkpoint["position"] if checkpoint else None)
+        start = time.perf_counter()
+        scored = 0
+        try:
+            # Step 2: Score, append and checkpoint one chunk at a time
+            for messages, senders, offset in read_chunks(handle, chunk_size, message_index, sender_index):
+                chunk_start = time.perf_counter()
+                results = await service.score(messages, senders)
+                output.append([output_row(result, with_rule) for result in results])
+                rows += len(messages)
+                scored += len(messages)
+                save_checkpoint(checkpoint_path, {"input": os.path.abspath(input_path), "input_size": input_size,
+                                                  "columns": columns, "offset": offset, "rows": rows,
+                                                  "position": output.position()})
+
+                # Step 3: Report progress and throughput
+                now = time.perf_counter()
+                print(f"{rows} rows ({offset / max(input_size, 1):.1%} of input), "
+                      f"{len(messages) / (now - chunk_start):.1f} rows/s last chunk, "
+                      f"{scored / (now - start):.1f} rows/s overall", flush=True)
+        finally:
+            output.close()
+    return scored
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Score a large CSV file of messages in resumable chunks.")
+    parser.add_argument("input", help="CSV file with a Message column, e.g. IO_Files/input.csv")
+    parser.add_argument("output", help="Output CSV file, or Parquet dataset directory if it ends with .parquet")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Messages scored and checkpointed together")
+    parser.add_argument("--checkpoint", help="Checkpoint file (default: OUTPUT.checkpoint.json)")
+    parser.add_argument("--restart", action="store_true", help="Ignore an existing checkpoint and start over")
+    parser.add_argument("--message-column", default='Message', help="Name of the message column")
+    parser.add_argument("--sender-column", help="Name of a sender column for the prefilter's sender rules")
+    add_service_arguments(parser)
+    args = parser.parse_args()
+
+    output_format = 'parquet' if args.output.rstrip('/').endswith('.parquet') else 'csv'
+    checkpoint_file = args.checkpoint or args.output.rstrip('/') + '.checkpoint.json'
+    if args.restart and os.path.exists(checkpoint_file):
+        os.remove(checkpoint_file)
+
+    try:
+        total = asyncio.run(score_file(build_service(args), args.input, args.output, checkpoint_file,
+                                       args.chunk_size, output_format, args.message_column, args.sender_column,
+                                       with_rule=bool(args.rules)))
+        print(f"Done, scored {total} rows")
+    except KeyboardInterrupt:
+        print(f"Interrupted; rerun the same command to resume from {checkpoint_file}", file=sys.stderr)
+        sys.exit(1)
+    except ValueError as e:
+        print(str(e), file=sys.stderr)
+        sys.exit(1)
@@ -0,0 +1,97 @@
+"""
+Description: This script combines the scorer outputs into the final fraud score exactly like FraudControlService does.
+Author: Sarper Arda BAKIR
+Date: 18-10-2026
+Version: 1.0
+"""
+
+import re
+
+# Patterns and categories used by GeminiAI.cs, OpenAI.cs and FraudControlService.cs
+NUMBER_PATTERN = re.compile(r'\d+\.?\d*')
+OPENAI_PATTERN = re.compile(r'%(\d+\.?\d*)\s+(\w+[\w\s]*)')
+URL_PATTERN = re.compile(r'http[s]?://\S+')
+DESIRED_CATEGORIES = frozenset(["eticaret", "kampanya", "hukuki", "finans", "otp", "diğer"])
+
+# Score of a message without a link, which leaves IPQS out of the final score
+NO_IPQS_SCORE = -1
+
+def first_url(message):
+    """
+    Returns the link the API sends to IPQS: the first http(s) URL in the message, or None.
+    """
+    match = URL_PATTERN.search(message)
+    return match.group(0) if match else None
+
+def parse_gemini_score(output):
+    """
+    Returns the first number in the Gemini answer, or 0 if there is none.
+    """
+    match = NUMBER_PATTERN.search(output or "")
+    return float(match.group(0)) if match else 0.0
+
+def parse_openai_verdict(output):
+    """
+    Returns (score, category) from an OpenAI answer such as '%80 Kampanya'.
+
+    As in OpenAI.cs, an unknown category is replaced by the whole answer and an answer
+    without a '%NN Category' part scores 0.
+    """
+    output = (output or "").strip()
+    match = OPENAI_PATTERN.search(output)
+    if match is None:
+        return 0.0, output
+    category = match.group(2).strip().lower()
+    return float(match.group(1)), category if category in DESIRED_CATEGORIES else output
+
+def tensorflow_score(probability):
+    """
+    Converts a spam probability to the 0-100 score the API uses.
+    """
+    return round(float(probability) * 100, 2)
+
+def calculate_final_score(gemini_score, tensorflow_score, ipqs_score, openai_score):
+    """
+    Clamps the scorer outputs and weights them into the final score.
+
+    IPQS is only weighted in when the message had a link (ipqs_score != -1).
+
+    Returns:
+        tuple: (clamped gemini, tensorflow, ipqs and openai scores, final score)
+    """
+    gemini_score, tensorflow_score, openai_score = (max(score, 0) for score in
+                                                    (gemini_score, tensorflow_score, openai_score))
+    gemini_score, tensorflow_score, ipqs_score, openai_score = (min(score, 100) for score in
+                                                                (gemini_score, tensorflow_score, ipqs_score, openai_score))
+    if ipqs_score == NO_IPQS_SCORE:
+        final_score = int((gemini_score * 0.2) + (tensorflow_score * 0.3) + (openai_score * 0.5))
+    else:
+        final_score = int((gemini_score * 0.15) + (tensorflow_score * 0.15) + (ipqs_score * 0.2) + (openai_score * 0.5))
+    return (gemini_score, tensorflow_score, ipqs_score, openai_score), final_score
+
+def risk_level(final_score):
+    if final_score >= 80:
+        return "high"
+    if final_score >= 50:
+        return "moderate"
+    return "low"
+
+def generate_explanation(final_score):
+    return (f"The final fraud/spam risk score is {final_score}, which indicates a "
+            f"{risk_level(final_score)} risk level.")
+
+def build_result(message, gemini_score, tensorflow_score, ipqs_score, openai_score, category):
+    """
+    Builds the output record of one message, with the same fields as OutputRecord.
+    """
+    scores, final_score = calculate_final_score(gemini_score, tensorflow_score, ipqs_score, openai_score)
+    return {
+        "message": message,
+        "gemini_score": scores[0],
+        "tensorflow_score": scores[1],
+        "ipqs_score": scores[2],
+        "openai_score": scores[3],
+        "final_score": final_score,
+        "category": category,
+        "explanation": generate_explanation(final_score),
+    }
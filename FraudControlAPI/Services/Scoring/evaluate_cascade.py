@@ -0,0 +1,103 @@
+"""
+Description: This script measures how much traffic the cascade mode short-circuits and how well it agrees with the full ensemble on sms.csv.
+Author: Sarper Arda BAKIR
+Date: 18-10-2026
+Version: 1.0
+"""
+
+import os
+import json
+import asyncio
+import argparse
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import train_test_split
+
+from ensemble import risk_level
+from scoring_daemon import ScoringService, is_certain, short_circuit_result
+# scoring_daemon puts the Tensorflow directory on the path
+from hashing_model import parse_labels
+
+CSV_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'Tensorflow', 'sms.csv'))
+
+def cascade_from_full(full_results, lower, upper):
+    """
+    Derives the cascade results from full ensemble results.
+
+    Escalated messages get exactly the full ensemble result, so one full pass is enough
+    to evaluate any number of uncertainty bands.
+    """
+    return [short_circuit_result(result["message"], result["tensorflow_score"])
+            if is_certain(result["tensorflow_score"], lower, upper) else result for result in full_results]
+
+def compare(full_results, cascade_results, labels):
+    """
+    Returns the short-circuit fraction and the agreement of the cascade with the full ensemble.
+    """
+    count = len(full_results)
+    short_circuited = sum(result.get("escalated") is False for result in cascade_results)
+    full_spam = [result["final_score"] >= 50 for result in full_results]
+    cascade_spam = [result["final_score"] >= 50 for result in cascade_results]
+    return {
+        "messages": count,
+        "short_circuit_fraction": short_circuited / count,
+        "decision_agreement": sum(a == b for a, b in zip(full_spam, cascade_spam)) / count,
+        "risk_level_agreement": sum(risk_level(a["final_score"]) == risk_level(b["final_score"])
+                                    for a, b in zip(full_results, cascade_results)) / count,
+        "mean_abs_final_score_diff": sum(abs(a["final_score"] - b["final_score"])
+                                         for a, b in zip(full_results, cascade_results)) / count,
+        "full_accuracy": sum(spam == label for spam, label in zip(full_spam, labels)) / count,
+        "cascade_accuracy": sum(spam == label for spam, label in zip(cascade_spam, labels)) / count,
+    }
+
+def parse_band(text):
+    lower, upper = (float(value) for value in text.split(':'))
+    if not 0 <= lower < upper <= 1:
+        raise argparse.ArgumentTypeError(f"invalid band {text}, expected LOWER:UPPER within 0-1")
+    return lower, upper
+
+async def score_all(service, messages, batch_size):
+    results = []
+    for start in range(0, len(messages), batch_size):
+        results.extend(await service.score(messages[start:start + batch_size]))
+        print(f"Scored {len(results)}/{len(messages)} messages", flush=True)
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Evaluate cascade scoring against the full ensemble on the sms.csv holdout split.")
+    parser.add_argument("--csv", default=CSV_PATH, help="CSV file with label and message columns")
+    parser.add_argument("--sample", type=int, help="Evaluate a random sample of this many messages to limit API spend")
+    parser.add_argument("--bands", nargs="+", type=parse_band, default=[(0.02, 0.98)],
+                        help="Uncertainty bands as LOWER:UPPER spam probabilities, e.g. 0.02:0.98 0.1:0.9")
+    parser.add_argument("--batch-size", type=int, default=64, help="Messages per ensemble call")
+    parser.add_argument("--json", metavar="FILE", help="Also write the report to FILE as JSON")
+    args = parser.parse_args()
+
+    data = pd.read_csv(args.csv, encoding='utf-8')[['label', 'message']]
+    # Only the test split of train_sms_spam_model(); the LSTM has seen every other row
+    _, test_indices = train_test_split(np.arange(len(data)), test_size=0.2, random_state=42)
+    data = data.iloc[test_indices]
+    if args.sample and args.sample < len(data):
+        data = data.sample(n=args.sample, random_state=42)
+    messages = data['message'].astype(str).tolist()
+    # sms.csv stores 0/1 labels; parse_labels() also accepts ham/spam
+    labels = (parse_labels(data['label']) == 1).tolist()
+
+    full_results = asyncio.run(score_all(ScoringService(), messages, args.batch_size))
+
+    report = []
+    for lower, upper in args.bands:
+        result = compare(full_results, cascade_from_full(full_results, lower, upper), labels)
+        report.append(dict(band=[lower, upper], **result))
+
+    print(f"{'band':<14}{'short-circuit':>15}{'decision agr.':>15}{'risk agr.':>11}{'mean |diff|':>13}"
+          f"{'full acc.':>11}{'cascade acc.':>14}")
+    for result in report:
+        print(f"{result['band'][0]:.3f}-{result['band'][1]:.3f}  {result['short_circuit_fraction']:>14.1%}"
+              f"{result['decision_agreement']:>15.1%}{result['risk_level_agreement']:>11.1%}"
+              f"{result['mean_abs_final_score_diff']:>13.2f}{result['full_accuracy']:>11.1%}"
+              f"{result['cascade_accuracy']:>14.1%}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as handle:
+            json.dump(report, handle, indent=2)
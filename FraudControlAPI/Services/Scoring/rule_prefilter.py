@@ -0,0 +1,254 @@
+"""
+Description: This script matches messages against a hot-reloadable rule set of known fraud and whitelist patterns before any model runs.
+Author: Sarper Arda BAKIR
+Date: 18-10-2026
+Version: 1.0
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import threading
+import unicodedata
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'IPQS'))
+from url_extraction import extract_urls, url_domain
+
+DEFAULT_RULES_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), 'prefilter_rules.json'))
+
+# A block hit makes a message spam and an allow hit makes it ham; flag hits are only recorded
+ACTIONS = ('block', 'allow', 'flag')
+MATCH_TYPES = ('domain', 'phrase', 'regex', 'sender')
+DEFAULT_SCORES = {'block': 100, 'allow': 0}
+
+# The links FraudControlService.cs sends to IPQS; a message with one is never allowed by a rule alone
+API_URL_PATTERN = re.compile(r'https?://\S+', re.IGNORECASE)
+
+# Phrases are compared without case and Turkish diacritics, so "ÖDÜLÜNÜZ" and "odulunuz" match alike
+FOLD_TABLE = str.maketrans({'İ': 'i', 'I': 'i', 'ı': 'i', 'Ç': 'c', 'ç': 'c', 'Ğ': 'g', 'ğ': 'g',
+                            'Ö': 'o', 'ö': 'o', 'Ş': 's', 'ş': 's', 'Ü': 'u', 'ü': 'u'})
+
+def fold(text):
+    """
+    Normalizes text for phrase and regex rules: NFKC, single spaces, lowercase, no Turkish diacritics.
+    """
+    return re.sub(r'\s+', ' ', unicodedata.normalize('NFKC', text)).translate(FOLD_TABLE).casefold().strip()
+
+def trie_pattern(phrases):
+    """
+    Builds one regex from literal phrases by sharing their common prefixes.
+
+    The regex engine then walks a trie instead of trying every phrase at every position,
+    which keeps matching time nearly flat as the phrase list grows.
+    """
+    trie = {}
+    for phrase in phrases:
+        node = trie
+        for char in phrase:
+            node = node.setdefault(char, {})
+        node[''] = True
+
+    def to_regex(node):
+        if list(node) == ['']:
+            return ''
+        alternatives = [re.escape(char) + to_regex(child) for char, child in sorted(node.items()) if char]
+        if len(alternatives) == 1 and '' not in node:
+            return alternatives[0]
+        return '(?:' + '|'.join(alternatives) + ')' + ('?' if '' in node else '')
+    return to_regex(trie)
+
+class RuleSet:
+    """
+    A compiled rule set.
+
+    All phrases are matched by one trie regex over the folded message, all regex rules by one
+    combined regex over the same text, all sender rules by one combined regex over the sender,
+    and domain rules by a dictionary lookup of every linked domain and its parent domains.
+    Phrases and regex rules are scanned with zero-width lookaheads, so overlapping hits are
+    all reported and a phrase hit never consumes text that a regex rule also matches.
+    """
+
+    def __init__(self, rules):
+        self.rules = {}
+        self.domains = {}
+        self.phrases = {}
+        text_groups = []
+        sender_groups = []
+        for index, rule in enumerate(rules):
+            rule_id = rule['id']
+            if rule.get('action') not in ACTIONS or rule.get('match') not in MATCH_TYPES:
+                raise ValueError(f"Rule {rule_id}: action must be one of {ACTIONS} and match one of {MATCH_TYPES}")
+            if rule_id in self.rules:
+                raise ValueError(f"Duplicate rule id: {rule_id}")
+            self.rules[rule_id] = rule
+            patterns = rule['patterns']
+            if rule['match'] == 'domain':
+                for domain in patterns:
+                    self.domains.setdefault(domain.strip().lower().rstrip('.'), rule_id)
+            elif rule['match'] == 'phrase':
+                for phrase in patterns:
+                    self.phrases.setdefault(fold(phrase), rule_id)
+            else:
+                # Validate every pattern on its own so a broken rule is reported by name
+                for pattern in patterns:
+                    try:
+                        re.compile(pattern)
+                    except re.error as e:
+                        raise ValueError(f"Rule {rule_id}: invalid pattern {pattern!r}: {str(e)}")
+                group = f'(?P<r{index}>' + '|'.join(f'(?:{pattern})' for pattern in patterns) + ')'
+                (text_groups if rule['match'] == 'regex' else sender_groups).append(group)
+
+        try:
+            # A lookahead match is empty, so the scan reports a phrase at every position, overlapping ones included
+            self.phrase_pattern = re.compile(r'(?=(?<!\w)(' + trie_pattern(self.phrases) + r')(?!\w))') \
+                if self.phrases else None
+            self.text_pattern = re.compile('(?=' + '|'.join(text_groups) + ')') if text_groups else None
+            self.sender_pattern = re.compile(r'(?:' + '|'.join(sender_groups) + r')\Z',
+                                             re.IGNORECASE) if sender_groups else None
+        except re.error as e:
+            raise ValueError(f"Rules cannot be combined: {str(e)}")
+        self.group_rules = {f'r{index}': rule['id'] for index, rule in enumerate(rules)}
+
+    def _hit(self, rule_id, matched):
+        rule = self.rules[rule_id]
+        return {"rule": rule_id, "action": rule['action'], "match": matched}
+
+    def match(self, message, sender=None, urls=None):
+        """
+        Returns every rule that fires for a message, at most one hit per rule.
+
+        Args:
+            message: SMS text.
+            sender: Sender number or alphanumeric sender id, if known.
+            urls: Links of the message from extract_urls(), if already extracted.
+
+        Returns:
+            list: Hits such as {"rule": "scam-phrases-tr", "action": "block", "match": "..."}.
+        """
+        hits = {}
+        text = fold(message)
+        if self.phrase_pattern is not None:
+            for match in self.phrase_pattern.finditer(text):
+                rule_id = self.phrases[match.group(1)]
+                if rule_id not in hits:
+                    hits[rule_id] = self._hit(rule_id, match.group(1))
+        if self.text_pattern is not None:
+            for match in self.text_pattern.finditer(text):
+                rule_id = self.group_rules[match.lastgroup]
+                if rule_id not in hits:
+                    hits[rule_id] = self._hit(rule_id, match.group(match.lastgroup))
+        if self.domains:
+            urls = extract_urls(message) if urls is None else urls
+            for domain in dict.fromkeys(url_domain(url) for url in urls):
+                labels = domain.split('.')
+                # Check the domain and every parent domain, so "x.bit.ly" hits a rule on "bit.ly"
+                for start in range(len(labels) - 1):
+                    rule_id = self.domains.get('.'.join(labels[start:]))
+                    if rule_id is not None and rule_id not in hits:
+                        hits[rule_id] = self._hit(rule_id, domain)
+                        break
+        if sender and self.sender_pattern is not None:
+            match = self.sender_pattern.match(sender.strip())
+            if match is not None:
+                rule_id = self.group_rules[match.lastgroup]
+                hits.setdefault(rule_id, self._hit(rule_id, sender.strip()))
+        return list(hits.values())
+
+    def decide(self, hits, has_links=False):
+        """
+        Returns the hit that decides a message on its own, with the final score and category of
+        its rule: the first block hit, else the first allow hit, else None. Block wins so that
+        scams copying OTP wording are still blocked, and allow hits never decide a message with
+        links, which goes on to the scorers and the URL scan instead.
+        """
+        for action in ('block',) if has_links else ('block', 'allow'):
+            for hit in hits:
+                if hit['action'] == action:
+                    rule = self.rules[hit['rule']]
+                    return dict(hit, score=rule.get('score', DEFAULT_SCORES[action]),
+                                category=rule.get('category', ""))
+        return None
+
+def load_rules(path):
+    with open(path, 'r', encoding='utf-8') as handle:
+        return RuleSet(json.load(handle)['rules'])
+
+class RulePrefilter:
+    """
+    Keeps the rule set of a JSON file compiled and recompiles it when the file changes.
+
+    The file's modification time is checked at most every check_interval seconds. A rule file
+    that fails to load is reported and the previous rules stay in use.
+    """
+
+    def __init__(self, path=None, check_interval=1.0):
+        self.path = path or os.getenv("PREFILTER_RULES_PATH") or DEFAULT_RULES_PATH
+        self.check_interval = check_interval
+        self._mtime = os.path.getmtime(self.path)
+        self._rules = load_rules(self.path)
+        self._last_check = time.monotonic()
+        self._lock = threading.Lock()
+
+    @property
+    def rules(self):
+        now = time.monotonic()
+        if now - self._last_check >= self.check_interval and self._lock.acquire(blocking=False):
+            try:
+                self._last_check = now
+                mtime = os.path.getmtime(self.path)
+                if mtime != self._mtime:
+                    self._mtime = mtime
+                    self._rules = load_rules(self.path)
+            except (ValueError, KeyError, TypeError, OSError) as e:
+                print(f"Keeping previous prefilter rules: {str(e)}", file=sys.stderr)
+            finally:
+                self._lock.release()
+        return self._rules
+
+    def check(self, message, sender=None):
+        """
+        Matches one message.
+
+        Returns:
+            tuple: (deciding hit or None, all hits)
+        """
+        rules = self.rules
+        urls = extract_urls(message)
+        hits = rules.match(message, sender, urls)
+        return rules.decide(hits, has_links=bool(urls) or API_URL_PATTERN.search(message) is not None), hits
+
+# Messages and the decision check() must reach with prefilter_rules.json
+EXAMPLES = [
+    ("Dogrulama kodunuz: 123456. Bu kodu kimseyle paylasmayiniz.", 'allow'),
+    ("Doğrulama kodunuz: 123456. Bu kodu kimseyle paylaşmayınız. http://bit.ly/x", None),
+    ("Dogrulama kodunuz: 123456. Bu kodu kimseyle paylasmayiniz. http://185.12.3.4/giris", None),
+    ("Dogrulama kodunuz: 123456. Bu kodu kimseyle paylasmayiniz. https://999.1.1.1/giris", None),
+    ("Kargonuz teslim edilemedi, ücreti ödeyin: http://bit.ly/x", 'block'),
+    ("Hediye çeki kazandınız! Detaylar: grabify.link/abc", 'block'),
+    ("Yarın akşam yemeğe geliyor musun?", None),
+]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Match a message against the prefilter rules.")
+    parser.add_argument("message", nargs="?", help="SMS message to check")
+    parser.add_argument("--sender", help="Sender number or alphanumeric sender id")
+    parser.add_argument("--rules", help="Rule file (default: PREFILTER_RULES_PATH or prefilter_rules.json)")
+    parser.add_argument("--check", action="store_true", help="Check the decisions of the messages in EXAMPLES")
+    args = parser.parse_args()
+
+    prefilter = RulePrefilter(args.rules)
+    if args.check:
+        for example, expected in EXAMPLES:
+            decision, _ = prefilter.check(example)
+            if (decision['action'] if decision else None) != expected:
+                raise AssertionError(f"check({example!r}) decided {decision}, expected {expected}")
+        print(f"All {len(EXAMPLES)} examples passed")
+        sys.exit(0)
+    if args.message is None:
+        parser.error("a message or --check is required")
+    decision, rule_hits = prefilter.check(args.message, args.sender)
+    print(json.dumps({"decision": decision['action'] if decision else None, "hits": rule_hits},
+                     ensure_ascii=False, indent=2))
@@ -0,0 +1,375 @@
+"""
+Description: This script runs all four scorers in one long-lived process behind a JSON-lines protocol.
+Author: Sarper Arda BAKIR
+Date: 18-10-2026
+Version: 1.7
+"""
+
+import os
+import sys
+import json
+import asyncio
+import argparse
+
+# The scorers live next to this directory and import their siblings by module name
+SERVICES_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+for service in ('Common', 'Tensorflow', 'IPQS', 'Gemini', 'OpenAI'):
+    sys.path.append(os.path.join(SERVICES_DIR, service))
+
+from ensemble import (NO_IPQS_SCORE, first_url, parse_gemini_score, parse_openai_verdict, tensorflow_score,
+                      build_result, generate_explanation)
+from template_clustering import cluster_messages
+from rule_prefilter import DEFAULT_RULES_PATH, RulePrefilter
+from instrumentation import enable, snapshot, span, to_prometheus
+
+def tensorflow_scorer(backend='keras', workers=1):
+    if workers > 1:
+        # Shard every batch across worker processes that each hold the model
+        from inference_pool import InferencePool
+        pool = InferencePool(workers, backend, bucket_lengths=(100,))
+        predict_batch = pool.predict
+    elif backend == 'hashing':
+        # The hashed n-gram model needs no TensorFlow, so it is imported on its own
+        import hashing_model
+        hashing_model.load_hashing_model()
+        predict_batch = hashing_model.predict_sms_spam_batch
+    else:
+        import fraud_detection_by_ml as ml
+
+        # Load the model now rather than on the first request
+        ml.load_model(backend)
+
+        def predict_batch(messages):
+            # Pad every message to the full 100 steps so scores match the single-message script exactly
+            return ml.predict_sms_spam_batch(messages, bucket_lengths=(100,), backend=backend)
+
+    async def score(messages):
+        with span("scoring.tensorflow"):
+            probabilities = await asyncio.to_thread(predict_batch, messages)
+        return [tensorflow_score(probability) for probability in probabilities]
+    return score
+
+def gemini_scorer(concurrency=8):
+    from gemini_api import GeminiScorer
+    scorer = GeminiScorer(concurrency=concurrency)
+
+    async def score(messages):
+        with span("scoring.gemini"):
+            verdicts = await scorer.score_many(messages)
+        return [parse_gemini_score(verdict) for verdict in verdicts]
+    return score
+
+def openai_scorer(concurrency=8):
+    from openai_script import OpenAIScorer
+    scorer = OpenAIScorer(concurrency=concurrency)
+
+    async def score(messages):
+        with span("scoring.openai"):
+            verdicts = await scorer.score_many(messages)
+        return [parse_openai_verdict(verdict) for verdict in verdicts]
+    return score
+
+def ipqs_scorer(workers=16):
+    from url_scanner_api import URL_SCAN_PARAMS, bulk_scan_urls
+
+    async def score(messages):
+        urls = [first_url(message) for message in messages]
+        with span("scoring.ipqs"):
+            scans = await asyncio.to_thread(bulk_scan_urls, [url for url in urls if url], URL_SCAN_PARAMS, workers)
+        # A failed scan leaves IPQS out of the final score, like an unparsable script output does
+        return [NO_IPQS_SCORE if url is None or scans[url]["score"] is None else float(scans[url]["score"])
+                for url in urls]
+    return score
+
+class ScoringService:
+    """
+    Holds the four scorers and scores batches of messages with all of them concurrently.
+
+    Every scorer is an async function from a list of messages to one result per message
+    (a (score, category) pair for OpenAI, a score for the others), so fakes can be passed in.
+    """
+
+    def __init__(self, tensorflow=None, gemini=None, openai=None, ipqs=None, backend='keras', concurrency=8,
+                 cluster_threshold=None, prefilter=None, tensorflow_workers=1):
+        self.tensorflow = tensorflow or tensorflow_scorer(backend, tensorflow_workers)
+        self.gemini = gemini or gemini_scorer(concurrency)
+        self.openai = openai or openai_scorer(concurrency)
+        self.ipqs = ipqs or ipqs_scorer()
+        # With a threshold, near-duplicate messages of a batch share the verdict of one representative
+        self.cluster_threshold = cluster_threshold
+        # Optional RulePrefilter; messages it decides never reach the scorers
+        self.prefilter = prefilter
+
+    async def score(self, messages, senders=None):
+        """
+        Scores messages with all four scorers and combines the results like CalculateFinalScore.
+
+        Args:
+            messages: SMS texts.
+            senders: Sender of every message (or None), used by the prefilter's sender rules.
+
+        Returns:
+            list: One result dict per message, in input order.
+        """
+        messages = list(messages)
+        results = [None] * len(messages)
+        pending = list(range(len(messages)))
+        rule_hits = {}
+
+        # Step 1: Messages with a definitive rule hit are answered without any scorer
+        if self.prefilter is not None:
+            pending = []
+            with span("scoring.prefilter"):
+                for index, (message, sender) in enumerate(zip(messages, senders or [None] * len(messages))):
+                    decision, hits = self.prefilter.check(message, sender)
+                    if decision is not None:
+                        results[index] = prefilter_result(message, decision, hits)
+                    else:
+                        pending.append(index)
+                        rule_hits[index] = hits
+
+        # Step 2: Only one representative per cluster of near-duplicates is scored
+        clusters = None
+        scored_indices = pending
+        if self.cluster_threshold is not None and len(pending) > 1:
+            with span("scoring.cluster"):
+                clusters = cluster_messages([messages[index] for index in pending], self.cluster_threshold)
+            scored_indices = [pending[representative] for representative in clusters.representatives]
+
+        scored = await self.score_messages([messages[index] for index in scored_indices])
+        if clusters is None:
+            for index, result in zip(pending, scored):
+                results[index] = result
+        else:
+            for index, label, result in zip(pending, clusters.labels, clusters.fan_out(scored)):
+                results[index] = dict(result, message=messages[index], cluster=label,
+                                      representative=scored_indices[label])
+        for index, hits in rule_hits.items():
+            results[index]["rules"] = hits
+        return results
+
+    async def score_messages(self, messages):
+        if not messages:
+            return []
+        gemini_scores, tensorflow_scores, ipqs_scores, openai_verdicts = await asyncio.gather(
+            self.gemini(messages), self.tensorflow(messages), self.ipqs(messages), self.openai(messages))
+        return [build_result(message, gemini_score, tensorflow_score, ipqs_score, openai_score, category)
+                for message, gemini_score, tensorflow_score, ipqs_score, (openai_score, category)
+                in zip(messages, gemini_scores, tensorflow_scores, ipqs_scores, openai_verdicts)]
+
+    async def handle_line(self, line):
+        """
+        Answers one request line: {"id": ..., "messages": [...], "senders": [...]} or
+        {"id": ..., "message": "...", "sender": "..."}; senders are optional.
+        {"id": ..., "metrics": "json"} or {"id": ..., "metrics": "prometheus"} returns the metrics instead.
+        """
+        request_id = None
+        try:
+            request = json.loads(line)
+            request_id = request.get("id")
+            if "metrics" in request:
+                return {"id": request_id,
+                        "metrics": to_prometheus() if request["metrics"] == "prometheus" else snapshot()}
+            if "messages" in request:
+                messages = request["messages"]
+                senders = request.get("senders") or [None] * len(messages)
+            else:
+                messages = [request["message"]]
+                senders = [request.get("sender")]
+            if not all(isinstance(message, str) for message in messages):
+                raise ValueError("messages must be strings")
+            if len(senders) != len(messages) or not all(sender is None or isinstance(sender, str)
+                                                        for sender in senders):
+                raise ValueError("senders must be one string or null per message")
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            return {"id": request_id, "error": f"Invalid request: {str(e)}"}
+        try:
+            return {"id": request_id, "results": await self.score(messages, senders)}
+        except Exception as e:
+            return {"id": request_id, "error": f"Scoring failed: {str(e)}"}
+
+def is_certain(tensorflow_score, lower, upper):
+    """
+    Tells whether a TensorFlow score (0-100) lies outside the uncertainty band (lower, upper) of spam probabilities.
+    """
+    return tensorflow_score <= lower * 100 or tensorflow_score >= upper * 100
+
+def short_circuit_result(message, tensorflow_score):
+    """
+    Builds the result of a message the local model is sure about; its score is the final score.
+    """
+    final_score = int(min(max(tensorflow_score, 0), 100))
+    return {
+        "message": message,
+        "gemini_score": None,
+        "tensorflow_score": tensorflow_score,
+        "ipqs_score": None,
+        "openai_score": None,
+        "final_score": final_score,
+        "category": "",
+        "explanation": generate_explanation(final_score),
+        "escalated": False,
+    }
+
+def prefilter_result(message, decision, hits):
+    """
+    Builds the result of a message decided by a prefilter rule; the rule's score is the final score.
+    """
+    final_score = int(min(max(decision["score"], 0), 100))
+    return {
+        "message": message,
+        "gemini_score": None,
+        "tensorflow_score": None,
+        "ipqs_score": None,
+        "openai_score": None,
+        "final_score": final_score,
+        "category": decision["category"],
+        "explanation": generate_explanation(final_score),
+        "rule": decision["rule"],
+        "rules": hits,
+    }
+
+class CascadeScoringService(ScoringService):
+    """
+    Runs the local TensorFlow model first and only asks IPQS and the LLMs about uncertain messages.
+
+    A message whose spam probability is at most `lower` or at least `upper` is answered
+    straight away with the model's score; the others get the full ensemble score.
+    """
+
+    def __init__(self, *args, lower=0.02, upper=0.98, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lower = lower
+        self.upper = upper
+        self.total = 0
+        self.short_circuited = 0
+
+    async def score_messages(self, messages):
+        if not messages:
+            return []
+        tensorflow_scores = await self.tensorflow(messages)
+        uncertain = [index for index, score in enumerate(tensorflow_scores)
+                     if not is_certain(score, self.lower, self.upper)]
+        self.total += len(messages)
+        self.short_circuited += len(messages) - len(uncertain)
+
+        results = [short_circuit_result(message, score) for message, score in zip(messages, tensorflow_scores)]
+        if uncertain:
+            escalated = [messages[index] for index in uncertain]
+            gemini_scores, ipqs_scores, openai_verdicts = await asyncio.gather(
+                self.gemini(escalated), self.ipqs(escalated), self.openai(escalated))
+            for index, gemini_score, ipqs_score, (openai_score, category) in zip(
+                    uncertain, gemini_scores, ipqs_scores, openai_verdicts):
+                results[index] = build_result(messages[index], gemini_score, tensorflow_scores[index], ipqs_score,
+                                              openai_score, category)
+                results[index]["escalated"] = True
+        return results
+
+    def stats(self):
+        return {"total": self.total, "short_circuited": self.short_circuited,
+                "short_circuit_fraction": self.short_circuited / self.total if self.total else 0.0}
+
+async def serve_stream(service, reader, write):
+    """
+    Answers requests from a line reader concurrently; responses are written as they complete.
+    """
+    lock = asyncio.Lock()
+    tasks = set()
+
+    async def answer(line):
+        response = await service.handle_line(line)
+        async with lock:
+            await write(json.dumps(response, ensure_ascii=False) + "\n")
+
+    while True:
+        line = await reader()
+        if not line:
+            break
+        if line.strip():
+            task = asyncio.create_task(answer(line))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+    if tasks:
+        await asyncio.gather(*tasks)
+
+async def serve_stdio(service):
+    loop = asyncio.get_running_loop()
+
+    async def reader():
+        return await loop.run_in_executor(None, sys.stdin.readline)
+
+    async def write(text):
+        sys.stdout.write(text)
+        sys.stdout.flush()
+
+    await write(json.dumps({"status": "ready"}) + "\n")
+    await serve_stream(service, reader, write)
+
+async def serve_socket(service, socket_path=None, port=None):
+    async def connection(stream_reader, stream_writer):
+        async def write(text):
+            stream_writer.write(text.encode('utf-8'))
+            await stream_writer.drain()
+
+        async def reader():
+            return (await stream_reader.readline()).decode('utf-8')
+
+        try:
+            await serve_stream(service, reader, write)
+        finally:
+            stream_writer.close()
+
+    if socket_path:
+        server = await asyncio.start_unix_server(connection, path=socket_path, limit=16 * 1024 * 1024)
+    else:
+        server = await asyncio.start_server(connection, host='127.0.0.1', port=port, limit=16 * 1024 * 1024)
+    print(json.dumps({"status": "ready"}), flush=True)
+    async with server:
+        await server.serve_forever()
+
+def add_service_arguments(parser):
+    """
+    Adds the options that configure a ScoringService to a command line parser.
+    """
+    parser.add_argument("--backend", default='keras', help="TensorFlow inference backend, or 'hashing' for the n-gram model")
+    parser.add_argument("--concurrency", type=int, default=8, help="LLM requests in flight per scorer")
+    parser.add_argument("--tf-workers", type=int, default=1,
+                        help="Worker processes that share the local model's work on every batch")
+    parser.add_argument("--cluster", type=float, metavar="THRESHOLD",
+                        help="Score one representative per cluster of near-duplicate messages in a batch")
+    parser.add_argument("--rules", nargs="?", const=DEFAULT_RULES_PATH, metavar="PATH",
+                        help="Answer messages with a definitive rule hit without any scorer (default rule file: %(const)s)")
+    parser.add_argument("--cascade", action="store_true",
+                        help="Only ask IPQS and the LLMs about messages the local model is unsure about")
+    parser.add_argument("--lower", type=float, default=0.02, help="Cascade: spam probability at or below which a message is ham")
+    parser.add_argument("--upper", type=float, default=0.98, help="Cascade: spam probability at or above which a message is spam")
+
+def build_service(args):
+    """
+    Builds the ScoringService (or CascadeScoringService) selected by the options of add_service_arguments.
+    """
+    prefilter = RulePrefilter(args.rules) if args.rules else None
+    if args.cascade:
+        return CascadeScoringService(backend=args.backend, concurrency=args.concurrency,
+                                     cluster_threshold=args.cluster, prefilter=prefilter,
+                                     tensorflow_workers=args.tf_workers, lower=args.lower, upper=args.upper)
+    return ScoringService(backend=args.backend, concurrency=args.concurrency, cluster_threshold=args.cluster,
+                          prefilter=prefilter, tensorflow_workers=args.tf_workers)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Score SMS messages with all four scorers in one process.")
+    parser.add_argument("--socket", metavar="PATH", help="Listen on a unix socket instead of stdin/stdout")
+    parser.add_argument("--port", type=int, help="Listen on 127.0.0.1:PORT instead of stdin/stdout")
+    parser.add_argument("--metrics", action="store_true",
+                        help="Record per-stage timings and counters, returned by {\"metrics\": \"json\"} requests")
+    add_service_arguments(parser)
+    args = parser.parse_args()
+
+    if args.metrics:
+        enable()
+
+    service = build_service(args)
+    if args.socket or args.port:
+        asyncio.run(serve_socket(service, args.socket, args.port))
+    else:
+        asyncio.run(serve_stdio(service))
@@ -0,0 +1,162 @@
+"""
+Description: This script compares the inference backends of the SMS spam model on the sms.csv holdout split.
+Author: Sarper Arda BAKIR
+Date: 18-10-2026
+Version: 1.2
+"""
+
+import os
+import json
+import time
+import argparse
+import tempfile
+import numpy as np
+import pandas as pd
+import tensorflow as tf
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import LabelEncoder
+from sklearn.metrics import accuracy_score, roc_auc_score
+
+import fraud_detection_by_ml as ml
+from model_registry import MODEL_FILE, VOCAB_FILE, WEIGHTS_FILE, TFLITE_FILES, ModelRegistry
+from numpy_inference import NumpySpamModel, export_weights
+from hashing_model import HASHING_MODEL_PATH, HashingSpamModel, train_hashing_model
+from tflite_inference import TFLiteSpamModel, export_tflite
+
+def load_holdout_split(bundle):
+    """
+    Rebuilds the test split used in train_sms_spam_model().
+
+    Returns:
+        tuple: (padded test sequences, test messages, test labels)
+    """
+    data = pd.read_csv(ml.CSV_PATH, encoding='utf-8')
+    data = data[['label', 'message']]
+    labels = LabelEncoder().fit_transform(data['label'].values)
+    messages = np.array(data['message'].astype(str).tolist(), dtype=object)
+    padded_sequences = bundle.load_tokenizer().texts_to_padded(messages, maxlen=100)
+    _, X_test, _, messages_test, _, y_test = train_test_split(padded_sequences, messages, labels, test_size=0.2,
+                                                              random_state=42)
+    return X_test, messages_test, y_test
+
+def ensure_exported(backend, bundle, export_dir):
+    """
+    Finds the artifact of a backend in the bundle, exporting it to export_dir if it is missing.
+
+    Returns:
+        str: Path of the backend's model artifact.
+    """
+    if backend == 'keras':
+        return bundle.path(MODEL_FILE)
+    if backend == 'hashing':
+        if os.path.exists(HASHING_MODEL_PATH):
+            return HASHING_MODEL_PATH
+        # Trained on the same split as the LSTM, so the holdout messages stay unseen
+        path = os.path.join(export_dir, os.path.basename(HASHING_MODEL_PATH))
+        train_hashing_model(output_path=path)
+        return path
+    name = WEIGHTS_FILE if backend == 'numpy' else TFLITE_FILES[backend.split('-', 1)[1]]
+    if bundle.has(name):
+        return bundle.path(name)
+
+    path = os.path.join(export_dir, name)
+    if backend == 'numpy':
+        export_weights(bundle.path(MODEL_FILE), bundle.path(VOCAB_FILE), output_path=path)
+    else:
+        export_tflite(backend.split('-', 1)[1], bundle.path(MODEL_FILE), path)
+    return path
+
+def load_backend(backend, path):
+    """
+    Loads a backend from disk.
+
+    Returns:
+        function: Predict function over padded sequences, or over messages for the hashing model.
+    """
+    if backend == 'keras':
+        model = tf.keras.models.load_model(path)
+        return lambda padded: model.predict(padded, batch_size=1024, verbose=0)[:, 0]
+    if backend == 'numpy':
+        return NumpySpamModel(path).predict_padded
+    if backend == 'hashing':
+        return HashingSpamModel.load(path).predict_proba
+    return TFLiteSpamModel(path).predict_padded
+
+def benchmark_backend(backend, bundle, export_dir, X_test, y_test, single_samples):
+    """
+    Measures size, load time, latency and detection quality of one backend.
+    """
+    path = ensure_exported(backend, bundle, export_dir)
+    start = time.perf_counter()
+    predict_padded = load_backend(backend, path)
+    load_time = time.perf_counter() - start
+
+    # Warm up once so one-time graph building is not counted as latency
+    predict_padded(X_test[:1])
+
+    single_latencies = []
+    for row in range(min(single_samples, len(X_test))):
+        start = time.perf_counter()
+        predict_padded(X_test[row:row + 1])
+        single_latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    probabilities = np.asarray(predict_padded(X_test), dtype=np.float32)
+    batch_time = time.perf_counter() - start
+    # TFLite models take one message per invoke, so their "batch" is a loop over single rows
+    batch_mode = 'per-row' if backend.startswith('tflite') and not TFLiteSpamModel.batched else 'batched'
+
+    return {
+        "backend": backend,
+        "size_bytes": os.path.getsize(path),
+        "load_time_ms": load_time * 1000,
+        "single_mean_ms": float(np.mean(single_latencies)) * 1000,
+        "single_p95_ms": float(np.percentile(single_latencies, 95)) * 1000,
+        "batch_per_message_ms": batch_time * 1000 / len(X_test),
+        "batch_mode": batch_mode,
+        "accuracy": float(accuracy_score(y_test, probabilities >= 0.5)),
+        "auc": float(roc_auc_score(y_test, probabilities)),
+    }, probabilities
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the inference backends of the SMS spam model.")
+    parser.add_argument("--backends", nargs="+", choices=ml.BACKENDS, default=list(ml.BACKENDS))
+    parser.add_argument("--single-samples", type=int, default=200,
+                        help="Number of messages scored one at a time for per-message latency")
+    parser.add_argument("--json", metavar="FILE", help="Also write the report to FILE as JSON")
+    args = parser.parse_args()
+
+    bundle = ModelRegistry().current()
+    export_dir = tempfile.mkdtemp(prefix='sms-spam-exports-')
+    X_test, messages_test, y_test = load_holdout_split(bundle)
+
+    # Keras is the reference every other backend is compared with
+    backends = ['keras'] + [backend for backend in args.backends if backend != 'keras']
+    report = []
+    reference = None
+    for backend in backends:
+        # The hashing model reads raw messages, so its latency includes feature hashing; the others get padded sequences
+        inputs = messages_test if backend == 'hashing' else X_test
+        result, probabilities = benchmark_backend(backend, bundle, export_dir, inputs, y_test, args.single_samples)
+        if reference is None:
+            reference = (result, probabilities)
+        result["max_probability_drift"] = float(np.max(np.abs(probabilities - reference[1])))
+        result["accuracy_drift"] = result["accuracy"] - reference[0]["accuracy"]
+        result["auc_drift"] = result["auc"] - reference[0]["auc"]
+        report.append(result)
+
+    print(f"Model version {bundle.version}, holdout split: {len(X_test)} messages")
+    print(f"{'backend':<15}{'size KB':>10}{'load ms':>10}{'single ms':>11}{'p95 ms':>9}{'batch ms':>10}"
+          f"{'accuracy':>10}{'AUC':>8}{'max drift':>11}{'AUC drift':>11}")
+    for result in report:
+        print(f"{result['backend']:<15}{result['size_bytes'] / 1024:>10.0f}{result['load_time_ms']:>10.1f}"
+              f"{result['single_mean_ms']:>11.3f}{result['single_p95_ms']:>9.3f}"
+              f"{result['batch_per_message_ms']:>9.4f}{'*' if result['batch_mode'] == 'per-row' else ' '}"
+              f"{result['accuracy']:>10.4f}{result['auc']:>8.4f}{result['max_probability_drift']:>11.2e}"
+              f"{result['auc_drift']:>+11.4f}")
+    if any(result['batch_mode'] == 'per-row' for result in report):
+        print("* per-row loop: the TFLite models are exported with a fixed batch of one, so this is not batched latency")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as handle:
+            json.dump(report, handle, indent=2)
@@ -0,0 +1,323 @@
+"""
+Description: This script trains and serves a hashed word and character n-gram linear model, a sub-millisecond alternative to the LSTM.
+Author: Sarper Arda BAKIR
+Date: 18-10-2026
+Version: 1.0
+"""
+
+import os
+import sys
+import time
+import pickle
+import argparse
+import itertools
+import threading
+import numpy as np
+import pandas as pd
+from scipy.special import expit
+from sklearn.feature_extraction import FeatureHasher
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.linear_model import SGDClassifier
+from sklearn.metrics import accuracy_score, roc_auc_score
+from sklearn.model_selection import train_test_split
+from sklearn.naive_bayes import MultinomialNB
+from sklearn.preprocessing import normalize
+from model_registry import ModelNotAvailableError
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Common'))
+from instrumentation import span
+
+# Define the path of the training data and the trained hashing model
+SAVE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../'))
+CSV_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), 'sms.csv'))
+HASHING_MODEL_PATH = os.path.join(SAVE_DIR, 'sms_spam_hashing.pkl')
+MODEL_FORMAT = 'sms-spam-hashing/1'
+
+# Features: word 1-2 grams and character 2-5 grams inside word boundaries, hashed into 2^20 columns
+N_FEATURES = 2 ** 20
+WORD_NGRAMS = (1, 2)
+CHAR_NGRAMS = (2, 5)
+
+CLASSIFIERS = ('logistic', 'naive-bayes')
+LABELS = {'ham': 0, 'spam': 1, '0': 0, '1': 1}
+
+# Loaded model per path, reloaded when the file is replaced
+_models = {}
+_models_lock = threading.Lock()
+
+def build_classifier(classifier):
+    """
+    Builds an untrained classifier that supports partial_fit.
+    """
+    if classifier == 'logistic':
+        return SGDClassifier(loss='log_loss', alpha=1e-5, random_state=42)
+    if classifier == 'naive-bayes':
+        return MultinomialNB(alpha=0.1)
+    raise ValueError(f"Unsupported classifier: {classifier}")
+
+class HashingSpamModel:
+    """
+    Linear spam model over hashed n-grams.
+
+    The hashing trick needs no vocabulary, so the model is only the classifier. Word and
+    char_wb n-grams are hashed into one shared feature space, so a word n-gram and a char
+    n-gram with the same string count in the same bucket.
+    Both classifiers are linear in the features, so a prediction is one sparse dot
+    product with the weights derived from the classifier.
+    """
+
+    def __init__(self, classifier='logistic', n_features=N_FEATURES, estimator=None, version=None):
+        self.classifier = classifier
+        self.n_features = n_features
+        self.estimator = estimator or build_classifier(classifier)
+        self.version = version
+        self.hasher = FeatureHasher(n_features=n_features, input_type='string', alternate_sign=False)
+        word_analyzer = HashingVectorizer(ngram_range=WORD_NGRAMS).build_analyzer()
+        char_analyzer = HashingVectorizer(analyzer='char_wb', ngram_range=CHAR_NGRAMS).build_analyzer()
+        self.analyze = lambda message: word_analyzer(message) + char_analyzer(message)
+        self.weights = None
+        self.bias = 0.0
+        if hasattr(self.estimator, 'classes_'):
+            self._update_weights()
+
+    def featurize(self, messages):
+        """
+        Hashes messages into a sparse count matrix; the logistic model sees L2-normalized rows.
+        """
+        features = self.hasher.transform(self.analyze(str(message)) for message in messages)
+        if self.classifier == 'logistic':
+            features = normalize(features)
+        return features
+
+    def partial_fit(self, messages, labels):
+        """
+        Updates the classifier with one batch of labeled messages.
+        """
+        self.estimator.partial_fit(self.featurize(messages), np.asarray(labels), classes=np.array([0, 1]))
+        self._update_weights()
+
+    def _update_weights(self):
+        if self.classifier == 'logistic':
+            self.weights = self.estimator.coef_[0].astype(np.float64)
+            self.bias = float(self.estimator.intercept_[0])
+        else:
+            # Naive Bayes log-odds: sum of per-feature log-probability ratios plus the prior ratio
+            log_probabilities = self.estimator.feature_log_prob_
+            self.weights = log_probabilities[1] - log_probabilities[0]
+            self.bias = float(self.estimator.class_log_prior_[1] - self.estimator.class_log_prior_[0])
+
+    def predict_one(self, message):
+        """
+        Predicts the spam probability of one message without sklearn's per-call overhead.
+        """
+        if self.weights is None:
+            raise ModelNotAvailableError("The hashing model has not been trained.")
+        counts = self.hasher.transform([self.analyze(str(message))])
+        values = counts.data
+        if self.classifier == 'logistic' and values.size:
+            values = values / np.sqrt(values @ values)
+        return float(expit(values @ self.weights[counts.indices] + self.bias))
+
+    def predict_proba(self, messages):
+        """
+        Predicts the spam probabilities of a list of messages.
+
+        Returns:
+            numpy.ndarray: Spam probabilities in input order.
+        """
+        if self.weights is None:
+            raise ModelNotAvailableError("The hashing model has not been trained.")
+        if len(messages) == 1:
+            return np.array([self.predict_one(messages[0])], dtype=np.float32)
+        logits = self.featurize(messages) @ self.weights + self.bias
+        return expit(logits).astype(np.float32)
+
+    def save(self, path=HASHING_MODEL_PATH):
+        """
+        Writes the model to a new file and renames it over path, so readers never see a partial file.
+        """
+        self.version = time.strftime('%Y%m%d-%H%M%S')
+        state = {'format': MODEL_FORMAT, 'version': self.version, 'classifier': self.classifier,
+                 'n_features': self.n_features, 'estimator': self.estimator}
+        temporary_path = f"{path}.{os.getpid()}.tmp"
+        with open(temporary_path, 'wb') as handle:
+            pickle.dump(state, handle, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary_path, path)
+
+    @classmethod
+    def load(cls, path=HASHING_MODEL_PATH):
+        try:
+            with open(path, 'rb') as handle:
+                state = pickle.load(handle)
+        except FileNotFoundError:
+            raise ModelNotAvailableError(f"No hashing model at {path}. Train one with --train.")
+        if state.get('format') != MODEL_FORMAT:
+            raise ValueError(f"Unsupported hashing model format in {path}: {state.get('format')}")
+        return cls(state['classifier'], state['n_features'], state['estimator'], state['version'])
+
+def parse_labels(values):
+    """
+    Converts ham/spam or 0/1 labels to integers.
+    """
+    return np.array([LABELS[str(value).strip().lower()] for value in values], dtype=np.int64)
+
+def read_labeled_chunks(path, chunk_size=10000):
+    """
+    Reads labeled messages in chunks from a CSV file with label and message columns or a
+    tab-separated "label<TAB>message" file such as sms.txt.
+
+    Yields:
+        tuple: (messages, labels) of one chunk.
+    """
+    if path.endswith('.csv'):
+        for chunk in pd.read_csv(path, encoding='utf-8', chunksize=chunk_size):
+            yield chunk['message'].astype(str).tolist(), parse_labels(chunk['label'])
+        return
+
+    with open(path, 'r', encoding='utf-8') as handle:
+        while True:
+            lines = list(itertools.islice(handle, chunk_size))
+            if not lines:
+                break
+            pairs = [line.rstrip('\n').partition('\t') for line in lines]
+            pairs = [(label.strip().lower(), message.strip()) for label, tab, message in pairs
+                     if tab and label.strip().lower() in LABELS]
+            if pairs:
+                yield [message for _, message in pairs], parse_labels([label for label, _ in pairs])
+
+def train_hashing_model(csv_path=CSV_PATH, classifier='logistic', epochs=5, output_path=HASHING_MODEL_PATH):
+    """
+    Trains the hashing model on the same split of sms.csv the LSTM is trained on.
+
+    Args:
+        csv_path: Path of the labeled CSV file.
+        classifier: One of CLASSIFIERS.
+        epochs: Passes over the training split; Naive Bayes only needs one.
+        output_path: Where the trained model is saved.
+
+    Returns:
+        tuple: (trained model, holdout report with accuracy and AUC)
+    """
+    # Step 1: Data Collection and the split used by train_sms_spam_model()
+    data = pd.read_csv(csv_path, encoding='utf-8')
+    messages = np.array(data['message'].astype(str).tolist(), dtype=object)
+    labels = parse_labels(data['label'])
+    X_train, X_test, y_train, y_test = train_test_split(messages, labels, test_size=0.2, random_state=42)
+
+    # Step 2: Model Training, one shuffled pass per epoch
+    model = HashingSpamModel(classifier)
+    features = model.featurize(X_train)
+    rng = np.random.default_rng(42)
+    for _ in range(1 if classifier == 'naive-bayes' else epochs):
+        order = rng.permutation(len(y_train))
+        model.estimator.partial_fit(features[order], y_train[order], classes=np.array([0, 1]))
+    model._update_weights()
+
+    # Step 3: Holdout evaluation
+    probabilities = model.predict_proba(X_test)
+    report = {"accuracy": float(accuracy_score(y_test, probabilities >= 0.5)),
+              "auc": float(roc_auc_score(y_test, probabilities)), "test_messages": len(y_test)}
+    model.save(output_path)
+    return model, report
+
+def update_hashing_model(input_path, model_path=HASHING_MODEL_PATH, chunk_size=10000):
+    """
+    Incrementally updates a trained model with newly labeled messages using partial_fit.
+
+    The file is read chunk by chunk, so it can be larger than memory.
+
+    Returns:
+        int: Number of messages the model was updated with.
+    """
+    model = HashingSpamModel.load(model_path)
+    count = 0
+    for messages, labels in read_labeled_chunks(input_path, chunk_size):
+        model.partial_fit(messages, labels)
+        count += len(labels)
+    model.save(model_path)
+    return count
+
+def load_hashing_model(path=HASHING_MODEL_PATH, check_interval=5.0):
+    """
+    Returns the loaded hashing model, reloading it at most every check_interval seconds
+    when the file has been replaced, e.g. by update_hashing_model().
+
+    Raises:
+        ModelNotAvailableError: If no model has been trained.
+    """
+    now = time.monotonic()
+    loaded = _models.get(path)
+    if loaded is not None and now - loaded[1] < check_interval:
+        return loaded[2]
+    with _models_lock:
+        loaded = _models.get(path)
+        try:
+            modified = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            if loaded is None:
+                raise ModelNotAvailableError(f"No hashing model at {path}. Train one with --train.")
+            modified = loaded[0]
+        if loaded is None or modified != loaded[0]:
+            with span("hashing.load_model"):
+                loaded = (modified, now, HashingSpamModel.load(path))
+        else:
+            loaded = (loaded[0], now, loaded[2])
+        _models[path] = loaded
+    return loaded[2]
+
+def predict_sms_spam(input_message):
+    with span("hashing.predict"):
+        return load_hashing_model().predict_one(input_message)
+
+def predict_sms_spam_batch(messages, chunk_size=100000):
+    """
+    Predicts the spam probability of many messages, chunk_size at a time.
+
+    Returns:
+        numpy.ndarray: Spam probabilities in input order.
+    """
+    model = load_hashing_model()
+    iterator = iter(messages)
+    results = []
+    while True:
+        chunk = list(itertools.islice(iterator, chunk_size))
+        if not chunk:
+            break
+        with span("hashing.batch_predict"):
+            results.append(model.predict_proba(chunk))
+    if not results:
+        return np.empty(0, dtype=np.float32)
+    return np.concatenate(results)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="SMS spam detection with a hashed n-gram linear model.")
+    parser.add_argument("message", nargs="?", help="SMS message to score")
+    parser.add_argument("--train", action="store_true", help="Train a new model on sms.csv")
+    parser.add_argument("--classifier", choices=CLASSIFIERS, default='logistic', help="Classifier used by --train")
+    parser.add_argument("--epochs", type=int, default=5, help="Training passes used by --train")
+    parser.add_argument("--update", metavar="FILE",
+                        help="Update the trained model with labeled messages (CSV or label<TAB>message lines)")
+    parser.add_argument("--batch", metavar="FILE",
+                        help="Score one message per line from FILE ('-' for stdin) and print one probability per line")
+    args = parser.parse_args()
+
+    try:
+        if args.train:
+            trained_model, holdout = train_hashing_model(classifier=args.classifier, epochs=args.epochs)
+            print(f"Saved {args.classifier} model {trained_model.version} to {HASHING_MODEL_PATH}: "
+                  f"accuracy {holdout['accuracy']:.4f}, AUC {holdout['auc']:.4f} on {holdout['test_messages']} messages")
+        elif args.update:
+            updated = update_hashing_model(args.update)
+            print(f"Updated {HASHING_MODEL_PATH} with {updated} messages")
+        elif args.batch:
+            batch_file = sys.stdin if args.batch == '-' else open(args.batch, 'r', encoding='utf-8')
+            with batch_file:
+                for probability in predict_sms_spam_batch(line.rstrip('\n') for line in batch_file):
+                    print(float(probability))
+        elif args.message:
+            print(f"Spam Probability: {predict_sms_spam(args.message)}")
+        else:
+            print("Please provide an input message for prediction.")
+    except ModelNotAvailableError as e:
+        print(str(e), file=sys.stderr)
+        sys.exit(1)
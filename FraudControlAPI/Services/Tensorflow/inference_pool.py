@@ -0,0 +1,283 @@
+"""
+Description: This script shards batch prediction of the SMS spam model across worker processes with pinned thread counts.
+Author: Sarper Arda BAKIR
+Date: 18-10-2026
+Version: 1.0
+"""
+
+import os
+import sys
+import time
+import argparse
+import itertools
+import threading
+import multiprocessing
+from multiprocessing.connection import wait
+import numpy as np
+
+# Padding lengths of predict_sms_spam_batch(); kept here so the parent never imports TensorFlow
+BUCKET_LENGTHS = (20, 40, 100)
+
+class ShardFailedError(RuntimeError):
+    """
+    Raised when a shard could not be scored, either because it kept crashing its worker or
+    because the worker reported an error such as a missing model.
+    """
+
+def _configure_threads(intra_op_threads, inter_op_threads, cpus):
+    """
+    Pins the calling worker to its CPUs and fixes the thread pools before TensorFlow starts them.
+    """
+    for name in ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'TF_NUM_INTRAOP_THREADS'):
+        os.environ[name] = str(intra_op_threads)
+    os.environ['TF_NUM_INTEROP_THREADS'] = str(inter_op_threads)
+    if cpus and hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, cpus)
+
+def _worker_main(connection, backend, batch_size, bucket_lengths, intra_op_threads, inter_op_threads, cpus):
+    """
+    Loads the model once, then answers (shard id, messages) requests with (shard id, probabilities, error).
+    """
+    _configure_threads(intra_op_threads, inter_op_threads, cpus)
+    try:
+        if backend == 'hashing':
+            # The hashed n-gram model needs no TensorFlow, so it is imported on its own
+            import hashing_model
+            hashing_model.load_hashing_model()
+
+            def predict(messages):
+                return hashing_model.predict_sms_spam_batch(messages)
+        else:
+            import tensorflow as tf
+            tf.config.threading.set_intra_op_parallelism_threads(intra_op_threads)
+            tf.config.threading.set_inter_op_parallelism_threads(inter_op_threads)
+            import fraud_detection_by_ml as ml
+            ml.load_model(backend)
+
+            def predict(messages):
+                return ml.predict_sms_spam_batch(messages, batch_size=batch_size, bucket_lengths=bucket_lengths,
+                                                 backend=backend)
+        connection.send(('ready', None, None))
+    except Exception as e:
+        connection.send(('error', None, f"{type(e).__name__}: {str(e)}"))
+        return
+
+    while True:
+        try:
+            request = connection.recv()
+        except EOFError:
+            return
+        if request is None:
+            return
+        shard_id, messages = request
+        try:
+            connection.send(('result', shard_id, np.asarray(predict(messages), dtype=np.float32)))
+        except Exception as e:
+            connection.send(('error', shard_id, f"{type(e).__name__}: {str(e)}"))
+
+class InferencePool:
+    """
+    Worker processes that each load the model once and score whole shards of messages.
+
+    Every worker gets intra_op_threads TensorFlow threads and, when there are enough CPUs,
+    its own CPUs, so workers do not fight over cores the way one process with TensorFlow's
+    default thread pools and outside parallelism does. Shards go to idle workers and come
+    back in input order. A worker that dies is replaced and its shard is scored again, up
+    to max_retries times.
+    """
+
+    def __init__(self, workers=None, backend='keras', intra_op_threads=None, inter_op_threads=1, batch_size=512,
+                 bucket_lengths=BUCKET_LENGTHS, max_retries=2, pin_cpus=True):
+        available_cpus = sorted(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else \
+            list(range(os.cpu_count() or 1))
+        self.workers = workers or len(available_cpus)
+        self.intra_op_threads = intra_op_threads or max(1, len(available_cpus) // self.workers)
+        self.inter_op_threads = inter_op_threads
+        self.backend = backend
+        self.batch_size = batch_size
+        self.bucket_lengths = tuple(bucket_lengths)
+        self.max_retries = max_retries
+        # Worker i gets CPUs [i * threads, (i + 1) * threads) when they all fit on distinct CPUs
+        self.cpu_sets = [None] * self.workers
+        if pin_cpus and self.workers * self.intra_op_threads <= len(available_cpus):
+            self.cpu_sets = [set(available_cpus[i * self.intra_op_threads:(i + 1) * self.intra_op_threads])
+                             for i in range(self.workers)]
+        self.context = multiprocessing.get_context('spawn')
+        self.processes = [None] * self.workers
+        self.connections = [None] * self.workers
+        self._lock = threading.Lock()
+        for index in range(self.workers):
+            self._start_worker(index)
+        for index in range(self.workers):
+            self._wait_ready(index)
+
+    def _start_worker(self, index):
+        # Spawned, not forked: a forked copy of a process that already started TensorFlow can deadlock
+        parent_connection, child_connection = self.context.Pipe()
+        process = self.context.Process(target=_worker_main, daemon=True,
+                                       args=(child_connection, self.backend, self.batch_size, self.bucket_lengths,
+                                             self.intra_op_threads, self.inter_op_threads, self.cpu_sets[index]))
+        process.start()
+        child_connection.close()
+        self.processes[index] = process
+        self.connections[index] = parent_connection
+
+    def _wait_ready(self, index):
+        try:
+            kind, _, error = self.connections[index].recv()
+        except EOFError:
+            self.processes[index].join()
+            kind, error = 'error', f"worker exited with code {self.processes[index].exitcode}"
+        if kind != 'ready':
+            self.close()
+            raise ShardFailedError(f"Inference worker {index} failed to start: {error}")
+
+    def _restart_worker(self, index):
+        self.connections[index].close()
+        self.processes[index].join(timeout=1)
+        self._start_worker(index)
+        self._wait_ready(index)
+
+    def map(self, messages, shard_size=10000):
+        """
+        Scores an iterable of messages shard by shard across the workers.
+
+        At most two shards per worker are read ahead, so a stream of any length is scored in
+        bounded memory.
+
+        Yields:
+            numpy.ndarray: Spam probabilities of one shard, shards in input order.
+        """
+        with self._lock:
+            iterator = iter(messages)
+            shards = {}          # shard id -> messages, until its result has been yielded
+            attempts = {}        # shard id -> number of times it crashed a worker
+            queue = []           # shard ids waiting for a worker
+            assigned = {}        # worker index -> shard id
+            done = {}            # shard id -> probabilities waiting for earlier shards
+            next_shard = next_yield = 0
+            exhausted = False
+
+            try:
+                while True:
+                    # Step 1: Read ahead and hand shards to idle workers
+                    while not exhausted and next_shard < next_yield + 2 * self.workers:
+                        chunk = list(itertools.islice(iterator, shard_size))
+                        if not chunk:
+                            exhausted = True
+                            break
+                        shards[next_shard] = chunk
+                        queue.append(next_shard)
+                        next_shard += 1
+                    for index in range(self.workers):
+                        if queue and index not in assigned:
+                            if not self.processes[index].is_alive():
+                                self._restart_worker(index)
+                            shard_id = queue.pop(0)
+                            assigned[index] = shard_id
+                            self.connections[index].send((shard_id, shards[shard_id]))
+
+                    # Step 2: Yield every finished shard that is next in input order
+                    while next_yield in done:
+                        shards.pop(next_yield)
+                        yield done.pop(next_yield)
+                        next_yield += 1
+                    if exhausted and next_yield == next_shard:
+                        return
+
+                    # Step 3: Wait for a result or a worker exit
+                    busy = {self.connections[index]: index for index in assigned}
+                    sentinels = {self.processes[index].sentinel: index for index in assigned}
+                    for ready in wait(list(busy) + list(sentinels)):
+                        index = busy.get(ready, sentinels.get(ready))
+                        if index not in assigned:
+                            continue
+                        try:
+                            kind, shard_id, payload = self.connections[index].recv()
+                        except (EOFError, OSError):
+                            # The worker died with the shard; restart it and queue the shard again
+                            shard_id = assigned.pop(index)
+                            attempts[shard_id] = attempts.get(shard_id, 0) + 1
+                            self.processes[index].join(timeout=1)
+                            exit_code = self.processes[index].exitcode
+                            if attempts[shard_id] > self.max_retries:
+                                raise ShardFailedError(f"Shard {shard_id} crashed its worker {attempts[shard_id]} times "
+                                                       f"(last exit code {exit_code})")
+                            print(f"Inference worker {index} exited with code {exit_code}; retrying shard {shard_id}",
+                                  file=sys.stderr)
+                            self._restart_worker(index)
+                            queue.insert(0, shard_id)
+                            continue
+                        del assigned[index]
+                        if kind == 'error':
+                            raise ShardFailedError(f"Shard {shard_id} failed: {payload}")
+                        done[shard_id] = payload
+            finally:
+                # Collect shards still in flight, e.g. after an error or an abandoned iteration,
+                # so no stale result is left in a worker's pipe for the next call
+                for index in list(assigned):
+                    try:
+                        self.connections[index].recv()
+                    except (EOFError, OSError):
+                        self._restart_worker(index)
+
+    def predict(self, messages, shard_size=None):
+        """
+        Scores a list of messages, split into one shard per worker unless shard_size is given.
+
+        Returns:
+            numpy.ndarray: Spam probabilities in input order.
+        """
+        messages = list(messages)
+        if not messages:
+            return np.empty(0, dtype=np.float32)
+        shard_size = shard_size or max(1, -(-len(messages) // self.workers))
+        return np.concatenate(list(self.map(messages, shard_size)))
+
+    def close(self):
+        for index, connection in enumerate(self.connections):
+            if connection is None:
+                continue
+            try:
+                connection.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+            connection.close()
+        for process in self.processes:
+            if process is not None:
+                process.join(timeout=5)
+                if process.is_alive():
+                    process.terminate()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Score messages with the SMS spam model across worker processes.")
+    parser.add_argument("input", help="File with one message per line ('-' for stdin)")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: one per available CPU)")
+    parser.add_argument("--threads", type=int, help="TensorFlow intra-op threads per worker (default: CPUs / workers)")
+    parser.add_argument("--shard-size", type=int, default=10000, help="Messages sent to a worker at a time")
+    parser.add_argument("--batch-size", type=int, default=512, help="Batch size of model.predict inside a worker")
+    parser.add_argument("--backend", default='keras', help="Inference backend, one of fraud_detection_by_ml.BACKENDS")
+    parser.add_argument("--max-retries", type=int, default=2, help="Times a shard is retried after crashing its worker")
+    parser.add_argument("--no-pin", action="store_true", help="Do not pin workers to CPUs")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    input_file = sys.stdin if args.input == '-' else open(args.input, 'r', encoding='utf-8')
+    scored = 0
+    try:
+        with input_file, InferencePool(args.workers, args.backend, args.threads, batch_size=args.batch_size,
+                                       max_retries=args.max_retries, pin_cpus=not args.no_pin) as pool:
+            for probabilities in pool.map((line.rstrip('\n') for line in input_file), args.shard_size):
+                sys.stdout.write(''.join(f"{float(probability)}\n" for probability in probabilities))
+                scored += len(probabilities)
+    except ShardFailedError as e:
+        print(str(e), file=sys.stderr)
+        sys.exit(1)
+    elapsed = time.perf_counter() - start
+    print(f"Scored {scored} messages in {elapsed:.1f}s ({scored / max(elapsed, 1e-9):.0f} messages/s)", file=sys.stderr)
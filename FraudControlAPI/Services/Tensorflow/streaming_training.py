@@ -0,0 +1,146 @@
+"""
+Description: This script trains the SMS spam model by streaming the tab-separated corpus in chunks.
+Author: Sarper Arda BAKIR
+Date: 18-10-2026
+Version: 1.1
+"""
+
+import os
+import zlib
+import argparse
+import itertools
+import numpy as np
+import tensorflow as tf
+
+import fraud_detection_by_ml as ml
+from fast_tokenizer import FastTokenizer
+
+# Tab-separated "label<TAB>message" corpus that exportcsv.py converts to sms.csv
+CORPUS_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../../Dataset Convert/sms.txt'))
+LABELS = {'ham': 0, 'spam': 1}
+
+def read_corpus(path=CORPUS_PATH, chunk_size=10000):
+    """
+    Reads the corpus in chunks of lines.
+
+    Lines without a tab or with an unknown label are skipped.
+
+    Args:
+        path: Path of the tab-separated corpus.
+        chunk_size: Number of lines read per chunk.
+
+    Yields:
+        tuple: (labels, messages) of one chunk.
+    """
+    with open(path, 'r', encoding='utf-8') as handle:
+        while True:
+            lines = list(itertools.islice(handle, chunk_size))
+            if not lines:
+                break
+
+            labels = []
+            messages = []
+            for line in lines:
+                label, separator, message = line.partition('\t')
+                label = label.strip()
+                if not separator or label not in LABELS:
+                    continue
+                labels.append(LABELS[label])
+                messages.append(message.strip())
+            yield labels, messages
+
+def padded_chunks(path, tokenizer, chunk_size, validation_split, validation):
+    """
+    Tokenizes the corpus chunk by chunk into padded sequences.
+
+    A message goes to the validation stream when the CRC-32 of its text, scaled to [0, 1),
+    is below validation_split. The streams are stable across epochs without keeping any
+    index in memory, and repeated copies of a message all land on the same side.
+
+    Yields:
+        tuple: (padded sequences, labels) of one chunk.
+    """
+    for labels, messages in read_corpus(path, chunk_size):
+        buckets = np.fromiter((zlib.crc32(message.encode('utf-8')) for message in messages), dtype=np.float64,
+                              count=len(messages)) / 2 ** 32
+        is_validation = buckets < validation_split
+
+        keep = is_validation if validation else ~is_validation
+        if not keep.any():
+            continue
+        kept_messages = [message for message, kept in zip(messages, keep) if kept]
+        yield tokenizer.texts_to_padded(kept_messages, maxlen=100), np.asarray(labels, dtype=np.float32)[keep]
+
+def make_dataset(path, tokenizer, chunk_size=10000, batch_size=64, validation_split=0.2, validation=False,
+                 shuffle_buffer=50000):
+    """
+    Builds a tf.data pipeline of shuffled, prefetched batches over the corpus.
+
+    Only chunk_size messages and shuffle_buffer padded rows are in memory at any time.
+    """
+    dataset = tf.data.Dataset.from_generator(
+        lambda: padded_chunks(path, tokenizer, chunk_size, validation_split, validation),
+        output_signature=(
+            tf.TensorSpec(shape=(None, 100), dtype=tf.int32),
+            tf.TensorSpec(shape=(None,), dtype=tf.float32),
+        ),
+    )
+    dataset = dataset.unbatch()
+    if not validation:
+        dataset = dataset.shuffle(shuffle_buffer, reshuffle_each_iteration=True)
+    return dataset.batch(batch_size).prefetch(tf.data.AUTOTUNE)
+
+def train_sms_spam_model_streaming(corpus_path=CORPUS_PATH, chunk_size=10000, batch_size=64, epochs=10,
+                                   validation_split=0.2, shuffle_buffer=50000, vocab_candidates=500000):
+    """
+    Trains the SMS spam model without loading the corpus into memory.
+
+    The first streaming pass builds the vocabulary; every epoch then streams the corpus
+    again through make_dataset(). The result is published as a new registry version.
+
+    Args:
+        corpus_path: Path of the tab-separated corpus.
+        chunk_size: Number of lines read and tokenized together.
+        batch_size: Training batch size.
+        epochs: Number of training epochs.
+        validation_split: Fraction of messages held out for validation.
+        shuffle_buffer: Number of padded messages the shuffle buffer holds.
+        vocab_candidates: Most distinct words counted while building the vocabulary; see FastTokenizer.fit().
+
+    Returns:
+        ModelBundle: The published bundle.
+    """
+    # Step 1: Build the vocabulary in one streaming pass
+    messages = (message for _, chunk in read_corpus(corpus_path, chunk_size) for message in chunk)
+    tokenizer = FastTokenizer.fit(messages, num_words=5000, max_candidates=vocab_candidates)
+
+    # Step 2: Stream shuffled training batches and validation batches
+    train_dataset = make_dataset(corpus_path, tokenizer, chunk_size, batch_size, validation_split,
+                                 validation=False, shuffle_buffer=shuffle_buffer)
+    validation_dataset = None
+    if validation_split > 0:
+        validation_dataset = make_dataset(corpus_path, tokenizer, chunk_size, batch_size, validation_split,
+                                          validation=True)
+
+    # Step 3: Model Training
+    model = ml.build_model()
+    model.fit(train_dataset, validation_data=validation_dataset, epochs=epochs)
+
+    # Publish the trained model and tokenizer as a new version
+    return ml.publish_trained_model(model, tokenizer)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the SMS spam model by streaming a tab-separated corpus.")
+    parser.add_argument("corpus", nargs="?", default=CORPUS_PATH, help="Path of the label<TAB>message corpus")
+    parser.add_argument("--chunk-size", type=int, default=10000, help="Lines read and tokenized together")
+    parser.add_argument("--batch-size", type=int, default=64, help="Training batch size")
+    parser.add_argument("--epochs", type=int, default=10, help="Number of training epochs")
+    parser.add_argument("--validation-split", type=float, default=0.2, help="Fraction held out for validation")
+    parser.add_argument("--shuffle-buffer", type=int, default=50000, help="Messages held in the shuffle buffer")
+    parser.add_argument("--vocab-candidates", type=int, default=500000,
+                        help="Most distinct words counted while building the vocabulary")
+    args = parser.parse_args()
+
+    bundle = train_sms_spam_model_streaming(args.corpus, args.chunk_size, args.batch_size, args.epochs,
+                                            args.validation_split, args.shuffle_buffer, args.vocab_candidates)
+    print(f"Published model version {bundle.version}")
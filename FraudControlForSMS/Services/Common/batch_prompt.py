@@ -0,0 +1,161 @@
+"""
+Description: This script packs many SMS messages into one LLM prompt and maps the structured answers back to them.
+Author: Sarper Arda BAKIR
+Date: 18-10-2026
+Version: 1.1
+"""
+
+import re
+import json
+from verdict_cache import get_verdict_cache, normalize_message, verdict_key
+
+# Categories of the single-message OpenAI prompt
+CATEGORIES = ('Kampanya', 'Hukuki', 'OTP', 'Finans', 'Diğer')
+BATCH_PROMPT_VERSION = 'batch-2'
+
+def _category_key(category):
+    return re.sub(r'[\s_-]', '', category).casefold()
+
+_CATEGORY_LOOKUP = {_category_key(category): category for category in CATEGORIES}
+
+def canonical_category(category):
+    """
+    Maps a category as written by a model ("kampanya", "KAMPANYA", ...) to its name in CATEGORIES, or None.
+    """
+    return _CATEGORY_LOOKUP.get(_category_key(category))
+
+def build_batch_prompt(items):
+    """
+    Builds one prompt that asks for the verdicts of several messages as a JSON array.
+
+    Args:
+        items: List of (id, message) pairs.
+
+    Returns:
+        str: The prompt.
+    """
+    payload = json.dumps([{"id": item_id, "message": message} for item_id, message in items], ensure_ascii=False)
+    return (
+        "You are given a JSON array of SMS messages. For every message, estimate the percentage "
+        "probability that it is fraud and pick its category from: " + ", ".join(CATEGORIES) + ". "
+        "Answer with only a JSON array containing one object per message, in the form "
+        '{"id": <id>, "percentage": <0-100>, "category": "<category>"}, and nothing else.\n'
+        + payload
+    )
+
+def _parse_percentage(value):
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        percentage = float(value)
+    else:
+        match = re.search(r'\d+(?:[.,]\d+)?', str(value))
+        if match is None:
+            return None
+        percentage = float(match.group(0).replace(',', '.'))
+    return percentage if 0 <= percentage <= 100 else None
+
+def parse_batch_response(text, expected_ids):
+    """
+    Extracts the valid verdicts from a batch answer.
+
+    The JSON array may be wrapped in prose or a code fence. Items with an unknown id, a
+    percentage outside 0-100 or an unknown category are dropped, so they are asked again.
+
+    Args:
+        text: Model answer.
+        expected_ids: Ids sent in the prompt.
+
+    Returns:
+        dict: Maps each answered id to {"percentage", "category"}.
+    """
+    start, end = text.find('['), text.rfind(']')
+    if start == -1 or end < start:
+        return {}
+    try:
+        items = json.loads(text[start:end + 1])
+    except ValueError:
+        return {}
+
+    expected = {str(item_id): item_id for item_id in expected_ids}
+    answers = {}
+    for item in items if isinstance(items, list) else []:
+        if not isinstance(item, dict) or str(item.get('id')) not in expected:
+            continue
+        percentage = _parse_percentage(item.get('percentage'))
+        category = canonical_category(str(item.get('category', '')))
+        if percentage is not None and category is not None:
+            answers[expected[str(item.get('id'))]] = {"percentage": percentage, "category": category}
+    return answers
+
+def score_batch(messages, ask, batch_size=20, max_attempts=3, model=None, cache=None):
+    """
+    Scores many messages with one request per batch_size messages.
+
+    Identical messages are sent once. Messages whose answer is missing or malformed are
+    collected and asked again in new batches, up to max_attempts rounds.
+
+    Args:
+        messages: SMS texts.
+        ask: Function sending a prompt to the model and returning its text answer.
+        batch_size: Number of messages per request.
+        max_attempts: Number of rounds before a message is given up.
+        model: Model name; when given, verdicts are read from and written to the verdict cache.
+        cache: Cache to use instead of the shared verdict cache.
+
+    Returns:
+        list: {"percentage", "category"} per message in input order, or None where no valid answer came back.
+    """
+    messages = list(messages)
+    results = [None] * len(messages)
+    if model is not None:
+        cache = cache or get_verdict_cache()
+
+    # Step 1: Send every distinct message once and answer the rest from the cache
+    first_index = {}
+    pending = []
+    for index, message in enumerate(messages):
+        normalized = normalize_message(message)
+        if normalized in first_index:
+            continue
+        first_index[normalized] = index
+        if model is not None:
+            results[index] = cache.get(verdict_key(message, model, BATCH_PROMPT_VERSION))
+        if results[index] is None:
+            pending.append(index)
+
+    # Step 2: Ask in batches, re-asking only for the items without a valid answer
+    for _ in range(max_attempts):
+        if not pending:
+            break
+        unanswered = []
+        for start in range(0, len(pending), batch_size):
+            chunk = pending[start:start + batch_size]
+            # Ids are local to the request so that prompts stay short
+            items = [(position, messages[index]) for position, index in enumerate(chunk, start=1)]
+            try:
+                answers = parse_batch_response(ask(build_batch_prompt(items)), [item_id for item_id, _ in items])
+            except Exception:
+                answers = {}
+            for position, index in enumerate(chunk, start=1):
+                if position in answers:
+                    results[index] = answers[position]
+                    if model is not None:
+                        cache.set(verdict_key(messages[index], model, BATCH_PROMPT_VERSION), answers[position])
+                else:
+                    unanswered.append(index)
+        pending = unanswered
+
+    # Step 3: Copy the verdicts to the duplicates
+    for index, message in enumerate(messages):
+        if results[index] is None:
+            results[index] = results[first_index[normalize_message(message)]]
+    return results
+
+def format_verdict(verdict):
+    """
+    Formats a verdict like the single-message answers, e.g. "%80 Kampanya".
+    """
+    if verdict is None:
+        return None
+    return f"%{verdict['percentage']:g} {verdict['category']}"
@@ -0,0 +1,161 @@
+"""
+Description: This script provides a thread-safe LRU cache with expiry and an optional SQLite tier shared by the services.
+Author: Sarper Arda BAKIR
+Date: 18-10-2026
+Version: 1.2
+"""
+
+import json
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+from instrumentation import increment
+
+class TTLCache:
+    """
+    In-memory LRU cache whose entries expire after a time-to-live.
+
+    With a path, entries are also written to a SQLite file so they survive restarts; a miss in
+    memory then falls back to SQLite before computing the value again. Failed lookups can be
+    cached as negative entries with their own, usually shorter, time-to-live. Expired SQLite
+    rows are deleted when the file is opened and every prune_interval writes after that.
+    """
+
+    def __init__(self, maxsize=10000, ttl=3600.0, negative_ttl=60.0, path=None, namespace='default',
+                 prune_interval=1000):
+        """
+        Args:
+            maxsize: Number of entries kept in memory before the least recently used is evicted.
+            ttl: Seconds a successful value stays valid.
+            negative_ttl: Seconds a failed value stays valid. 0 disables negative caching.
+            path: SQLite file of the persistent tier, or None to keep everything in memory.
+            namespace: Name that separates caches sharing one SQLite file.
+            prune_interval: Writes between two deletions of the expired SQLite rows.
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.namespace = namespace
+        self.prune_interval = prune_interval
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+        self.persistent_hits = 0
+        self._hit_metric = f"cache.{namespace}.hit"
+        self._persistent_hit_metric = f"cache.{namespace}.persistent_hit"
+        self._miss_metric = f"cache.{namespace}.miss"
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if path:
+            self._db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+            # Write-ahead logging lets the scripts the API starts in parallel read while another one writes
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("CREATE TABLE IF NOT EXISTS cache (namespace TEXT, key TEXT, value TEXT, "
+                             "expires_at REAL, PRIMARY KEY (namespace, key))")
+            self._db.execute("CREATE INDEX IF NOT EXISTS cache_expires_at ON cache (expires_at)")
+            self._prune(time.time())
+            self._db.commit()
+
+    def _prune(self, now):
+        # Expired rows are never read again, whichever namespace wrote them
+        self._db.execute("DELETE FROM cache WHERE expires_at <= ?", (now,))
+
+    def _load(self, key, now):
+        row = self._db.execute("SELECT value, expires_at FROM cache WHERE namespace = ? AND key = ?",
+                               (self.namespace, key)).fetchone()
+        if row is None or row[1] <= now:
+            return None
+        return json.loads(row[0]), row[1]
+
+    def _store(self, key, value, expires_at):
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def get(self, key, default=None):
+        """
+        Returns the cached value of key, or default if it is missing or expired.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                increment(self._hit_metric)
+                return entry[0]
+            if entry is not None:
+                del self._entries[key]
+
+            entry = self._load(key, now) if self._db is not None else None
+            if entry is not None:
+                self._store(key, *entry)
+                self.hits += 1
+                self.persistent_hits += 1
+                increment(self._persistent_hit_metric)
+                return entry[0]
+
+            self.misses += 1
+            increment(self._miss_metric)
+            return default
+
+    def set(self, key, value, negative=False):
+        """
+        Stores a JSON-serializable value. Negative values expire after negative_ttl.
+        """
+        ttl = self.negative_ttl if negative else self.ttl
+        if ttl <= 0:
+            return
+        now = time.time()
+        expires_at = now + ttl
+        with self._lock:
+            self._store(key, value, expires_at)
+            if self._db is not None:
+                self._db.execute("INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?)",
+                                 (self.namespace, key, json.dumps(value), expires_at))
+                self._writes += 1
+                if self._writes % self.prune_interval == 0:
+                    self._prune(now)
+                self._db.commit()
+
+    def get_or_compute(self, key, compute, is_failure=None):
+        """
+        Returns the cached value of key, computing and caching it on a miss.
+
+        Args:
+            key: Cache key.
+            compute: Function without arguments that produces the value.
+            is_failure: Optional function telling whether a computed value is a failure,
+                which is then cached as a negative entry.
+        """
+        missing = object()
+        value = self.get(key, missing)
+        if value is not missing:
+            return value
+        value = compute()
+        self.set(key, value, negative=bool(is_failure and is_failure(value)))
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM cache WHERE namespace = ?", (self.namespace,))
+                self._db.commit()
+
+    def stats(self):
+        """
+        Returns the hit/miss counters and the current number of in-memory entries.
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "persistent_hits": self.persistent_hits,
+                "hit_rate": self.hits / total if total else 0.0,
+                "size": len(self._entries),
+            }
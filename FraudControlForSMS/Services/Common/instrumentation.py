@@ -0,0 +1,166 @@
+"""
+Description: This script records named timing spans and counters of the scorers and exports them as Prometheus text or JSON.
+Author: Sarper Arda BAKIR
+Date: 18-10-2026
+Version: 1.0
+"""
+
+import os
+import sys
+import json
+import time
+import atexit
+import threading
+import functools
+
+# Upper bounds in seconds of the histogram buckets of every span
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+PROMETHEUS_PREFIX = "fraudcontrol"
+
+# Recording is on when METRICS_ENABLED is set or METRICS_OUTPUT names a file to write at exit
+_enabled = os.getenv("METRICS_ENABLED", "").lower() in ("1", "true", "yes") or bool(os.getenv("METRICS_OUTPUT"))
+_lock = threading.Lock()
+_counters = {}
+_spans = {}
+
+class _NoopSpan:
+    """
+    Span returned while recording is off; entering and leaving it does nothing.
+    """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        return False
+
+_NOOP_SPAN = _NoopSpan()
+
+class _Span:
+    __slots__ = ('name', 'start')
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        record(self.name, time.perf_counter() - self.start)
+        return False
+
+def enable(enabled=True):
+    global _enabled
+    _enabled = enabled
+
+def is_enabled():
+    return _enabled
+
+def span(name):
+    """
+    Times a block of code under a name, e.g. `with span("tensorflow.predict"): ...`.
+
+    While recording is off a shared no-op span is returned, so an instrumented block costs
+    about one function call.
+    """
+    if not _enabled:
+        return _NOOP_SPAN
+    return _Span(name)
+
+def timed(name):
+    """
+    Decorator that times every call of a function as a span.
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return function(*args, **kwargs)
+            with _Span(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def record(name, seconds):
+    """
+    Adds one duration measured elsewhere, e.g. the time imports took before this module was loaded.
+    """
+    if not _enabled:
+        return
+    with _lock:
+        stats = _spans.get(name)
+        if stats is None:
+            stats = _spans[name] = {"count": 0, "sum": 0.0, "min": seconds, "max": seconds,
+                                    "buckets": [0] * len(BUCKETS)}
+        stats["count"] += 1
+        stats["sum"] += seconds
+        stats["min"] = min(stats["min"], seconds)
+        stats["max"] = max(stats["max"], seconds)
+        for index, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                stats["buckets"][index] += 1
+                break
+
+def increment(name, value=1):
+    """
+    Adds value to a counter, e.g. increment("ipqs.retry").
+    """
+    if not _enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+def reset():
+    with _lock:
+        _counters.clear()
+        _spans.clear()
+
+def snapshot():
+    """
+    Returns the counters and a summary of every span (count and total, mean, min and max seconds).
+    """
+    with _lock:
+        return {
+            "counters": dict(_counters),
+            "spans": {name: {"count": stats["count"], "sum_seconds": round(stats["sum"], 6),
+                             "mean_seconds": round(stats["sum"] / stats["count"], 6),
+                             "min_seconds": round(stats["min"], 6), "max_seconds": round(stats["max"], 6)}
+                      for name, stats in _spans.items()},
+        }
+
+def to_prometheus():
+    """
+    Returns all metrics in the Prometheus text exposition format: one histogram for the spans
+    and one counter for the counters, labelled by name.
+    """
+    with _lock:
+        lines = [f"# TYPE {PROMETHEUS_PREFIX}_span_seconds histogram"]
+        for name, stats in sorted(_spans.items()):
+            cumulative = 0
+            for bound, count in zip(BUCKETS, stats["buckets"]):
+                cumulative += count
+                lines.append(f'{PROMETHEUS_PREFIX}_span_seconds_bucket{{span="{name}",le="{bound}"}} {cumulative}')
+            lines.append(f'{PROMETHEUS_PREFIX}_span_seconds_bucket{{span="{name}",le="+Inf"}} {stats["count"]}')
+            lines.append(f'{PROMETHEUS_PREFIX}_span_seconds_sum{{span="{name}"}} {stats["sum"]}')
+            lines.append(f'{PROMETHEUS_PREFIX}_span_seconds_count{{span="{name}"}} {stats["count"]}')
+        lines.append(f"# TYPE {PROMETHEUS_PREFIX}_events_total counter")
+        for name, value in sorted(_counters.items()):
+            lines.append(f'{PROMETHEUS_PREFIX}_events_total{{name="{name}"}} {value}')
+    return "\n".join(lines) + "\n"
+
+def write(path):
+    """
+    Writes the metrics to path: Prometheus text if it ends with .prom, otherwise one JSON line
+    is appended, so short-lived script runs add up in one file.
+    """
+    if path.endswith('.prom'):
+        with open(path, 'w', encoding='utf-8') as handle:
+            handle.write(to_prometheus())
+    else:
+        line = dict(snapshot(), pid=os.getpid(), script=os.path.basename(sys.argv[0]), time=time.time())
+        with open(path, 'a', encoding='utf-8') as handle:
+            handle.write(json.dumps(line) + "\n")
+
+if os.getenv("METRICS_OUTPUT"):
+    atexit.register(write, os.getenv("METRICS_OUTPUT"))
@@ -7,9 +7,20 @@
 
 # Import the required libraries
 import os
+import re
 import sys
+import json
+import time
+import asyncio
+import weakref
+import argparse
 from dotenv import load_dotenv
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Common'))
+from verdict_cache import get_verdict_cache, verdict_key
+from batch_prompt import score_batch, canonical_category
+from instrumentation import increment, record, span
 
 # Load the environment variables from the .env file
 load_dotenv()
@@ -20,6 +31,140 @@ API_KEY = os.getenv("OPENAI_API_KEY")
 # Initialize OpenAI client
 client = OpenAI(api_key=API_KEY)
 
+# Model and prompt the cached verdicts belong to; bump PROMPT_VERSION whenever the prompt changes
+MODEL_NAME = "gpt-4"
+PROMPT_VERSION = 1
+PROMPT_SUFFIX = " Bu sms örneği Fraud mu? Sadece yüzdeyi yaz. Ayrıca, bu sms hangi kategoriye ait? Kampanya, Hukuki, OTP, Finans, Diğer.Vereceğin cevap yalnızca '%80 Kampanya' şeklinde olmalıdır.Fraud kelimesini ceavpta kullanma."
+
+# A complete answer looks like '%80 Kampanya'; the category is only accepted once it is a known one
+VERDICT_PATTERN = re.compile(r'%\s*(\d+(?:[.,]\d+)?)\s+([^\s.,;!]+)')
+ERROR_PREFIX = "An unexpected error occurred"
+
+def is_error_response(verdict):
+    return not verdict or verdict.startswith(ERROR_PREFIX)
+
+def parse_verdict(text):
+    """
+    Returns the first complete '%NN Category' answer in text, or None if there is none yet.
+    """
+    for match in VERDICT_PATTERN.finditer(text):
+        # The category is kept as written, since the API parses the answer text itself
+        if canonical_category(match.group(2)) is not None:
+            return f"%{match.group(1)} {match.group(2)}"
+    return None
+
+class OpenAIScorer:
+    """
+    Async OpenAI scorer sharing one AsyncOpenAI client across all requests of an event loop.
+
+    Answers are streamed and parsed as they arrive; the stream is closed as soon as a
+    complete '%NN Category' answer has been read. At most `concurrency` requests are in
+    flight and each one is given up after `timeout` seconds. OPENAI_BASE_URL points the
+    client at a local mock endpoint.
+
+    The client's connection pool belongs to the loop that opened it, so every loop gets a
+    client created inside it, and repeated asyncio.run() calls never reuse dead connections.
+    """
+
+    def __init__(self, model_name=MODEL_NAME, max_tokens=20, concurrency=8, timeout=30.0, client=None, cache=None):
+        """
+        Args:
+            model_name: OpenAI model name.
+            max_tokens: Cap on the answer length.
+            concurrency: Number of requests in flight.
+            timeout: Seconds before a request is given up.
+            client: AsyncOpenAI client to use in every loop instead of one created per loop.
+            cache: Verdict cache to use instead of the shared one.
+        """
+        self.model_name = model_name
+        self.max_tokens = max_tokens
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.client = client
+        self.cache = cache or get_verdict_cache()
+        self._clients = weakref.WeakKeyDictionary()
+        self._semaphores = weakref.WeakKeyDictionary()
+
+    def _semaphore(self):
+        # A semaphore belongs to one event loop, so every loop that uses the scorer gets its own
+        loop = asyncio.get_running_loop()
+        if loop not in self._semaphores:
+            self._semaphores[loop] = asyncio.Semaphore(self.concurrency)
+        return self._semaphores[loop]
+
+    def _client(self):
+        if self.client is not None:
+            return self.client
+        loop = asyncio.get_running_loop()
+        if loop not in self._clients:
+            self._clients[loop] = AsyncOpenAI(api_key=API_KEY, max_retries=1)
+        return self._clients[loop]
+
+    async def _stream_verdict(self, full_prompt):
+        started = time.perf_counter()
+        stream = await self._client().chat.completions.create(
+            model=self.model_name,
+            messages=[{"role": "user", "content": full_prompt}],
+            max_tokens=self.max_tokens,
+            stream=True,
+        )
+        response_text = ""
+        try:
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content is not None:
+                    if not response_text:
+                        record("openai.first_token", time.perf_counter() - started)
+                    response_text += chunk.choices[0].delta.content
+                    verdict = parse_verdict(response_text)
+                    if verdict is not None:
+                        increment("openai.stream_closed_early")
+                        return verdict
+        finally:
+            # Stop reading the rest of the answer once it is no longer needed
+            await stream.close()
+        return response_text.strip()
+
+    async def generate(self, message):
+        """
+        Asks for the verdict of one message, or returns an error text if it failed or timed out.
+        """
+        async with self._semaphore():
+            try:
+                with span("openai.request"):
+                    return await asyncio.wait_for(self._stream_verdict(f"{message}{PROMPT_SUFFIX}"), self.timeout)
+            except asyncio.TimeoutError:
+                increment("openai.timeout")
+                return f"{ERROR_PREFIX}: no answer within {self.timeout} seconds"
+            except Exception as e:
+                increment("openai.error")
+                return f"{ERROR_PREFIX}: {str(e)}"
+
+    async def score(self, message):
+        """
+        Returns the verdict for an SMS message, reusing the cached verdict of an identical message.
+        """
+        key = verdict_key(message, self.model_name, PROMPT_VERSION)
+        verdict = self.cache.get(key)
+        if verdict is None:
+            verdict = await self.generate(message)
+            if not is_error_response(verdict):
+                self.cache.set(key, verdict)
+        return verdict
+
+    async def score_many(self, messages):
+        """
+        Scores messages concurrently and returns their verdicts in input order.
+        """
+        return await asyncio.gather(*(self.score(message) for message in messages))
+
+_scorer = None
+
+def get_scorer():
+    global _scorer
+    if _scorer is None:
+        _scorer = OpenAIScorer()
+    return _scorer
+
 """
   This function sends a prompt to the OpenAI API and returns the generated text response.
 
@@ -30,31 +175,75 @@ client = OpenAI(api_key=API_KEY)
       The generated text response from OpenAI.
 """
 def generate_openai_response(prompt):
-    try:
-        # Adjust the prompt to include the specific question
-        full_prompt = f"{prompt} Bu sms örneği Fraud mu? Sadece yüzdeyi yaz. Ayrıca, bu sms hangi kategoriye ait? Kampanya, Hukuki, OTP, Finans, Diğer.Vereceğin cevap yalnızca '%80 Kampanya' şeklinde olmalıdır.Fraud kelimesini ceavpta kullanma."
+    return asyncio.run(get_scorer().generate(prompt))
 
-        # Create the completion request to OpenAI with streaming
-        stream = client.chat.completions.create(
-            model="gpt-4",  # Specify the model; adjust as needed
-            messages=[{"role": "user", "content": full_prompt}],
-            stream=True,
-        )
-        
-        response_text = ""
-        for chunk in stream:
-            if chunk.choices[0].delta.content is not None:
-                response_text += chunk.choices[0].delta.content
-        
-        return response_text.strip()
+"""
+  This function returns the OpenAI verdict for an SMS message, reusing the cached verdict of an identical message.
+
+  Args:
+      message: The SMS message to be scored.
+
+  Returns:
+      The generated text response from OpenAI.
+"""
+def score_message(message):
+    return asyncio.run(get_scorer().score(message))
+
+"""
+  This function sends a batch prompt to the OpenAI API and returns the answer without streaming.
 
-    except Exception as e:
-        return f"An unexpected error occurred: {str(e)}"
+  Args:
+      prompt: The batch prompt built by batch_prompt.build_batch_prompt().
+
+  Returns:
+      The generated text response from OpenAI.
+"""
+def ask_openai(prompt):
+    response = client.chat.completions.create(
+        model=MODEL_NAME,
+        messages=[{"role": "user", "content": prompt}],
+        temperature=0,
+    )
+    return response.choices[0].message.content or ""
+
+"""
+  This function scores many SMS messages with one OpenAI request per batch.
+
+  Args:
+      messages: The SMS messages to be scored.
+      batch_size: Number of messages packed into one request.
+
+  Returns:
+      A {"percentage", "category"} dict per message, or None where no valid answer came back.
+"""
+def score_messages_batch(messages, batch_size=20):
+    return score_batch(messages, ask_openai, batch_size, model=MODEL_NAME)
 
 if __name__ == "__main__":
-    if len(sys.argv) > 1:
+    if len(sys.argv) > 1 and sys.argv[1] == "--batch":
+        # Only parse options in batch mode, so a single message starting with "-" is still scored
+        parser = argparse.ArgumentParser(description="Score SMS messages with OpenAI in batches.")
+        parser.add_argument("--batch", metavar="FILE", required=True,
+                            help="Score one message per line from FILE ('-' for stdin) and print one JSON line per message")
+        parser.add_argument("--batch-size", type=int, default=20, help="Messages per request")
+        args = parser.parse_args()
+        with (sys.stdin if args.batch == '-' else open(args.batch, 'r', encoding='utf-8')) as handle:
+            messages = [line.rstrip('\n') for line in handle]
+        for verdict in score_messages_batch(messages, args.batch_size):
+            print(json.dumps(verdict, ensure_ascii=False))
+    elif len(sys.argv) > 1 and sys.argv[1] == "--messages":
+        parser = argparse.ArgumentParser(description="Score SMS messages with OpenAI concurrently.")
+        parser.add_argument("--messages", metavar="FILE", required=True,
+                            help="Score one message per line from FILE ('-' for stdin) and print one verdict per line")
+        parser.add_argument("--concurrency", type=int, default=8, help="Requests in flight")
+        args = parser.parse_args()
+        with (sys.stdin if args.messages == '-' else open(args.messages, 'r', encoding='utf-8')) as handle:
+            messages = [line.rstrip('\n') for line in handle]
+        for verdict in asyncio.run(OpenAIScorer(concurrency=args.concurrency).score_many(messages)):
+            print(verdict.replace('\n', ' '))
+    elif len(sys.argv) > 1:
         test_message = sys.argv[1]
-        result = generate_openai_response(test_message)
+        result = score_message(test_message)
         print(f"Message: {test_message}")
         print(f"Response: {result}")
     else:
@@ -0,0 +1,176 @@
+"""
+Description: This script runs local stand-ins for the IPQS, OpenAI and Gemini APIs with configurable latency and error injection.
+Author: Sarper Arda BAKIR
+Date: 18-10-2026
+Version: 1.0
+"""
+
+import json
+import time
+import zlib
+import random
+import argparse
+import threading
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SERVICES = ('ipqs', 'openai', 'gemini')
+CATEGORIES = ('Kampanya', 'E-ticaret', 'Finans', 'OTP', 'Hukuki', 'Diğer')
+
+def fake_score(text):
+    """
+    Returns a score 0-100 that only depends on the text, so repeated runs get the same answers.
+    """
+    return zlib.crc32(text.encode('utf-8')) % 101
+
+class FakeServiceConfig:
+    """
+    Latency and error injection of the fake services.
+
+    Every request waits a normally distributed time (latency_ms[service] +- jitter_ms, never
+    below zero) and then fails with a 500 or 429 with probability error_rate.
+    """
+
+    def __init__(self, latency_ms=None, jitter_ms=0.0, error_rate=0.0, seed=42):
+        self.latency_ms = dict.fromkeys(SERVICES, 100.0)
+        self.latency_ms.update(latency_ms or {})
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = dict.fromkeys(SERVICES, 0)
+        self.errors = dict.fromkeys(SERVICES, 0)
+
+    def delay(self, service):
+        with self.lock:
+            self.requests[service] += 1
+            delay = max(0.0, self.random.gauss(self.latency_ms[service], self.jitter_ms)) / 1000
+            failed = self.random.random() < self.error_rate
+            if failed:
+                self.errors[service] += 1
+        time.sleep(delay)
+        return failed
+
+    def as_dict(self):
+        return {"latency_ms": self.latency_ms, "jitter_ms": self.jitter_ms, "error_rate": self.error_rate}
+
+class FakeServiceHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body are sent separately; without this, delayed ACKs add ~40 ms to every response
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _fail(self):
+        status = self.server.config.random.choice((500, 429))
+        self._send_json(status, {"error": {"code": status, "message": "Injected error"}})
+
+    def _read_json(self):
+        length = int(self.headers.get('Content-Length', 0))
+        return json.loads(self.rfile.read(length) or b'{}')
+
+    def do_GET(self):
+        # IPQS: /api/json/url/<key>/<url> and /api/json/ip/<key>/<ip>
+        parts = urllib.parse.urlsplit(self.path).path.split('/')
+        if len(parts) < 6 or parts[1:3] != ['api', 'json'] or parts[3] not in ('url', 'ip'):
+            return self._send_json(404, {"success": False, "message": "Unknown endpoint"})
+        if self.server.config.delay('ipqs'):
+            return self._fail()
+        target = urllib.parse.unquote_plus('/'.join(parts[5:]))
+        score = fake_score(target)
+        if parts[3] == 'url':
+            self._send_json(200, {"success": True, "unsafe": score > 85, "domain": urllib.parse.urlsplit(target).netloc,
+                                  "ip_address": "10.0.%d.%d" % (score, score), "risk_score": score,
+                                  "suspicious": score > 85, "phishing": False, "malware": False, "parking": False,
+                                  "spamming": False})
+        else:
+            self._send_json(200, {"success": True, "fraud_score": score, "proxy": score > 90})
+
+    def do_POST(self):
+        path = urllib.parse.urlsplit(self.path).path
+        if path.endswith('/chat/completions'):
+            return self._openai(self._read_json())
+        if path.endswith(':generateContent'):
+            return self._gemini(self._read_json())
+        self._send_json(404, {"error": {"code": 404, "message": "Unknown endpoint"}})
+
+    def _openai(self, request):
+        if self.server.config.delay('openai'):
+            return self._fail()
+        prompt = request["messages"][-1]["content"]
+        answer = f"%{fake_score(prompt)} {CATEGORIES[fake_score(prompt[::-1]) % len(CATEGORIES)]}"
+        if not request.get("stream"):
+            return self._send_json(200, {"id": "fake", "object": "chat.completion", "created": int(time.time()),
+                                         "model": request.get("model", "fake"),
+                                         "choices": [{"index": 0, "finish_reason": "stop",
+                                                      "message": {"role": "assistant", "content": answer}}]})
+        # Stream the answer a few characters per chunk, as the real API does
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        for start in range(0, len(answer), 3):
+            chunk = {"id": "fake", "object": "chat.completion.chunk", "created": int(time.time()),
+                     "model": request.get("model", "fake"),
+                     "choices": [{"index": 0, "delta": {"content": answer[start:start + 3]}, "finish_reason": None}]}
+            self.wfile.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode('utf-8'))
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+        self.close_connection = True
+
+    def _gemini(self, request):
+        if self.server.config.delay('gemini'):
+            return self._fail()
+        prompt = request["contents"][-1]["parts"][0]["text"]
+        self._send_json(200, {"candidates": [{"content": {"parts": [{"text": f"{fake_score(prompt)}%"}],
+                                                          "role": "model"}, "finishReason": "STOP"}]})
+
+def start_fake_services(config=None, port=0):
+    """
+    Starts the fake services on 127.0.0.1 in a background thread.
+
+    Returns:
+        tuple: (server, base URL such as "http://127.0.0.1:PORT"); call server.shutdown() to stop it.
+    """
+    server = ThreadingHTTPServer(('127.0.0.1', port), FakeServiceHandler)
+    server.daemon_threads = True
+    server.config = config or FakeServiceConfig()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+def parse_latency(text):
+    """
+    Parses SERVICE=MS, e.g. openai=400.
+    """
+    service, _, value = text.partition('=')
+    if service not in SERVICES:
+        raise argparse.ArgumentTypeError(f"unknown service {service}, expected one of {SERVICES}")
+    return service, float(value)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run local stand-ins for the IPQS, OpenAI and Gemini APIs.")
+    parser.add_argument("--port", type=int, default=8765, help="Port to listen on")
+    parser.add_argument("--latency", nargs="*", type=parse_latency, default=[], metavar="SERVICE=MS",
+                        help="Mean latency per service, e.g. ipqs=50 openai=400 (default 100 ms)")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Standard deviation of the latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 500/429")
+    args = parser.parse_args()
+
+    fake_server, base_url = start_fake_services(FakeServiceConfig(dict(args.latency), args.jitter_ms,
+                                                                  args.error_rate), args.port)
+    print(f"IPQS_BASE_URL={base_url}/api/json")
+    print(f"OPENAI_BASE_URL={base_url}/v1")
+    print(f"Gemini REST endpoint: {base_url}/v1beta/models/<model>:generateContent")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        fake_server.shutdown()
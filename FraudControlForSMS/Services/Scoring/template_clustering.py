@@ -0,0 +1,212 @@
+"""
+Description: This script groups campaign messages that only differ in names, numbers or links, so each template is scored once.
+Author: Sarper Arda BAKIR
+Date: 18-10-2026
+Version: 1.0
+"""
+
+import os
+import re
+import sys
+import zlib
+import argparse
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'IPQS'))
+from url_extraction import extract_domains, replace_urls
+
+EMAIL_PATTERN = re.compile(r'\S+@\S+\.\w+')
+NUMBER_PATTERN = re.compile(r'\d+(?:[.,:/-]\d+)*')
+TOKEN_PATTERN = re.compile(r'<\w+>|\w+|[^\w\s]')
+# A capitalized word that does not start a sentence is taken for a name (person, brand, city, ...)
+NAME_PATTERN = re.compile(r'^[A-ZÇĞİÖŞÜ][a-zçğıöşü]+$')
+SENTENCE_END = frozenset('.!?;:')
+
+# Mersenne prime used by the MinHash permutations
+MERSENNE_PRIME = (1 << 61) - 1
+
+def to_template(message):
+    """
+    Replaces links, e-mail addresses, numbers and names with placeholders.
+
+    Returns:
+        list: Lowercase template tokens.
+    """
+    message = replace_urls(message)
+    message = EMAIL_PATTERN.sub(' <EMAIL> ', message)
+    message = NUMBER_PATTERN.sub(' <NUM> ', message)
+
+    tokens = []
+    previous = None
+    for token in TOKEN_PATTERN.findall(message):
+        if previous is not None and previous not in SENTENCE_END and NAME_PATTERN.match(token):
+            token = '<NAME>'
+        # Runs of the same placeholder, e.g. "<NUM> <NUM>", collapse to one
+        if not (token.startswith('<') and tokens and tokens[-1] == token.lower()):
+            tokens.append(token.lower())
+        previous = token
+    return tokens
+
+def shingles(tokens, size=3):
+    """
+    Returns the CRC32 hashes of the word n-grams of a template.
+    """
+    if len(tokens) < size:
+        return np.array([zlib.crc32(' '.join(tokens).encode('utf-8'))], dtype=np.uint64)
+    return np.array([zlib.crc32(' '.join(tokens[i:i + size]).encode('utf-8'))
+                     for i in range(len(tokens) - size + 1)], dtype=np.uint64)
+
+def lsh_parameters(threshold, num_perm):
+    """
+    Picks the number of bands and rows per band whose LSH threshold (1/b)^(1/r) is closest to threshold.
+    """
+    candidates = [(bands, num_perm // bands) for bands in range(1, num_perm + 1) if num_perm % bands == 0]
+    return min(candidates, key=lambda band: abs((1 / band[0]) ** (1 / band[1]) - threshold))
+
+class TemplateClusters:
+    """
+    Clusters of near-duplicate messages.
+
+    labels[i] is the cluster of message i and representatives[c] the index of the first
+    message of cluster c, which is the one that gets scored.
+    """
+
+    def __init__(self, labels, representatives):
+        self.labels = labels
+        self.representatives = representatives
+
+    @property
+    def compression_ratio(self):
+        return len(self.labels) / len(self.representatives) if self.representatives else 1.0
+
+    def fan_out(self, representative_results):
+        """
+        Maps the results of the representatives back to every message.
+        """
+        return [representative_results[label] for label in self.labels]
+
+def cluster_messages(messages, threshold=0.8, num_perm=128, seed=42):
+    """
+    Groups messages whose templates have an estimated Jaccard similarity of at least threshold.
+
+    Identical templates are merged first; MinHash signatures split into LSH bands then find
+    candidate pairs, which are merged if their signatures agree on at least threshold of the rows.
+    Templates hide the links, so messages are only grouped when they also link to the same set
+    of normalized domains; a phishing copy of a legitimate template gets its own cluster and
+    its own reputation check.
+
+    Args:
+        messages: SMS texts.
+        threshold: Similarity (0-1) above which two messages belong to the same cluster.
+        num_perm: Number of MinHash permutations.
+        seed: Seed of the permutations, so clusters are reproducible.
+
+    Returns:
+        TemplateClusters: The clusters, numbered in order of first appearance.
+    """
+    messages = list(messages)
+    # Step 1: Messages with the same template and linked domains are one cluster without any hashing
+    template_index = {}
+    template_of_message = []
+    for message in messages:
+        key = (' '.join(to_template(message)), frozenset(extract_domains(message)))
+        template_of_message.append(template_index.setdefault(key, len(template_index)))
+    templates = [template for template, _ in template_index]
+    domains = [domain_set for _, domain_set in template_index]
+
+    # Step 2: MinHash signature per distinct template
+    random_state = np.random.RandomState(seed)
+    a = random_state.randint(1, 1 << 31, size=num_perm).astype(np.uint64)
+    b = random_state.randint(0, 1 << 31, size=num_perm).astype(np.uint64)
+    signatures = np.empty((len(templates), num_perm), dtype=np.uint64)
+    for index, template in enumerate(templates):
+        hashes = shingles(template.split(' '))
+        signatures[index] = ((a[:, None] * hashes[None, :] + b[:, None]) % MERSENNE_PRIME).min(axis=1)
+
+    # Step 3: Union candidate pairs from the LSH buckets that pass the similarity check
+    parent = list(range(len(templates)))
+
+    def find(node):
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    bands, rows = lsh_parameters(threshold, num_perm)
+    for band in range(bands):
+        buckets = {}
+        # Templates linking to other domains never share a bucket, so each bucket is checked against its first member
+        for index, row in enumerate(signatures[:, band * rows:(band + 1) * rows]):
+            buckets.setdefault((row.tobytes(), domains[index]), []).append(index)
+        for members in buckets.values():
+            for other in members[1:]:
+                first, second = find(members[0]), find(other)
+                if first != second and np.mean(signatures[members[0]] == signatures[other]) >= threshold:
+                    parent[max(first, second)] = min(first, second)
+
+    # Step 4: Number the clusters in order of first appearance
+    labels = []
+    representatives = []
+    cluster_of_root = {}
+    for index, template in enumerate(template_of_message):
+        root = find(template)
+        if root not in cluster_of_root:
+            cluster_of_root[root] = len(representatives)
+            representatives.append(index)
+        labels.append(cluster_of_root[root])
+    return TemplateClusters(labels, representatives)
+
+# Batches and the cluster labels cluster_messages() must give them at the default threshold
+_KOTON = ("{greeting} Müşterimiz; Koton Ak Yatırım Eş Liderliğinde halka arz ediliyor. 30 Nisan/ 2-3 Mayıs tarihlerinde "
+          "30,50 TL fiyat ile {planned} Koton halka arzına {join} için şimdi {act}. {link} SMS {channel} "
+          "çıkmak için ILT IPTAL yazıp 4607'ye gönderebilirsiniz.")
+_KOTON_LEGIT = _KOTON.format(greeting="Değerli", planned="gerçekleşecek", join="başvurmak", act="girin",
+                             channel="listesinden", link="https://akyatirim.com.tr/halka-arz-talep")
+_KOTON_COPIES = [
+    _KOTON.format(greeting="Değerli", planned="yapılacak", join="başvurmak", act="girin", channel="aboneliğinden",
+                  link="https://akyatirim-giris.xyz/a"),
+    _KOTON.format(greeting="Sevgili", planned="yapılacak", join="katılmak", act="girin", channel="listesinden",
+                  link="https://akyatirim-giris.xyz/b"),
+    _KOTON.format(greeting="Sevgili", planned="gerçekleşecek", join="başvurmak", act="girin", channel="listesinden",
+                  link="https://akyatirim-giris.xyz/c"),
+]
+EXAMPLES = [
+    ([_KOTON_LEGIT, _KOTON_LEGIT.replace("halka-arz-talep", "halka-arz-talep?id=17")], [0, 0]),
+    # Copies linking to another domain form their own cluster, whether or not the legitimate message comes first
+    (_KOTON_COPIES, [0, 0, 0]),
+    ([_KOTON_LEGIT] + _KOTON_COPIES, [0, 1, 1, 1]),
+    (["Sayın Ahmet, 1250 TL borcunuz bulunmaktadır.", "Sayın Ayşe, 80 TL borcunuz bulunmaktadır.",
+      "Yarın görüşelim mi?"], [0, 0, 1]),
+]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Report how far template clustering compresses a batch of messages.")
+    parser.add_argument("file", nargs="?", help="CSV file with a message column, or a text file with one message per line")
+    parser.add_argument("--threshold", type=float, default=0.8, help="Similarity above which messages are clustered")
+    parser.add_argument("--top", type=int, default=10, help="Number of largest clusters to show")
+    parser.add_argument("--check", action="store_true", help="Check the clusters of the batches in EXAMPLES")
+    args = parser.parse_args()
+
+    if args.check:
+        for batch, expected in EXAMPLES:
+            labels = cluster_messages(batch).labels
+            if labels != expected:
+                raise AssertionError(f"cluster_messages() gave {labels}, expected {expected} for {batch}")
+        print(f"All {len(EXAMPLES)} examples passed")
+        sys.exit(0)
+    if not args.file:
+        parser.error("a file or --check is required")
+
+    if args.file.endswith('.csv'):
+        import pandas as pd
+        batch = pd.read_csv(args.file, encoding='utf-8')['message'].astype(str).tolist()
+    else:
+        with open(args.file, 'r', encoding='utf-8') as handle:
+            batch = [line.rstrip('\n') for line in handle if line.strip()]
+
+    clusters = cluster_messages(batch, args.threshold)
+    print(f"{len(batch)} messages in {len(clusters.representatives)} clusters, "
+          f"compression ratio {clusters.compression_ratio:.2f}")
+    sizes = np.bincount(clusters.labels)
+    for label in np.argsort(-sizes, kind='stable')[:args.top]:
+        print(f"{sizes[label]:>6}  {' '.join(to_template(batch[clusters.representatives[label]]))[:100]}")
@@ -0,0 +1,126 @@
+"""
+Description: This script caches the fitted tokenizer and the padded training sequences per dataset as memory-mapped files.
+Author: Sarper Arda BAKIR
+Date: 18-10-2026
+Version: 1.0
+"""
+
+import os
+import json
+import hashlib
+import argparse
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import LabelEncoder
+from fast_tokenizer import FastTokenizer
+
+# Define the path of the training data and the cache directory
+SAVE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../'))
+CSV_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), 'sms.csv'))
+FEATURE_CACHE_DIR = os.path.join(SAVE_DIR, 'feature_cache')
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as handle:
+        for block in iter(lambda: handle.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def tokenizer_sha256(tokenizer):
+    """
+    Hashes everything that decides the sequences a tokenizer produces.
+    """
+    header = json.dumps({'num_words': tokenizer.num_words, 'filters': tokenizer.filters, 'lower': tokenizer.lower})
+    return hashlib.sha256('\n'.join([header] + tokenizer.words).encode('utf-8')).hexdigest()
+
+def load_dataset(path=CSV_PATH):
+    """
+    Reads the label and message columns from a CSV file or a Parquet file written by exportcsv.py.
+
+    Returns:
+        tuple: (list of messages, encoded labels)
+    """
+    if path.endswith('.parquet'):
+        data = pd.read_parquet(path, columns=['label', 'message'])
+    else:
+        data = pd.read_csv(path, encoding='utf-8')[['label', 'message']]
+    labels = LabelEncoder().fit_transform(data['label'].values)
+    return data['message'].astype(str).tolist(), labels
+
+class FeatureCache:
+    """
+    Tokenizer and padded sequences of a dataset, computed once and reused by every training run.
+
+    Files are keyed by the SHA-256 of the dataset file and of the tokenizer, so a changed
+    dataset or vocabulary never reuses stale features:
+
+        tokenizer-<dataset>-<num_words>.txt
+        sequences-<dataset>-<tokenizer>-<maxlen>.npy
+        labels-<dataset>.npy
+
+    The arrays are opened with mmap_mode='r', so a cached run pages rows in from disk as
+    batches need them instead of holding the whole matrix in memory.
+    """
+
+    def __init__(self, cache_dir=FEATURE_CACHE_DIR):
+        self.cache_dir = cache_dir
+
+    def _path(self, name):
+        return os.path.join(self.cache_dir, name)
+
+    def load(self, dataset_path=CSV_PATH, num_words=5000, maxlen=100, chunk_size=10000):
+        """
+        Returns the fitted tokenizer, padded sequences and labels of a dataset, building
+        whatever is not cached yet.
+
+        Args:
+            dataset_path: CSV or Parquet file with label and message columns.
+            num_words: Vocabulary size of the tokenizer.
+            maxlen: Padding length of the sequences.
+            chunk_size: Number of messages padded and written at a time while building the cache.
+
+        Returns:
+            tuple: (FastTokenizer, int32 sequences of shape (messages, maxlen), labels), the arrays memory-mapped.
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        dataset_key = file_sha256(dataset_path)[:16]
+        tokenizer_path = self._path(f"tokenizer-{dataset_key}-{num_words}.txt")
+        labels_path = self._path(f"labels-{dataset_key}.npy")
+        dataset = None
+
+        # Step 1: Tokenizer fitted on this dataset
+        if os.path.exists(tokenizer_path):
+            tokenizer = FastTokenizer.load(tokenizer_path)
+        else:
+            dataset = load_dataset(dataset_path)
+            tokenizer = FastTokenizer.fit(dataset[0], num_words=num_words)
+            tokenizer.save(tokenizer_path + '.tmp')
+            os.replace(tokenizer_path + '.tmp', tokenizer_path)
+
+        # Step 2: Padded sequences and labels, written straight into memory-mapped files
+        sequences_path = self._path(f"sequences-{dataset_key}-{tokenizer_sha256(tokenizer)[:16]}-{maxlen}.npy")
+        if not (os.path.exists(sequences_path) and os.path.exists(labels_path)):
+            messages, labels = dataset if dataset is not None else load_dataset(dataset_path)
+            sequences = np.lib.format.open_memmap(sequences_path + '.tmp', mode='w+', dtype=np.int32,
+                                                  shape=(len(messages), maxlen))
+            for start in range(0, len(messages), chunk_size):
+                sequences[start:start + chunk_size] = tokenizer.texts_to_padded(messages[start:start + chunk_size],
+                                                                                maxlen=maxlen)
+            sequences.flush()
+            del sequences
+            with open(labels_path + '.tmp', 'wb') as handle:
+                np.save(handle, np.asarray(labels))
+            os.replace(sequences_path + '.tmp', sequences_path)
+            os.replace(labels_path + '.tmp', labels_path)
+
+        return tokenizer, np.load(sequences_path, mmap_mode='r'), np.load(labels_path, mmap_mode='r')
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the feature cache of a dataset ahead of training.")
+    parser.add_argument("dataset", nargs="?", default=CSV_PATH, help="CSV or Parquet file with label and message columns")
+    parser.add_argument("--num-words", type=int, default=5000, help="Vocabulary size of the tokenizer")
+    parser.add_argument("--maxlen", type=int, default=100, help="Padding length of the sequences")
+    args = parser.parse_args()
+
+    cached_tokenizer, cached_sequences, cached_labels = FeatureCache().load(args.dataset, args.num_words, args.maxlen)
+    print(f"Cached {cached_sequences.shape[0]} sequences of {cached_sequences.shape[1]} tokens in {FEATURE_CACHE_DIR}")
@@ -5,48 +5,51 @@ Date: 09-07-2024
 Version: 1.0
 """
 
+import time
+
+# Import time is recorded as a span once the instrumentation module is loaded
+IMPORT_STARTED = time.perf_counter()
+
 import os
 import sys
-import pandas as pd
+import json
+import argparse
+import itertools
+import numpy as np
 import tensorflow as tf
-from tensorflow.keras.preprocessing.text import Tokenizer
-from tensorflow.keras.preprocessing.sequence import pad_sequences
 from tensorflow.keras.models import Sequential
 from tensorflow.keras.layers import Embedding, LSTM, Dense, Dropout
 from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import LabelEncoder
-import pickle
+from feature_cache import FeatureCache
+from inference_pool import InferencePool, ShardFailedError
+from model_registry import (MODEL_FILE, VOCAB_FILE, WEIGHTS_FILE, TFLITE_FILES, ModelNotAvailableError,
+                            ModelRegistry, HotReloadingModel, export_backends)
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Common'))
+from instrumentation import record, span
+
+record("tensorflow.imports", time.perf_counter() - IMPORT_STARTED)
 
-# Define the path to save the model and tokenizer
-SAVE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../'))
+# Define the path of the training data; trained models are published to the model registry
 CSV_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), 'sms.csv'))
-def train_sms_spam_model():
-    # Step 1: Data Collection and Preprocessing
-    data = pd.read_csv(CSV_PATH, encoding='utf-8')
-    data = data[['label', 'message']]
-
-    # Encode labels
-    label_encoder = LabelEncoder()
-    labels = label_encoder.fit_transform(data['label'].values)
-    
-    # Text preprocessing
-    texts = data['message'].values
-
-    # Tokenization and padding
-    tokenizer = Tokenizer(num_words=5000)
-    tokenizer.fit_on_texts(texts)
-    sequences = tokenizer.texts_to_sequences(texts)
-    padded_sequences = pad_sequences(sequences, maxlen=100)
-
-    # Save the tokenizer
-    os.makedirs(SAVE_DIR, exist_ok=True)
-    with open(os.path.join(SAVE_DIR, 'tokenizer.pickle'), 'wb') as handle:
-        pickle.dump(tokenizer, handle, protocol=pickle.HIGHEST_PROTOCOL)
-
-    # Split data into training and testing sets
-    X_train, X_test, y_train, y_test = train_test_split(padded_sequences, labels, test_size=0.2, random_state=42)
 
-    # Step 2: Model Building
+# Padding lengths used by batch prediction; the last one must be the training maxlen
+BUCKET_LENGTHS = (20, 40, 100)
+
+# Inference backends: full Keras, the quantized TFLite exports, the NumPy engine and the
+# hashed n-gram linear model of hashing_model.py, which is trained separately
+BACKENDS = ('keras', 'tflite-float16', 'tflite-int8', 'numpy', 'hashing')
+
+# Loaded model per backend, reloaded when a new model version is activated
+_models = {}
+
+def build_model():
+    """
+    Builds and compiles the LSTM spam model.
+
+    Returns:
+        tf.keras.Model: The compiled, untrained model.
+    """
     model = Sequential([
         Embedding(input_dim=5000, output_dim=64, input_length=100),
         LSTM(64, return_sequences=True),
@@ -56,42 +59,329 @@ def train_sms_spam_model():
     ])
 
     model.compile(loss='binary_crossentropy', optimizer='adam', metrics=['accuracy'])
+    return model
+
+class CachedBatches(tf.keras.utils.Sequence):
+    """
+    Batches of selected rows of memory-mapped sequences, reshuffled every epoch.
+
+    Only the rows of the current batch are read, so training on a cached dataset needs
+    no in-memory copy of the whole matrix.
+    """
+
+    def __init__(self, sequences, labels, indices, batch_size=64, shuffle=True, seed=42):
+        super().__init__()
+        self.sequences = sequences
+        self.labels = labels
+        self.indices = np.array(indices)
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.rng = np.random.default_rng(seed)
+        self.on_epoch_end()
+
+    def __len__(self):
+        return (len(self.indices) + self.batch_size - 1) // self.batch_size
+
+    def __getitem__(self, index):
+        # Sorted rows read the memory-mapped file front to back; order inside a batch does not matter
+        rows = np.sort(self.indices[index * self.batch_size:(index + 1) * self.batch_size])
+        return np.asarray(self.sequences[rows]), np.asarray(self.labels[rows])
+
+    def on_epoch_end(self):
+        if self.shuffle:
+            self.rng.shuffle(self.indices)
+
+def train_sms_spam_model(dataset_path=CSV_PATH, epochs=10, batch_size=64):
+    """
+    Trains the LSTM spam model and publishes it as a new registry version.
+
+    The tokenizer and padded sequences come from the feature cache, so repeated runs on
+    the same dataset skip all preprocessing and stream batches from memory-mapped files.
+
+    Args:
+        dataset_path: CSV or Parquet file with label and message columns.
+        epochs: Number of training epochs.
+        batch_size: Training batch size.
+
+    Returns:
+        ModelBundle: The published bundle.
+    """
+    # Step 1: Data Collection and Preprocessing, cached per dataset and tokenizer
+    tokenizer, padded_sequences, labels = FeatureCache().load(dataset_path, num_words=5000, maxlen=100)
+
+    # Split row indices into training and testing sets; the same rows as splitting the arrays themselves
+    train_indices, _ = train_test_split(np.arange(len(labels)), test_size=0.2, random_state=42)
+    # Keras validation_split=0.2 held out the training rows from floor(n * 0.8) onwards
+    validation_start = int(len(train_indices) * (1 - 0.2))
+
+    # Step 2: Model Building
+    model = build_model()
 
     # Step 3: Model Training
-    model.fit(X_train, y_train, epochs=10, batch_size=64, validation_split=0.2)
+    model.fit(CachedBatches(padded_sequences, labels, train_indices[:validation_start], batch_size),
+              validation_data=CachedBatches(padded_sequences, labels, train_indices[validation_start:], batch_size,
+                                            shuffle=False),
+              epochs=epochs)
+
+    # Publish the trained model and tokenizer as a new version
+    return publish_trained_model(model, tokenizer)
+
+def publish_trained_model(model, tokenizer, registry=None):
+    """
+    Saves a trained model and its tokenizer as a new registry version and activates it.
+
+    Returns:
+        ModelBundle: The published bundle.
+    """
+    registry = registry or ModelRegistry()
+    staging_dir = registry.stage()
+    try:
+        tokenizer.save(os.path.join(staging_dir, VOCAB_FILE))
+        model.save(os.path.join(staging_dir, MODEL_FILE))
+        export_backends(staging_dir)
+        return registry.publish(staging_dir)
+    except BaseException:
+        registry.discard(staging_dir)
+        raise
 
-    # Save the trained model
-    model.save(os.path.join(SAVE_DIR, 'sms_spam_model.h5'))
+class LoadedModel:
+    """
+    Model and tokenizer of one model version, loaded for one backend.
+    """
 
-def predict_sms_spam(input_message):
-    # Check if the model file exists
-    if os.path.exists(os.path.join(SAVE_DIR, 'sms_spam_model.h5')) and os.path.exists(os.path.join(SAVE_DIR, 'tokenizer.pickle')):
-        # Load the trained model
-        model = tf.keras.models.load_model(os.path.join(SAVE_DIR, 'sms_spam_model.h5'))
+    def __init__(self, bundle, backend):
+        self.version = bundle.version
+        self.backend = backend
+        with span("tensorflow.load_tokenizer"):
+            self.tokenizer = bundle.load_tokenizer()
+        self._batch_model = None
 
-        # Load the tokenizer
-        with open(os.path.join(SAVE_DIR, 'tokenizer.pickle'), 'rb') as handle:
-            tokenizer = pickle.load(handle)
+        with span("tensorflow.load_model"):
+            if backend == 'keras':
+                self.model = tf.keras.models.load_model(bundle.path(MODEL_FILE))
+            elif backend == 'numpy':
+                from numpy_inference import NumpySpamModel
+                self.model = NumpySpamModel(self._require(bundle, WEIGHTS_FILE))
+            elif backend in ('tflite-float16', 'tflite-int8'):
+                from tflite_inference import TFLiteSpamModel
+                self.model = TFLiteSpamModel(self._require(bundle, TFLITE_FILES[backend.split('-', 1)[1]]))
+            else:
+                raise ValueError(f"Unsupported backend: {backend}")
 
-        # Tokenize and pad the input message
-        sequence = tokenizer.texts_to_sequences([input_message])
-        padded_sequence = pad_sequences(sequence, maxlen=100)
+    @staticmethod
+    def _require(bundle, name):
+        if not bundle.has(name):
+            raise ModelNotAvailableError(f"Model version {bundle.version} has no {name} export.")
+        return bundle.path(name)
 
-        # Make predictions
-        prediction = model.predict(padded_sequence)[0][0]
-        return prediction
-    else:
-        train_sms_spam_model()
-        return predict_sms_spam(input_message)
+    def predict_padded(self, padded_sequences, batch_size=512):
+        """
+        Predicts spam probabilities for padded sequences of 100 tokens.
+        """
+        if self.backend == 'keras':
+            return self.model.predict(padded_sequences, batch_size=batch_size, verbose=0)[:, 0]
+        return self.model.predict_padded(padded_sequences)
+
+    def predict_bucket(self, padded_sequences, batch_size=512):
+        """
+        Predicts spam probabilities for padded sequences of any length.
+
+        The saved Keras model is fixed to 100 time steps, so shorter buckets go through a
+        clone that shares the same weights but accepts any sequence length.
+        """
+        if self.backend != 'keras':
+            return self.model.predict_padded(padded_sequences)
+        if self._batch_model is None:
+            batch_model = tf.keras.models.clone_model(self.model, input_tensors=tf.keras.Input(shape=(None,)))
+            batch_model.set_weights(self.model.get_weights())
+            self._batch_model = batch_model
+        return self._batch_model.predict(padded_sequences, batch_size=batch_size, verbose=0)[:, 0]
+
+def load_model(backend='keras'):
+    """
+    Returns the loaded model of the current version for a backend.
+
+    The model is loaded on first use and swapped for a new one when a new version is
+    activated in the registry. Prediction never trains a model.
+
+    Raises:
+        ModelNotAvailableError: If no trained model has been published.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unsupported backend: {backend}")
+    if backend == 'hashing':
+        from hashing_model import load_hashing_model
+        return load_hashing_model()
+    if backend not in _models:
+        _models[backend] = HotReloadingModel(ModelRegistry(), lambda bundle: LoadedModel(bundle, backend))
+    return _models[backend].get()
+
+def predict_sms_spam(input_message, backend='keras'):
+    # Fails fast with ModelNotAvailableError if no model has been trained
+    loaded_model = load_model(backend)
+    if backend == 'hashing':
+        with span("tensorflow.predict"):
+            return loaded_model.predict_one(input_message)
+
+    # Tokenize and pad the input message
+    with span("tensorflow.tokenize"):
+        padded_sequence = loaded_model.tokenizer.texts_to_padded([input_message], maxlen=100)
+
+    # Make predictions
+    with span("tensorflow.predict"):
+        prediction = loaded_model.predict_padded(padded_sequence)[0]
+    return prediction
+
+def predict_sms_spam_batch(messages, batch_size=512, bucket_lengths=BUCKET_LENGTHS, chunk_size=100000,
+                           backend='keras'):
+    """
+    Predicts the spam probability of many messages at once.
+
+    Messages are read in chunks of chunk_size, so an iterator over millions of messages
+    never has to be held in memory. Every chunk is tokenized in one pass and grouped by
+    sequence length, and each group is padded only up to its bucket length instead of
+    always to 100 tokens. The LSTM then sees fewer leading padding tokens, so results can
+    differ slightly from predict_sms_spam(); pass bucket_lengths=(100,) to get identical
+    padding.
+
+    Args:
+        messages: List or iterator of SMS messages.
+        batch_size: Number of sequences per model.predict batch.
+        bucket_lengths: Ascending padding lengths; longer sequences are truncated to the last one.
+        chunk_size: Number of messages tokenized and scored together.
+        backend: Inference backend, one of BACKENDS.
+
+    Returns:
+        numpy.ndarray: Spam probabilities in input order.
+    """
+    if backend == 'hashing':
+        from hashing_model import predict_sms_spam_batch as predict_hashing_batch
+        return predict_hashing_batch(messages, chunk_size)
+
+    # The whole job uses one model version, even if a new one is activated meanwhile
+    loaded_model = load_model(backend)
+    tokenizer = loaded_model.tokenizer
+    # The TFLite exports keep the fixed 100-token input of the saved model
+    if backend.startswith('tflite-'):
+        bucket_lengths = (100,)
+
+    iterator = iter(messages)
+    results = []
+    while True:
+        chunk = list(itertools.islice(iterator, chunk_size))
+        if not chunk:
+            break
+
+        # Tokenize the whole chunk in one pass
+        with span("tensorflow.batch_tokenize"):
+            sequences = tokenizer.texts_to_sequences(chunk)
+        lengths = np.fromiter((len(sequence) for sequence in sequences), dtype=np.int64, count=len(sequences))
+        bucket_ids = np.searchsorted(bucket_lengths, np.minimum(lengths, bucket_lengths[-1]))
+
+        # Score every length bucket with its own padding and write results back in place
+        probabilities = np.empty(len(chunk), dtype=np.float32)
+        for bucket_id, bucket_length in enumerate(bucket_lengths):
+            indices = np.flatnonzero(bucket_ids == bucket_id)
+            if indices.size == 0:
+                continue
+            padded_sequences = tokenizer.pad([sequences[i] for i in indices], bucket_length)
+            with span("tensorflow.batch_predict"):
+                probabilities[indices] = loaded_model.predict_bucket(padded_sequences, batch_size)
+        results.append(probabilities)
+
+    if not results:
+        return np.empty(0, dtype=np.float32)
+    return np.concatenate(results)
+
+def run_worker(input_stream=sys.stdin, output_stream=sys.stdout, backend='keras'):
+    """
+    Runs a long-lived JSON-lines prediction loop.
+
+    The model and tokenizer are loaded once before the loop starts. Every input line is a
+    request such as {"id": 1, "message": "..."} and gets exactly one response line such as
+    {"id": 1, "spam_probability": 0.97, "model_version": "..."}. A line that cannot be served
+    gets an "error" field instead, so a caller can keep the worker alive across bad requests.
+    A newly activated model version is picked up between requests.
+
+    Args:
+        input_stream: Stream the requests are read from.
+        output_stream: Stream the responses are written to.
+        backend: Inference backend, one of BACKENDS.
+    """
+    load_model(backend)
+
+    # Tell the caller the worker is warm
+    output_stream.write(json.dumps({"status": "ready"}) + "\n")
+    output_stream.flush()
+
+    for line in input_stream:
+        line = line.strip()
+        if not line:
+            continue
+
+        request_id = None
+        try:
+            request = json.loads(line)
+            request_id = request.get("id")
+            loaded_model = load_model(backend)
+            if backend == 'hashing':
+                with span("tensorflow.predict"):
+                    probability = loaded_model.predict_one(request["message"])
+            else:
+                with span("tensorflow.tokenize"):
+                    padded_sequence = loaded_model.tokenizer.texts_to_padded([request["message"]], maxlen=100)
+                with span("tensorflow.predict"):
+                    probability = loaded_model.predict_padded(padded_sequence)[0]
+            response = {"id": request_id, "spam_probability": float(probability),
+                        "model_version": loaded_model.version}
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            response = {"id": request_id, "error": f"Invalid request: {str(e)}"}
+
+        output_stream.write(json.dumps(response, ensure_ascii=False) + "\n")
+        output_stream.flush()
 
 if __name__ == "__main__":
-    # Train the SMS spam detection model
-    if not os.path.exists(os.path.join(SAVE_DIR, 'sms_spam_model.h5')) and not os.path.exists(os.path.join(SAVE_DIR, 'tokenizer.pickle')):
-        train_sms_spam_model()
-    if len(sys.argv) > 1:
-        input_message = sys.argv[1]
-        prediction = predict_sms_spam(input_message)
-        if prediction is not None:
-            print(f"Spam Probability: {prediction}")
-    else:
-        print("Please provide an input message for prediction.")
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="SMS spam detection with the trained LSTM model.")
+    parser.add_argument("message", nargs="?", help="SMS message to score")
+    parser.add_argument("--worker", action="store_true",
+                        help="Keep the model loaded and answer JSON-lines requests on stdin")
+    parser.add_argument("--batch", metavar="FILE",
+                        help="Score one message per line from FILE ('-' for stdin) and print one probability per line")
+    parser.add_argument("--batch-size", type=int, default=512, help="Batch size used by --batch")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Worker processes used by --batch, each with its own model and pinned threads")
+    parser.add_argument("--backend", choices=BACKENDS, default='keras', help="Inference backend")
+    parser.add_argument("--train", action="store_true", help="Train a new model version and make it current")
+    parser.add_argument("--dataset", default=CSV_PATH, help="CSV or Parquet dataset used by --train")
+    parser.add_argument("--epochs", type=int, default=10, help="Number of training epochs used by --train")
+    args = parser.parse_args()
+
+    try:
+        if args.train:
+            # Train the SMS spam detection model
+            bundle = train_sms_spam_model(args.dataset, args.epochs)
+            print(f"Published model version {bundle.version}")
+        elif args.worker:
+            run_worker(backend=args.backend)
+        elif args.batch:
+            batch_file = sys.stdin if args.batch == '-' else open(args.batch, 'r', encoding='utf-8')
+            with batch_file:
+                batch_messages = (line.rstrip('\n') for line in batch_file)
+                if args.workers > 1:
+                    with InferencePool(args.workers, args.backend, batch_size=args.batch_size) as pool:
+                        for probabilities in pool.map(batch_messages):
+                            for probability in probabilities:
+                                print(float(probability))
+                else:
+                    for probability in predict_sms_spam_batch(batch_messages, batch_size=args.batch_size,
+                                                              backend=args.backend):
+                        print(float(probability))
+        elif args.message:
+            prediction = predict_sms_spam(args.message, args.backend)
+            if prediction is not None:
+                print(f"Spam Probability: {prediction}")
+        else:
+            print("Please provide an input message for prediction.")
+    except (ModelNotAvailableError, ShardFailedError) as e:
+        print(str(e), file=sys.stderr)
+        sys.exit(1)
@@ -0,0 +1,281 @@
+"""
+Description: This script manages versioned SMS spam model artifacts and reloads them while a predictor runs.
+Author: Sarper Arda BAKIR
+Date: 18-10-2026
+Version: 1.0
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import hashlib
+import argparse
+import tempfile
+import threading
+from fast_tokenizer import FastTokenizer
+
+# Registry layout: models/<version>/ holds one bundle, models/CURRENT names the active version
+SAVE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../'))
+REGISTRY_DIR = os.path.join(SAVE_DIR, 'models')
+CURRENT_FILE = 'CURRENT'
+MANIFEST_FILE = 'manifest.json'
+
+# File names inside a bundle
+MODEL_FILE = 'sms_spam_model.h5'
+VOCAB_FILE = 'tokenizer_vocab.txt'
+LEGACY_TOKENIZER_FILE = 'tokenizer.pickle'
+WEIGHTS_FILE = 'sms_spam_model.npz'
+TFLITE_FILES = {
+    'float16': 'sms_spam_model_float16.tflite',
+    'int8': 'sms_spam_model_int8.tflite',
+}
+
+# Version name used for the flat files written before the registry existed
+LEGACY_VERSION = 'legacy'
+
+class ModelNotAvailableError(FileNotFoundError):
+    """
+    Raised when no trained model artifact is available for prediction.
+    """
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as handle:
+        for block in iter(lambda: handle.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+class ModelBundle:
+    """
+    One immutable model version: the model, its tokenizer and optional exported backends.
+    """
+
+    def __init__(self, version, directory, files=None):
+        self.version = version
+        self.directory = directory
+        # Expected SHA-256 per file name; None for legacy files without a manifest
+        self.files = files
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+    def has(self, name):
+        return os.path.exists(self.path(name))
+
+    def verify(self):
+        """
+        Checks every file against the checksum recorded when the bundle was published.
+        """
+        for name, checksum in (self.files or {}).items():
+            if _sha256(self.path(name)) != checksum:
+                raise ValueError(f"Checksum mismatch for {name} in model version {self.version}.")
+
+    def load_tokenizer(self):
+        return FastTokenizer.from_artifacts(self.path(VOCAB_FILE), self.path(LEGACY_TOKENIZER_FILE))
+
+class ModelRegistry:
+    """
+    Versioned model bundles with an atomically swapped "current" pointer.
+
+    Training writes into a private staging directory and publish() renames it into place,
+    so concurrent trainers never overwrite each other's files and readers never see a
+    half-written bundle.
+    """
+
+    def __init__(self, root=REGISTRY_DIR, legacy_dir=SAVE_DIR):
+        self.root = root
+        self.legacy_dir = legacy_dir
+
+    def stage(self):
+        """
+        Creates an empty staging directory for a new bundle inside the registry.
+        """
+        os.makedirs(self.root, exist_ok=True)
+        return tempfile.mkdtemp(prefix='.staging-', dir=self.root)
+
+    def discard(self, staging_dir):
+        shutil.rmtree(staging_dir, ignore_errors=True)
+
+    def publish(self, staging_dir, version=None, activate=True):
+        """
+        Turns a staging directory into a new immutable version.
+
+        Args:
+            staging_dir: Directory returned by stage(), holding at least the model and vocabulary.
+            version: Version name. Defaults to a timestamp plus the model checksum prefix.
+            activate: Whether to make the new version current.
+
+        Returns:
+            ModelBundle: The published bundle.
+        """
+        for name in (MODEL_FILE, VOCAB_FILE):
+            if not os.path.exists(os.path.join(staging_dir, name)):
+                raise ModelNotAvailableError(f"Cannot publish a bundle without {name}.")
+
+        files = {name: _sha256(os.path.join(staging_dir, name))
+                 for name in sorted(os.listdir(staging_dir)) if name != MANIFEST_FILE}
+        version = version or f"{time.strftime('%Y%m%d-%H%M%S')}-{files[MODEL_FILE][:8]}"
+        manifest = {'version': version, 'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'), 'files': files}
+        with open(os.path.join(staging_dir, MANIFEST_FILE), 'w', encoding='utf-8') as handle:
+            json.dump(manifest, handle, indent=2)
+
+        # A directory rename is atomic, so the version appears complete or not at all
+        os.rename(staging_dir, os.path.join(self.root, version))
+        if activate:
+            self.activate(version)
+        return ModelBundle(version, os.path.join(self.root, version), files)
+
+    def activate(self, version):
+        """
+        Atomically points CURRENT at an existing version.
+        """
+        if not os.path.exists(os.path.join(self.root, version, MANIFEST_FILE)):
+            raise ModelNotAvailableError(f"Model version {version} does not exist.")
+        temporary_path = os.path.join(self.root, f'.{CURRENT_FILE}.{os.getpid()}.{threading.get_ident()}')
+        with open(temporary_path, 'w', encoding='utf-8') as handle:
+            handle.write(version)
+        os.replace(temporary_path, os.path.join(self.root, CURRENT_FILE))
+
+    def versions(self):
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(name for name in os.listdir(self.root)
+                      if os.path.exists(os.path.join(self.root, name, MANIFEST_FILE)))
+
+    def current_version(self):
+        """
+        Returns the active version name, LEGACY_VERSION for pre-registry flat files, or None.
+        """
+        try:
+            with open(os.path.join(self.root, CURRENT_FILE), 'r', encoding='utf-8') as handle:
+                return handle.read().strip()
+        except FileNotFoundError:
+            pass
+
+        has_model = os.path.exists(os.path.join(self.legacy_dir, MODEL_FILE))
+        has_tokenizer = (os.path.exists(os.path.join(self.legacy_dir, VOCAB_FILE)) or
+                         os.path.exists(os.path.join(self.legacy_dir, LEGACY_TOKENIZER_FILE)))
+        return LEGACY_VERSION if has_model and has_tokenizer else None
+
+    def current(self):
+        """
+        Returns the active bundle.
+
+        Raises:
+            ModelNotAvailableError: If no model has been published.
+        """
+        version = self.current_version()
+        if version is None:
+            raise ModelNotAvailableError("No trained SMS spam model is available. Train one with --train.")
+        if version == LEGACY_VERSION:
+            return ModelBundle(LEGACY_VERSION, self.legacy_dir)
+
+        directory = os.path.join(self.root, version)
+        try:
+            with open(os.path.join(directory, MANIFEST_FILE), 'r', encoding='utf-8') as handle:
+                manifest = json.load(handle)
+        except FileNotFoundError:
+            raise ModelNotAvailableError(f"Current model version {version} does not exist.")
+        return ModelBundle(version, directory, manifest['files'])
+
+def export_backends(directory):
+    """
+    Writes the NumPy and TFLite exports next to the model and vocabulary in a staging directory.
+
+    A failed export only leaves that backend out of the bundle.
+    """
+    from numpy_inference import export_weights
+    from tflite_inference import export_tflite
+
+    model_path = os.path.join(directory, MODEL_FILE)
+    vocab_path = os.path.join(directory, VOCAB_FILE)
+    exports = [(WEIGHTS_FILE, lambda path: export_weights(model_path, vocab_path, output_path=path))]
+    for quantization, name in TFLITE_FILES.items():
+        exports.append((name, lambda path, quantization=quantization: export_tflite(quantization, model_path, path)))
+
+    for name, export in exports:
+        try:
+            export(os.path.join(directory, name))
+        except Exception as e:
+            print(f"Skipping {name}: {str(e)}", file=sys.stderr)
+
+class HotReloadingModel:
+    """
+    Keeps the model of the current version loaded and swaps in new versions as they are activated.
+
+    get() checks the CURRENT pointer at most every check_interval seconds. A new version is
+    loaded and verified by one caller while the others keep using the old one; callers that
+    already hold the old model finish their requests with it.
+    """
+
+    def __init__(self, registry, loader, check_interval=5.0):
+        self.registry = registry
+        self.loader = loader
+        self.check_interval = check_interval
+        self._loaded = None
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+
+    def get(self):
+        loaded = self._loaded
+        now = time.monotonic()
+        if loaded is None or now - self._last_check >= self.check_interval:
+            self._last_check = now
+            if loaded is None or self.registry.current_version() != loaded[0]:
+                loaded = self._reload(loaded)
+        return loaded[1]
+
+    def _reload(self, loaded):
+        # The first load blocks; later reloads are done by whichever caller gets the lock
+        if not self._lock.acquire(blocking=loaded is None):
+            return loaded
+        try:
+            if self._loaded is not loaded:
+                return self._loaded
+            bundle = self.registry.current()
+            bundle.verify()
+            self._loaded = (bundle.version, self.loader(bundle))
+            return self._loaded
+        except (ValueError, OSError) as e:
+            if loaded is None:
+                raise
+            print(f"Keeping model version {loaded[0]}: {str(e)}", file=sys.stderr)
+            return loaded
+        finally:
+            self._lock.release()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage versioned SMS spam model artifacts.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    publish_parser = subparsers.add_parser("publish", help="Publish a trained model as a new version")
+    publish_parser.add_argument("--model", default=os.path.join(SAVE_DIR, MODEL_FILE), help="Trained Keras model")
+    publish_parser.add_argument("--vocab", default=os.path.join(SAVE_DIR, VOCAB_FILE), help="Tokenizer vocabulary")
+    publish_parser.add_argument("--no-exports", action="store_true", help="Do not add NumPy/TFLite exports")
+    publish_parser.add_argument("--no-activate", action="store_true", help="Publish without making it current")
+    activate_parser = subparsers.add_parser("activate", help="Make an existing version current")
+    activate_parser.add_argument("version")
+    subparsers.add_parser("list", help="List published versions")
+    args = parser.parse_args()
+
+    registry = ModelRegistry()
+    if args.command == "publish":
+        staging_dir = registry.stage()
+        try:
+            shutil.copyfile(args.model, os.path.join(staging_dir, MODEL_FILE))
+            shutil.copyfile(args.vocab, os.path.join(staging_dir, VOCAB_FILE))
+            if not args.no_exports:
+                export_backends(staging_dir)
+            bundle = registry.publish(staging_dir, activate=not args.no_activate)
+        except BaseException:
+            registry.discard(staging_dir)
+            raise
+        print(f"Published model version {bundle.version}")
+    elif args.command == "activate":
+        registry.activate(args.version)
+        print(f"Current model version: {args.version}")
+    else:
+        current = registry.current_version()
+        for version in registry.versions():
+            print(f"{'*' if version == current else ' '} {version}")
@@ -0,0 +1,175 @@
+"""
+Description: This script runs the trained SMS spam model with NumPy only, without importing TensorFlow.
+Author: Sarper Arda BAKIR
+Date: 18-10-2026
+Version: 1.1
+"""
+
+import os
+import argparse
+import numpy as np
+from fast_tokenizer import TOKENIZER_PATH, VOCAB_PATH, FastTokenizer
+
+# Define the path of the trained model, the tokenizer and the exported weights
+SAVE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../'))
+CSV_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), 'sms.csv'))
+MODEL_PATH = os.path.join(SAVE_DIR, 'sms_spam_model.h5')
+WEIGHTS_PATH = os.path.join(SAVE_DIR, 'sms_spam_model.npz')
+MAXLEN = 100
+
+def export_weights(model_path=MODEL_PATH, vocab_path=VOCAB_PATH, tokenizer_path=TOKENIZER_PATH,
+                   output_path=WEIGHTS_PATH):
+    """
+    Exports the weights of the trained Keras model and the used vocabulary into a .npz file.
+
+    Only this function needs TensorFlow; the exported file is everything NumpySpamModel needs.
+
+    Args:
+        model_path: Path of the trained Keras model.
+        vocab_path: Path of the tokenizer vocabulary file.
+        tokenizer_path: Path of the pickled Keras tokenizer, used when there is no vocabulary file.
+        output_path: Path of the .npz file to write.
+    """
+    import tensorflow as tf
+
+    model = tf.keras.models.load_model(model_path)
+    tokenizer = FastTokenizer.from_artifacts(vocab_path, tokenizer_path)
+
+    weights = {}
+    lstm_count = 0
+    for layer in model.layers:
+        layer_type = type(layer).__name__
+        if layer_type == 'Embedding':
+            weights['embedding'] = layer.get_weights()[0]
+        elif layer_type == 'LSTM':
+            config = layer.get_config()
+            if config['activation'] != 'tanh' or config['recurrent_activation'] != 'sigmoid':
+                raise ValueError(f"Unsupported activations in layer {layer.name}.")
+            kernel, recurrent_kernel, bias = layer.get_weights()
+            weights[f'lstm{lstm_count}_kernel'] = kernel
+            weights[f'lstm{lstm_count}_recurrent_kernel'] = recurrent_kernel
+            weights[f'lstm{lstm_count}_bias'] = bias
+            lstm_count += 1
+        elif layer_type == 'Dense':
+            weights['dense_kernel'], weights['dense_bias'] = layer.get_weights()
+        elif layer_type != 'Dropout':
+            raise ValueError(f"Unsupported layer type: {layer_type}")
+
+    np.savez(output_path,
+             vocab=np.array(tokenizer.words),
+             num_words=np.array(tokenizer.num_words),
+             lstm_count=np.array(lstm_count),
+             **{name: np.asarray(value, dtype=np.float32) for name, value in weights.items()})
+
+def _sigmoid(x):
+    return 1.0 / (1.0 + np.exp(-x))
+
+class NumpySpamModel:
+    """
+    NumPy forward pass of the Embedding -> LSTM -> LSTM -> Dense(sigmoid) spam model.
+    """
+
+    def __init__(self, weights_path=WEIGHTS_PATH):
+        with np.load(weights_path) as data:
+            self.embedding = data['embedding']
+            self.lstm_layers = [
+                (data[f'lstm{i}_kernel'], data[f'lstm{i}_recurrent_kernel'], data[f'lstm{i}_bias'])
+                for i in range(int(data['lstm_count']))
+            ]
+            self.dense_kernel = data['dense_kernel']
+            self.dense_bias = data['dense_bias']
+            self.tokenizer = FastTokenizer(data['vocab'].tolist(), int(data['num_words']))
+
+    def texts_to_padded(self, messages, maxlen=MAXLEN):
+        """
+        Converts messages to the pre-padded int32 matrix the model expects.
+        """
+        return self.tokenizer.texts_to_padded(messages, maxlen)
+
+    def predict_padded(self, padded_sequences, batch_size=1024):
+        """
+        Runs the forward pass over padded sequences.
+
+        Args:
+            padded_sequences: Integer matrix of shape (messages, time steps).
+            batch_size: Number of messages processed together.
+
+        Returns:
+            numpy.ndarray: Spam probabilities, one per row.
+        """
+        padded_sequences = np.asarray(padded_sequences)
+        probabilities = np.empty(len(padded_sequences), dtype=np.float32)
+        for start in range(0, len(padded_sequences), batch_size):
+            outputs = self.embedding[padded_sequences[start:start + batch_size]]
+            for kernel, recurrent_kernel, bias in self.lstm_layers:
+                outputs = self._lstm(outputs, kernel, recurrent_kernel, bias)
+            # Only the last time step of the last LSTM feeds the Dense layer
+            logits = outputs[:, -1, :] @ self.dense_kernel + self.dense_bias
+            probabilities[start:start + batch_size] = _sigmoid(logits)[:, 0]
+        return probabilities
+
+    def predict(self, messages, batch_size=1024):
+        """
+        Predicts the spam probability of a list of messages.
+        """
+        return self.predict_padded(self.texts_to_padded(list(messages)), batch_size=batch_size)
+
+    @staticmethod
+    def _lstm(inputs, kernel, recurrent_kernel, bias):
+        batch, steps, _ = inputs.shape
+        units = recurrent_kernel.shape[0]
+
+        # Input projections of all time steps at once; gates are ordered i, f, c, o as in Keras
+        projected = inputs @ kernel + bias
+        h = np.zeros((batch, units), dtype=np.float32)
+        c = np.zeros((batch, units), dtype=np.float32)
+        outputs = np.empty((batch, steps, units), dtype=np.float32)
+        for t in range(steps):
+            z = projected[:, t, :] + h @ recurrent_kernel
+            i = _sigmoid(z[:, :units])
+            f = _sigmoid(z[:, units:2 * units])
+            g = np.tanh(z[:, 2 * units:3 * units])
+            o = _sigmoid(z[:, 3 * units:])
+            c = f * c + i * g
+            h = o * np.tanh(c)
+            outputs[:, t, :] = h
+        return outputs
+
+def verify_against_keras(messages, weights_path=WEIGHTS_PATH, model_path=MODEL_PATH, atol=1e-5):
+    """
+    Compares NumpySpamModel with the Keras model on the given messages.
+
+    Returns:
+        float: Largest absolute difference between the two models.
+    """
+    import tensorflow as tf
+
+    numpy_model = NumpySpamModel(weights_path)
+    keras_model = tf.keras.models.load_model(model_path)
+    padded_sequences = numpy_model.texts_to_padded(list(messages))
+    expected = keras_model.predict(padded_sequences, batch_size=1024, verbose=0)[:, 0]
+    actual = numpy_model.predict_padded(padded_sequences)
+    max_difference = float(np.max(np.abs(expected - actual)))
+    if max_difference > atol:
+        raise AssertionError(f"NumPy model differs from Keras by {max_difference} (tolerance {atol}).")
+    return max_difference
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="TensorFlow-free inference for the SMS spam model.")
+    parser.add_argument("message", nargs="?", help="SMS message to score")
+    parser.add_argument("--export", action="store_true",
+                        help="Export sms_spam_model.h5 to sms_spam_model.npz and verify it on sms.csv")
+    args = parser.parse_args()
+
+    if args.export:
+        import pandas as pd
+
+        export_weights()
+        sample = pd.read_csv(CSV_PATH, encoding='utf-8')['message'].astype(str).tolist()
+        difference = verify_against_keras(sample)
+        print(f"Exported weights to {WEIGHTS_PATH} (max difference to Keras: {difference:.2e})")
+    elif args.message:
+        model = NumpySpamModel()
+        print(f"Spam Probability: {model.predict([args.message])[0]}")
+    else:
+        print("Please provide an input message for prediction.")
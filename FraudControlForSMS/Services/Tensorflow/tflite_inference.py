@@ -0,0 +1,111 @@
+"""
+Description: This script exports the trained SMS spam model to quantized TFLite models and runs them.
+Author: Sarper Arda BAKIR
+Date: 18-10-2026
+Version: 1.0
+"""
+
+import os
+import argparse
+import numpy as np
+
+# Define the path of the trained model and the exported TFLite models
+SAVE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../'))
+MODEL_PATH = os.path.join(SAVE_DIR, 'sms_spam_model.h5')
+TFLITE_PATHS = {
+    'float16': os.path.join(SAVE_DIR, 'sms_spam_model_float16.tflite'),
+    'int8': os.path.join(SAVE_DIR, 'sms_spam_model_int8.tflite'),
+}
+MAXLEN = 100
+
+def export_tflite(quantization, model_path=MODEL_PATH, output_path=None):
+    """
+    Converts the trained Keras model to a TFLite model.
+
+    The model is converted with a fixed input of one 100-token message, which lets the
+    converter fuse both LSTM layers into native TFLite ops. A dynamic batch dimension
+    only converts with the Select TF ops (Flex) delegate, which the standalone runtimes
+    lack, and the fused model cannot be resized, so batches run as one invoke per row.
+
+    Args:
+        quantization: 'float16' for float16 weights or 'int8' for dynamic-range int8 weights.
+        model_path: Path of the trained Keras model.
+        output_path: Path of the .tflite file to write. Defaults to TFLITE_PATHS[quantization].
+
+    Returns:
+        str: Path of the written .tflite file.
+    """
+    import tensorflow as tf
+
+    if quantization not in TFLITE_PATHS:
+        raise ValueError(f"Unsupported quantization: {quantization}")
+    output_path = output_path or TFLITE_PATHS[quantization]
+
+    model = tf.keras.models.load_model(model_path)
+    run_model = tf.function(lambda x: model(x, training=False))
+    concrete_function = run_model.get_concrete_function(tf.TensorSpec([1, MAXLEN], model.inputs[0].dtype))
+
+    converter = tf.lite.TFLiteConverter.from_concrete_functions([concrete_function], model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if quantization == 'float16':
+        converter.target_spec.supported_types = [tf.float16]
+
+    with open(output_path, 'wb') as handle:
+        handle.write(converter.convert())
+    return output_path
+
+def _load_interpreter(model_path):
+    # Prefer the standalone runtimes so scoring nodes do not need full TensorFlow
+    try:
+        from ai_edge_litert.interpreter import Interpreter
+    except ImportError:
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            import tensorflow as tf
+            Interpreter = tf.lite.Interpreter
+    return Interpreter(model_path=model_path)
+
+class TFLiteSpamModel:
+    """
+    Runs an exported TFLite spam model one message at a time.
+    """
+
+    # The exported input is fixed at one message, so predict_padded() loops over rows
+    batched = False
+
+    def __init__(self, model_path):
+        self.interpreter = _load_interpreter(model_path)
+        self.interpreter.allocate_tensors()
+        input_details = self.interpreter.get_input_details()[0]
+        self.input_index = input_details['index']
+        self.input_dtype = input_details['dtype']
+        self.output_index = self.interpreter.get_output_details()[0]['index']
+
+    def predict_padded(self, padded_sequences):
+        """
+        Runs the model over padded sequences of 100 tokens, one invoke per row.
+
+        Args:
+            padded_sequences: Integer matrix of shape (messages, 100).
+
+        Returns:
+            numpy.ndarray: Spam probabilities, one per row.
+        """
+        padded_sequences = np.asarray(padded_sequences, dtype=self.input_dtype)
+        probabilities = np.empty(len(padded_sequences), dtype=np.float32)
+        for row in range(len(padded_sequences)):
+            self.interpreter.set_tensor(self.input_index, padded_sequences[row:row + 1])
+            self.interpreter.invoke()
+            probabilities[row] = self.interpreter.get_tensor(self.output_index)[0][0]
+        return probabilities
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the SMS spam model to TFLite.")
+    parser.add_argument("--quantization", choices=sorted(TFLITE_PATHS), action="append",
+                        help="Quantization to export (default: all)")
+    args = parser.parse_args()
+
+    for quantization in args.quantization or sorted(TFLITE_PATHS):
+        path = export_tflite(quantization)
+        print(f"Exported {quantization} model to {path} ({os.path.getsize(path)} bytes)")